@@ -0,0 +1,60 @@
+"""
+Read-replica routing for analysis reads.
+
+Reads go to a replica only inside analysis_reads(), which wraps the
+read-only stored-task analysis endpoints. Everything else, including
+writes, signal handlers and admin reads that must see their own writes,
+stays on "default". With no replica_* aliases configured this router
+does nothing.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+_analysis_reads = contextvars.ContextVar('analysis_reads', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+@contextmanager
+def analysis_reads():
+    """Route ORM reads in this block to a read replica, if any."""
+    token = _analysis_reads.set(True)
+    try:
+        yield
+    finally:
+        _analysis_reads.reset(token)
+
+
+def uses_analysis_reads(view):
+    """Decorator form of analysis_reads()."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with analysis_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _analysis_reads.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return not db.startswith('replica_')
@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
+
+from .database import database_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +49,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     "django.middleware.security.SecurityMiddleware",
+    'tasks.middleware.AdmissionMiddleware',
+    'tasks.middleware.CompressionMiddleware',
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -65,6 +70,72 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, 'content-encoding')
+
+# Request-body decompression and response compression for the tasks API
+# (see tasks/middleware.py). zstd needs the optional `zstandard` package.
+TASKS_COMPRESSION = {
+    'MIN_RESPONSE_SIZE': int(os.environ.get('TASKS_MIN_COMPRESS_SIZE', 1024)),
+    'MAX_DECOMPRESSED_SIZE': int(os.environ.get('TASKS_MAX_DECOMPRESSED_SIZE', 50 * 1024 * 1024)),
+    'RESPONSE_URL_NAMES': ['analyze_tasks', 'suggest_tasks', 'analyze_batch', 'plan_tasks',
+                           'forecast_tasks', 'diff_tasks', 'job_results'],
+}
+
+# Admission control for the analysis endpoints (see tasks/admission.py):
+# per-client rate limit and request size limits, checked before the work
+# they guard. Set TASKS_RATE_LIMIT to 0 to turn rate limiting off.
+TASKS_ADMISSION = {
+    'RATE': float(os.environ.get('TASKS_RATE_LIMIT', 10)),
+    'BURST': int(os.environ.get('TASKS_RATE_BURST', 40)),
+    'MAX_BODY_SIZE': int(os.environ.get('TASKS_MAX_BODY_SIZE', 10 * 1024 * 1024)),
+    'MAX_TASKS': int(os.environ.get('TASKS_MAX_TASKS', 100000)),
+    'MAX_DEPENDENCY_EDGES': int(os.environ.get('TASKS_MAX_DEPENDENCY_EDGES', 500000)),
+    'CLIENT_IP_HEADER': os.environ.get('TASKS_CLIENT_IP_HEADER') or None,
+}
+
+# Analysis job queue (POST /api/tasks/jobs/, run by `manage.py run_jobs`):
+# jobs running at once across all workers, and seconds results are kept.
+TASKS_JOBS = {
+    'MAX_RUNNING': int(os.environ.get('TASKS_JOBS_MAX_RUNNING', 2)),
+    'RESULT_TTL': int(os.environ.get('TASKS_JOBS_RESULT_TTL', 24 * 60 * 60)),
+}
+
+# Live stored-task ranking streams (see tasks/live.py), per process
+TASKS_LIVE = {
+    'MAX_SUBSCRIBERS': int(os.environ.get('TASKS_LIVE_MAX_SUBSCRIBERS', 1000)),
+    'POLL_INTERVAL': float(os.environ.get('TASKS_LIVE_POLL_INTERVAL', 2.0)),
+}
+
+# Optional JSON file of working calendars ({"name": {"weekmask": "1111100",
+# "holidays": ["2026-12-25"]}}), used for names not in the WorkingCalendar table.
+TASKS_CALENDARS_FILE = os.environ.get('TASKS_CALENDARS_FILE')
+
+# Upper bound on jobs per /api/tasks/analyze-batch/ request, and the thread
+# pool size used when a batch asks for "parallel": true.
+TASKS_BATCH_MAX_JOBS = int(os.environ.get('TASKS_BATCH_MAX_JOBS', 1000))
+TASKS_BATCH_MAX_WORKERS = int(os.environ.get('TASKS_BATCH_MAX_WORKERS', 4))
+
+# Overrides for the score threshold tables (see tasks/scoring/tables.py for
+# the defaults), e.g. {"effort": {"default_hours": 2, "bounds": [1, 4],
+# "inclusive": [false, true], "points": [15, 5, -5]}}. Entries in the JSON
+# file named by TASKS_SCORE_TABLES_FILE take precedence.
+TASKS_SCORE_TABLES = {}
+TASKS_SCORE_TABLES_FILE = os.environ.get('TASKS_SCORE_TABLES_FILE')
+
+# Strategy overrides/additions, e.g. {"deadline_driven": {"urgency": 4}} or
+# {"my_team": {"urgency": 2, "importance": 2, "effort": 0, "dependencies": 1,
+# "description": "..."}}; weights must be non-negative.
+TASKS_STRATEGIES = {}
+
+# Build scoring caches (strategies, calendars, date parser) at startup so
+# the first requests of each worker are as fast as later ones.
+TASKS_WARMUP = os.environ.get('TASKS_WARMUP', 'True') == 'True'
+
+# Paginated analyses (limit/cursor) cache the full ranking for this many
+# seconds, so later pages are served without re-running the analysis.
+TASKS_RANKING_CACHE_TIMEOUT = int(os.environ.get('TASKS_RANKING_CACHE_TIMEOUT', 300))
+TASKS_MAX_PAGE_SIZE = int(os.environ.get('TASKS_MAX_PAGE_SIZE', 1000))
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -88,12 +159,12 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
-}
+# SQLite at BASE_DIR/db.sqlite3 (WAL mode) unless DATABASE_URL says
+# otherwise; see backend/database.py for pooling and replica variables.
+DATABASES = database_settings(BASE_DIR)
+
+# Stored-task analysis reads go to replica_* aliases when configured
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
 
 
 # Password validation
@@ -0,0 +1,42 @@
+"""
+API-only deployment profile: DJANGO_SETTINGS_MODULE=backend.settings_api
+
+The tasks API is stateless JSON, so this profile drops what only the admin
+and browser sessions need: the admin, auth, sessions and messages apps
+(nothing is imported for them at startup) and the session, CSRF, auth,
+messages and clickjacking middleware (nothing runs for them per request).
+DRF is configured without authentication and with the JSON renderer only.
+
+Everything else, including the database, caches and TASKS_* settings,
+comes from backend.settings. Run `python manage.py benchmark profile` to
+compare the two profiles.
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'corsheaders',
+    'rest_framework',
+    'tasks',
+]
+
+MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'tasks.middleware.AdmissionMiddleware',
+    'tasks.middleware.CompressionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'backend.urls_api'
+
+# No templates are rendered: JSON responses only
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
+    # Without this DRF imports django.contrib.auth for AnonymousUser
+    'UNAUTHENTICATED_USER': None,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser'],
+}
@@ -1,7 +1,10 @@
 const API_BASE_URL = 'https://task-analyzer-2827.onrender.com/api/tasks';
 
+const RESULTS_PAGE_SIZE = 20;
+
 let tasksData = [];
 let completedTasks = new Set();
+let lastAnalyzeRequest = null;
 
 document.addEventListener('DOMContentLoaded', function() {
     initializeEventListeners();
@@ -306,24 +309,19 @@ async function handleAnalyze() {
     showLoading(true);
     clearResults();
 
-    try {
-        const response = await fetch(`${API_BASE_URL}/analyze/`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                tasks: activeTasks,
-                strategy: strategy
-            })
-        });
+    lastAnalyzeRequest = {
+        tasks: activeTasks,
+        strategy: strategy,
+        limit: RESULTS_PAGE_SIZE
+    };
 
-        const data = await response.json();
+    try {
+        const data = await fetchAnalyzePage(lastAnalyzeRequest);
 
         showLoading(false);
 
-        if (!response.ok || !data.success) {
-            showResultsError(data.message || data.error || 'Analysis failed');
+        if (!data.success) {
+            showResultsError((data.errors && data.error) || data.message || data.error || 'Analysis failed');
             return;
         }
 
@@ -335,6 +333,42 @@ async function handleAnalyze() {
     }
 }
 
+async function fetchAnalyzePage(request, cursor) {
+    // The server caches the ranking, so later pages don't re-run the analysis
+    const response = await fetch(`${API_BASE_URL}/analyze/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(cursor ? { ...request, cursor: cursor } : request)
+    });
+
+    const data = await response.json();
+    if (!response.ok) {
+        data.success = false;
+    }
+    return data;
+}
+
+async function handleLoadMore(event) {
+    const button = event.target;
+    button.disabled = true;
+
+    try {
+        const data = await fetchAnalyzePage(lastAnalyzeRequest, button.dataset.cursor);
+
+        if (!data.success) {
+            showResultsError((data.errors && data.error) || data.message || data.error || 'Analysis failed');
+            return;
+        }
+
+        displayResults(data, true);
+    } catch (error) {
+        button.disabled = false;
+        console.error('API Error:', error);
+    }
+}
+
 async function handleSuggest() {
     // Only suggest from non-completed tasks
     const activeTasks = tasksData.filter(task => !completedTasks.has(task.id));
@@ -366,7 +400,7 @@ async function handleSuggest() {
         showLoading(false);
 
         if (!response.ok || !data.success) {
-            showResultsError(data.message || data.error || 'Failed to get suggestions');
+            showResultsError((data.errors && data.error) || data.message || data.error || 'Failed to get suggestions');
             return;
         }
 
@@ -378,7 +412,7 @@ async function handleSuggest() {
     }
 }
 
-function displayResults(data) {
+function displayResults(data, append = false) {
     const resultsContainer = document.getElementById('results-container');
     const summaryDiv = document.getElementById('results-summary');
     const summaryText = document.getElementById('summary-text');
@@ -386,18 +420,23 @@ function displayResults(data) {
     summaryText.textContent = `Analyzed ${data.total_tasks} task(s) using "${data.strategy}" strategy`;
     summaryDiv.classList.remove('hidden');
 
-    if (data.results.length === 0) {
+    const loadMoreBtn = document.getElementById('load-more-btn');
+    if (loadMoreBtn) loadMoreBtn.remove();
+
+    if (data.results.length === 0 && !append) {
         resultsContainer.innerHTML = '<p class="empty-state-large">No results</p>';
         return;
     }
 
-    resultsContainer.innerHTML = data.results.map((task, index) => {
+    const offset = append ? resultsContainer.querySelectorAll('.task-card-compact').length : 0;
+
+    const cards = data.results.map((task, index) => {
         const priorityClass = task.priority_level.toLowerCase();
 
         return `
             <div class="task-card-compact ${priorityClass}">
                 <div class="task-card-header-compact">
-                    <span class="task-serial-result">#${index + 1}</span>
+                    <span class="task-serial-result">#${offset + index + 1}</span>
                     <div class="task-card-title-compact">${escapeHtml(task.title)}</div>
                     <span class="priority-badge-compact ${priorityClass}">${task.priority_level}</span>
                 </div>
@@ -427,6 +466,21 @@ function displayResults(data) {
             </div>
         `;
     }).join('');
+
+    if (append) {
+        resultsContainer.insertAdjacentHTML('beforeend', cards);
+    } else {
+        resultsContainer.innerHTML = cards;
+    }
+
+    if (data.next_cursor) {
+        resultsContainer.insertAdjacentHTML('beforeend', `
+            <button id="load-more-btn" class="btn btn-secondary btn-sm" data-cursor="${escapeHtml(data.next_cursor)}">
+                Load more (${offset + data.results.length} of ${data.total_tasks})
+            </button>
+        `);
+        document.getElementById('load-more-btn').addEventListener('click', handleLoadMore);
+    }
 }
 
 function displaySuggestions(data) {
@@ -448,7 +502,7 @@ function displaySuggestions(data) {
         return `
             <div class="task-card-compact ${priorityClass}">
                 <div class="task-card-header-compact">
-                    <span class="task-serial-result">#${index + 1}</span>
+                    <span class="task-serial-result">#${offset + index + 1}</span>
                     <div class="task-card-title-compact">${escapeHtml(task.title)}</div>
                     <span class="priority-badge-compact ${priorityClass}">${task.priority}</span>
                 </div>
@@ -0,0 +1,12 @@
+"""
+URL configuration for the API-only profile (backend.settings_api): the
+tasks API without the admin.
+"""
+
+from django.urls import path, include
+from backend.views import HomeView
+
+urlpatterns = [
+    path("", HomeView.as_view(), name='home'),  # Root URL
+    path('api/tasks/', include('tasks.urls')),
+]
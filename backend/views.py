@@ -1,14 +1,31 @@
+from django.apps import apps
 from django.http import JsonResponse
 from django.views import View
 
 class HomeView(View):
     def get(self, request):
+        endpoints = {
+            'analyze': '/api/tasks/analyze/',
+            'suggest': '/api/tasks/suggest/',
+            'analyze_batch': '/api/tasks/analyze-batch/',
+            'plan': '/api/tasks/plan/',
+            'forecast': '/api/tasks/forecast/',
+            'diff': '/api/tasks/diff/',
+            'export': '/api/tasks/export/csv/',
+            'stored_suggest': '/api/tasks/stored/suggest/',
+            'stored_analyze': '/api/tasks/stored/analyze/',
+            'stored_export': '/api/tasks/stored/export/csv/',
+            'stored_live': '/api/tasks/stored/live/',
+            'stored_reachable': '/api/tasks/stored/reachable/',
+            'stored_bulk': '/api/tasks/stored/bulk/',
+            'jobs': '/api/tasks/jobs/',
+            'metrics': '/api/tasks/metrics/',
+        }
+        # Not in the API-only profile (backend.settings_api)
+        if apps.is_installed('django.contrib.admin'):
+            endpoints['admin'] = '/admin/'
         return JsonResponse({
             'message': 'Smart Task Analyzer API',
             'status': 'online',
-            'endpoints': {
-                'analyze': '/api/tasks/analyze/',
-                'suggest': '/api/tasks/suggest/',
-                'admin': '/admin/'
-            }
+            'endpoints': endpoints
         })
@@ -0,0 +1,14 @@
+"""
+gunicorn settings (picked up automatically from the working directory).
+
+preload_app imports the project, and so runs TasksConfig.ready() and its
+scoring warmup, once in the master process; workers fork with the warm
+caches already in memory (shared copy-on-write).
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'backend.wsgi:application'
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
@@ -0,0 +1,110 @@
+"""
+Admission control for the analysis endpoints.
+
+Two layers, both cheaper than the work they guard:
+
+- AdmissionMiddleware (tasks/middleware.py), before the body is read or
+  parsed: a per-client token bucket and a Content-Length limit.
+- check_task_limits(), right after parsing and before validation or
+  scoring: limits on the number of tasks and dependency edges.
+
+Configured with settings.TASKS_ADMISSION (see ADMISSION_DEFAULTS).
+Every decision is counted in tasks.metrics.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import metrics
+
+ADMISSION_DEFAULTS = {
+    # Token bucket per client: RATE requests per second on average, bursts
+    # of up to BURST. RATE 0 turns rate limiting off.
+    'RATE': 10.0,
+    'BURST': 40,
+    'MAX_BODY_SIZE': 10 * 1024 * 1024,
+    'MAX_TASKS': 100000,
+    'MAX_DEPENDENCY_EDGES': 500000,
+    # META key of a proxy header holding the client address
+    # (e.g. 'HTTP_X_FORWARDED_FOR'); REMOTE_ADDR when None
+    'CLIENT_IP_HEADER': None,
+    # Clients tracked at once; the least recently seen are forgotten
+    'MAX_CLIENTS': 10000,
+    'URL_NAMES': ['analyze_tasks', 'suggest_tasks', 'analyze_batch', 'plan_tasks', 'forecast_tasks',
+                  'diff_tasks', 'export_tasks', 'create_job', 'bulk_tasks'],
+}
+
+
+def get_admission_settings():
+    """Return TASKS_ADMISSION merged over the defaults."""
+    return {**ADMISSION_DEFAULTS, **getattr(settings, 'TASKS_ADMISSION', {})}
+
+
+def client_key(request, config):
+    header = config['CLIENT_IP_HEADER']
+    if header and request.META.get(header):
+        # Left-most entry: the original client
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by client, kept in memory (per worker process).
+
+    Each bucket holds up to `burst` tokens and refills at `rate` tokens per
+    second; a request takes one token or is refused.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets = OrderedDict()   # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """
+        Take a token for `key`. Returns 0 if allowed, else the seconds until
+        a token is available.
+        """
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / self.rate
+
+
+def check_task_limits(tasks, config=None):
+    """
+    Check a parsed task list (any iterable of tasks) against MAX_TASKS and
+    MAX_DEPENDENCY_EDGES, stopping at the first limit passed.
+
+    Returns an error message, or None if the tasks are admitted.
+    """
+    config = config or get_admission_settings()
+    max_tasks = config['MAX_TASKS']
+    max_edges = config['MAX_DEPENDENCY_EDGES']
+
+    count = edges = 0
+    for task in tasks:
+        count += 1
+        if count > max_tasks:
+            metrics.increment('admission.rejected.task_count')
+            return f'A request may contain at most {max_tasks} tasks'
+        dependencies = task.get('dependencies') if isinstance(task, dict) else None
+        if isinstance(dependencies, list):
+            edges += len(dependencies)
+            if edges > max_edges:
+                metrics.increment('admission.rejected.dependency_edges')
+                return f'A request may contain at most {max_edges} dependencies'
+    return None
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tasks"
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects receivers)
+
+        # Compiling and warming up here, before gunicorn forks its workers
+        # (preload_app), builds the caches once and shares them copy-on-write
+        # instead of making each worker's first requests pay for them.
+        signals.configure_scoring()
+
+        from django.conf import settings
+        if settings.TASKS_WARMUP:
+            from .warmup import warm_up
+            warm_up()
@@ -0,0 +1,867 @@
+"""
+Performance benchmarks for the scoring API.
+
+Run with: python manage.py benchmark <name> [--tasks N] [--repeat R]
+
+Every benchmark takes (out, tasks, repeat) and writes a small plain-text
+report to `out`. Timings are in-process (Django test client), so they
+include middleware, parsing, scoring and rendering but not the network.
+"""
+import gzip
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from django.test import Client
+
+from .middleware import zstandard
+from .scoring import analyze_tasks, get_valid_strategies, tables
+from .scoring.calendar import CompiledCalendar
+from .scoring.graph import score_dependencies
+from .scoring.planner import plan_tasks
+
+
+TITLES = [
+    'Fix login bug', 'Write release notes', 'Review pull request',
+    'Update dependencies', 'Plan sprint', 'Refactor billing module',
+    'Customer call follow-up', 'Migrate reports to new schema',
+    'Investigate flaky test', 'Prepare quarterly report',
+]
+
+
+def make_tasks(n, seed=0, dependency_rate=0.2, today=None):
+    """
+    Build a realistic task list: spread-out due dates, mixed importance and
+    effort, and acyclic dependencies on earlier tasks.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    tasks = []
+
+    for i in range(n):
+        dependencies = []
+        if i > 0 and rng.random() < dependency_rate:
+            dependencies = sorted(set(
+                rng.randrange(max(0, i - 50), i) for _ in range(rng.randint(1, 3))
+            ))
+
+        tasks.append({
+            'id': i,
+            'title': f'{rng.choice(TITLES)} #{i}',
+            'due_date': str(today + timedelta(days=rng.randint(-5, 40))),
+            'importance': rng.randint(1, 10),
+            'estimated_hours': rng.choice([0.5, 1, 1.5, 2, 3, 4, 6, 8]),
+            'dependencies': dependencies,
+        })
+
+    return tasks
+
+
+def _time(fn, repeat):
+    """Run fn `repeat` times and return (best_seconds, last_result)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _ok(response):
+    """The response, or an error if the request was refused (never time a rejection)."""
+    if response.status_code != 200:
+        raise RuntimeError(
+            f'{response.request["PATH_INFO"]} answered {response.status_code}: '
+            f'{response.content[:200]!r}'
+        )
+    return response
+
+
+def bench_compression(out, tasks=1000, repeat=5):
+    """Bandwidth and latency of /analyze/ with and without compression."""
+    client = Client()
+    body = json.dumps({'tasks': make_tasks(tasks), 'strategy': 'smart_balance'}).encode()
+
+    encodings = [('identity', body)]
+    encodings.append(('gzip', gzip.compress(body)))
+    if zstandard is not None:
+        encodings.append(('zstd', zstandard.ZstdCompressor().compress(body)))
+
+    out.write(f'compression: {tasks} tasks, request body {len(body)} bytes\n')
+    out.write(f'{"coding":<10}{"request":>12}{"response":>12}{"best ms":>10}\n')
+
+    for coding, payload in encodings:
+        headers = {'HTTP_ACCEPT_ENCODING': coding}
+        if coding != 'identity':
+            headers['HTTP_CONTENT_ENCODING'] = coding
+
+        def request():
+            return _ok(client.post(
+                '/api/tasks/analyze/', payload,
+                content_type='application/json', **headers
+            ))
+
+        best, response = _time(request, repeat)
+        out.write(
+            f'{coding:<10}{len(payload):>12}{len(response.content):>12}'
+            f'{best * 1000:>10.1f}\n'
+        )
+
+
+def bench_batch(out, tasks=20, repeat=5, jobs=200):
+    """One request per task list vs. a single /analyze-batch/ request."""
+    client = Client()
+    job_list = [
+        {'id': f'user-{i}', 'tasks': make_tasks(tasks, seed=i), 'strategy': 'smart_balance'}
+        for i in range(jobs)
+    ]
+
+    def separate():
+        for job in job_list:
+            _ok(client.post(
+                '/api/tasks/analyze/',
+                json.dumps({'tasks': job['tasks'], 'strategy': job['strategy']}),
+                content_type='application/json'
+            ))
+
+    def batched(parallel):
+        return _ok(client.post(
+            '/api/tasks/analyze-batch/',
+            json.dumps({'jobs': job_list, 'parallel': parallel}),
+            content_type='application/json'
+        ))
+
+    out.write(f'batch: {jobs} jobs x {tasks} tasks\n')
+    best, _ = _time(separate, repeat)
+    out.write(f'{"separate requests":<22}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(lambda: batched(False), repeat)
+    out.write(f'{"batch":<22}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(lambda: batched(True), repeat)
+    out.write(f'{"batch (parallel)":<22}{best * 1000:>10.1f} ms\n')
+
+
+def bench_dependencies(out, tasks=100000, repeat=3):
+    """Dependency scoring cost per mode on a large generated graph."""
+    task_list = make_tasks(tasks, dependency_rate=0.5)
+    edges = sum(len(task['dependencies']) for task in task_list)
+    out.write(f'dependencies: {tasks} tasks, {edges} edges\n')
+
+    for mode in ('direct', 'transitive', 'critical_path'):
+        best, _ = _time(lambda: score_dependencies(task_list, mode), repeat)
+        out.write(f'{mode:<16}{best * 1000:>10.1f} ms\n')
+
+
+def bench_plan(out, tasks=100000, repeat=3):
+    """Priority-queue topological plan vs. plain analysis on the same list."""
+    task_list = make_tasks(tasks, dependency_rate=0.5)
+    out.write(f'plan: {tasks} tasks\n')
+
+    best, _ = _time(lambda: analyze_tasks(task_list), repeat)
+    out.write(f'{"analyze_tasks":<24}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(lambda: plan_tasks(task_list), repeat)
+    out.write(f'{"plan_tasks":<24}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(lambda: plan_tasks(task_list, hours_per_day=6), repeat)
+    out.write(f'{"plan_tasks (6h/day)":<24}{best * 1000:>10.1f} ms\n')
+
+
+def bench_calendar(out, tasks=100000, repeat=3):
+    """Holiday-aware urgency: compiled table vs. a per-day loop with a set."""
+    today = date.today()
+    holidays = [str(today + timedelta(days=d)) for d in range(0, 400, 9)]
+    calendar = CompiledCalendar('bench', holidays=holidays)
+    holiday_set = {date.fromisoformat(h) for h in holidays}
+    rng = random.Random(0)
+    due_dates = [today + timedelta(days=rng.randint(1, 60)) for _ in range(tasks)]
+
+    def per_day_loop():
+        for due in due_dates:
+            business_days = 0
+            current = today
+            while current < due:
+                current += timedelta(days=1)
+                if current.weekday() < 5 and current not in holiday_set:
+                    business_days += 1
+
+    def compiled_table():
+        for due in due_dates:
+            calendar.business_days_between(today, due)
+
+    out.write(f'calendar: {tasks} due dates, {len(holidays)} holidays\n')
+    best, _ = _time(per_day_loop, repeat)
+    out.write(f'{"per-day loop":<16}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(compiled_table, repeat)
+    out.write(f'{"compiled table":<16}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(lambda: CompiledCalendar('bench', holidays=holidays), repeat)
+    out.write(f'{"compile":<16}{best * 1000:>10.1f} ms\n')
+
+
+def _branching_urgency(business_days):
+    if business_days <= 3:
+        return 50
+    elif business_days <= 7:
+        return 25
+    elif business_days <= 14:
+        return 10
+    else:
+        return 0
+
+
+def _branching_importance(rating):
+    return max(1, min(10, int(rating))) * 10
+
+
+def _branching_effort(hours):
+    if hours < 1.5:
+        return 15
+    elif hours <= 3:
+        return 5
+    else:
+        return -5
+
+
+def _branching_priority_level(score):
+    if score >= 150:
+        return 'HIGH'
+    elif score >= 50:
+        return 'MEDIUM'
+    else:
+        return 'LOW'
+
+
+def bench_tables(out, tasks=100000, repeat=3):
+    """Component lookups: compiled score tables vs. if/elif branching."""
+    rng = random.Random(0)
+    rows = [
+        (rng.randint(1, 30), rng.randint(0, 12), rng.choice([0.5, 1, 1.5, 2, 3, 4, 6, 8]),
+         rng.randint(-20, 300))
+        for _ in range(tasks)
+    ]
+    table = tables.active()
+
+    # The if/elif ladders the score tables replaced, kept for comparison
+    def branching():
+        return [
+            (_branching_urgency(d), _branching_importance(i), _branching_effort(h),
+             _branching_priority_level(s))
+            for d, i, h, s in rows
+        ]
+
+    def compiled_tables():
+        return [
+            (table.urgency(d), table.importance(i), table.effort(h), table.priority_level(s))
+            for d, i, h, s in rows
+        ]
+
+    assert branching() == compiled_tables()
+
+    out.write(f'tables: {tasks} component lookups\n')
+    best, _ = _time(branching, repeat)
+    out.write(f'{"if/elif":<16}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(compiled_tables, repeat)
+    out.write(f'{"tables":<16}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(lambda: tables.CompiledScoreTables(tables.DEFAULT_SCORE_TABLES), repeat)
+    out.write(f'{"compile":<16}{best * 1000:>10.3f} ms\n')
+
+
+def bench_explanations(out, tasks=100000, repeat=3):
+    """Memoized, interned explanations vs. building one string per task."""
+    task_list = make_tasks(tasks)
+    table = tables.active()
+
+    result = analyze_tasks(task_list)['results']
+    components = [
+        (r['urgency'], r['importance_score'], r['effort'], r['dependencies_count'])
+        for r in result
+    ]
+
+    def per_task_join():
+        return [table._build_explanation(*c) for c in components]
+
+    def memoized():
+        return [table.explanation(*c) for c in components]
+
+    out.write(f'explanations: {tasks} tasks\n')
+    out.write(f'{"distinct strings":<18}{len({id(r["explanation"]) for r in result}):>10}\n')
+    best, _ = _time(per_task_join, repeat)
+    out.write(f'{"per-task join":<18}{best * 1000:>10.1f} ms\n')
+    best, _ = _time(memoized, repeat)
+    out.write(f'{"memoized":<18}{best * 1000:>10.1f} ms\n')
+
+
+def bench_stored(out, tasks=100000, repeat=3):
+    """Stored top-N suggestions: indexed pre-filter vs. loading every row."""
+    from django.db import connection
+
+    from .models import Task
+    from .scoring import get_top_suggestions
+    from .stored import suggest_stored_tasks, sync_dependency_edges
+
+    # A throwaway database, so the benchmark never touches real data
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        out.write('stored: top 3 by table size\n')
+        out.write(f'{"rows":>8}{"load all":>12}{"prefilter":>12}{"scored":>8}\n')
+        created = 0
+        for size in sorted({max(tasks // 100, 1), max(tasks // 10, 1), tasks}):
+            rows = make_tasks(size, seed=1)[created:]
+            for row in rows:
+                row['id'] += 1
+                row['dependencies'] = [dep + 1 for dep in row['dependencies']]
+            Task.objects.bulk_create([Task(**row) for row in rows], batch_size=2000)
+            sync_dependency_edges(Task.objects.filter(pk__gt=created))
+            created = size
+
+            def load_all():
+                stored = list(Task.objects.values(
+                    'id', 'title', 'due_date', 'importance', 'estimated_hours', 'dependencies'
+                ))
+                return get_top_suggestions(stored, 'smart_balance', count=3)
+
+            load_best, _ = _time(load_all, repeat)
+            best, result = _time(lambda: suggest_stored_tasks('smart_balance', 3), repeat)
+            out.write(
+                f'{size:>8}{load_best * 1000:>10.1f}ms{best * 1000:>10.1f}ms'
+                f'{result["candidates_scored"]:>8}\n'
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def bench_database(out, tasks=20000, repeat=1, readers=4, writers=2, seconds=3.0):
+    """
+    Concurrent read/write load on a local SQLite file: Django's defaults
+    vs. the tuned settings from backend/database.py (WAL, pragmas,
+    immediate transactions). Readers run the stored-suggestion stream
+    query; writers update and insert tasks.
+    """
+    import tempfile
+    import threading
+    from pathlib import Path
+
+    from django.core.management import call_command
+    from django.db import OperationalError, connections
+
+    from backend.database import database_settings
+    from .models import Task
+
+    out.write(f'database: {tasks} rows, {readers} readers, {writers} writers, {seconds:.0f}s each\n')
+    out.write(f'{"config":<10}{"reads/s":>10}{"writes/s":>10}{"p99 read":>12}{"errors":>8}\n')
+
+    with tempfile.TemporaryDirectory() as directory:
+        configs = {
+            'defaults': {'ENGINE': 'django.db.backends.sqlite3',
+                         'NAME': str(Path(directory) / 'defaults.sqlite3')},
+            'tuned': database_settings(Path(directory), environ={})['default'],
+        }
+        configs['tuned']['NAME'] = str(Path(directory) / 'tuned.sqlite3')
+
+        for alias, config in configs.items():
+            connections.settings[alias] = {
+                **connections['default'].settings_dict, 'OPTIONS': {}, 'CONN_MAX_AGE': 0,
+                'TEST': {}, **config
+            }
+            call_command('migrate', database=alias, verbosity=0)
+            rows = make_tasks(tasks, seed=2)
+            for row in rows:
+                row['id'] += 1
+                row['dependencies'] = [dep + 1 for dep in row['dependencies']]
+            Task.objects.using(alias).bulk_create([Task(**row) for row in rows], batch_size=2000)
+
+            stop = threading.Event()
+            read_times, writes, errors = [], [0], [0]
+            lock = threading.Lock()
+
+            def reader(seed):
+                rng = random.Random(seed)
+                try:
+                    while not stop.is_set():
+                        start = time.perf_counter()
+                        list(Task.objects.using(alias)
+                             .filter(blocked_count=0, importance__lte=rng.randint(1, 10))
+                             .order_by('-importance', 'id')
+                             .values_list('id', 'due_date', 'importance', 'estimated_hours')[:32])
+                        with lock:
+                            read_times.append(time.perf_counter() - start)
+                except OperationalError:
+                    with lock:
+                        errors[0] += 1
+                finally:
+                    connections[alias].close()
+
+            def writer(seed):
+                rng = random.Random(seed)
+                try:
+                    while not stop.is_set():
+                        try:
+                            if rng.random() < 0.5:
+                                Task.objects.using(alias).filter(pk=rng.randint(1, tasks)).update(
+                                    importance=rng.randint(1, 10)
+                                )
+                            else:
+                                Task.objects.using(alias).create(
+                                    title='Load test', due_date=date.today(), importance=5
+                                )
+                            with lock:
+                                writes[0] += 1
+                        except OperationalError:
+                            with lock:
+                                errors[0] += 1
+                finally:
+                    connections[alias].close()
+
+            threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+            threads += [threading.Thread(target=writer, args=(100 + i,)) for i in range(writers)]
+            for thread in threads:
+                thread.start()
+            time.sleep(seconds)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            read_times.sort()
+            p99 = read_times[int(len(read_times) * 0.99)] if read_times else 0
+            out.write(
+                f'{alias:<10}{len(read_times) / seconds:>10.0f}{writes[0] / seconds:>10.0f}'
+                f'{p99 * 1000:>10.2f}ms{errors[0]:>8}\n'
+            )
+            connections[alias].close()
+
+
+STARTUP_PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - start
+from django.test import Client
+from tasks.benchmarks import make_tasks
+client = Client()
+body = json.dumps({'tasks': make_tasks(%d), 'strategy': 'smart_balance'})
+latencies = []
+for _ in range(3):
+    t = time.perf_counter()
+    response = client.post('/api/tasks/analyze/', body, content_type='application/json')
+    assert response.status_code == 200, response.status_code
+    latencies.append(time.perf_counter() - t)
+print(json.dumps([setup] + latencies))
+"""
+
+
+def bench_startup(out, tasks=50, repeat=5):
+    """
+    Time to first fast request: fresh processes with and without the
+    startup warmup (TASKS_WARMUP), timing django.setup() and the first
+    three /analyze/ requests.
+    """
+    import os
+    import subprocess
+    import sys
+
+    out.write(f'startup: {tasks} tasks, best of {repeat} fresh processes\n')
+    out.write(f'{"warmup":<8}{"setup":>10}{"1st":>10}{"2nd":>10}{"3rd":>10}\n')
+    for warmup in ('False', 'True'):
+        env = {**os.environ, 'TASKS_WARMUP': warmup, 'TASKS_RATE_LIMIT': '0',
+               'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings')}
+        runs = []
+        for _ in range(repeat):
+            result = subprocess.run(
+                [sys.executable, '-c', STARTUP_PROBE % tasks],
+                env=env, capture_output=True, text=True, check=True
+            )
+            runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        best = [min(run[i] for run in runs) * 1000 for i in range(4)]
+        out.write(f'{warmup:<8}' + ''.join(f'{ms:>8.1f}ms' for ms in best) + '\n')
+
+
+PROFILE_PROBE = """
+import json, statistics, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+match = get_resolver().resolve('/api/tasks/analyze/')
+setup = time.perf_counter() - start
+modules = len(sys.modules)
+from django.conf import settings
+from django.test import Client, RequestFactory
+from tasks.benchmarks import make_tasks
+body = json.dumps({'tasks': make_tasks(%d), 'strategy': 'smart_balance'})
+client, factory = Client(), RequestFactory()
+
+def through_middleware():
+    response = client.post('/api/tasks/analyze/', body, content_type='application/json')
+    assert response.status_code == 200, response.status_code
+
+def view_only():
+    match.func(factory.post('/api/tasks/analyze/', body, content_type='application/json')).render()
+
+results = []
+for fn in (through_middleware, view_only):
+    fn()
+    samples = []
+    for _ in range(%d):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    results.append(statistics.median(samples))
+print(json.dumps([setup, modules, len(settings.MIDDLEWARE)] + results))
+"""
+
+
+def bench_profile(out, tasks=20, repeat=200):
+    """
+    Full settings (backend.settings) vs. the API-only profile
+    (backend.settings_api), each in fresh processes without warmup:
+    import time (django.setup() plus resolving the URLconf), modules
+    loaded, and per-request middleware overhead, i.e. the median
+    /analyze/ request through the test client minus the same request
+    handed straight to the view.
+    """
+    import os
+    import subprocess
+    import sys
+
+    out.write(f'profile: {tasks} tasks, best of 3 processes, median of {repeat} requests\n')
+    out.write(f'{"settings":<24}{"import":>10}{"modules":>9}{"middleware":>12}'
+              f'{"request":>11}{"overhead":>10}\n')
+    for module in ('backend.settings', 'backend.settings_api'):
+        env = {**os.environ, 'TASKS_WARMUP': 'False', 'TASKS_RATE_LIMIT': '0',
+               'DJANGO_SETTINGS_MODULE': module}
+        runs = []
+        for _ in range(3):
+            result = subprocess.run(
+                [sys.executable, '-c', PROFILE_PROBE % (tasks, repeat)],
+                env=env, capture_output=True, text=True, check=True
+            )
+            runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        setup = min(run[0] for run in runs) * 1000
+        modules, middleware = runs[0][1], runs[0][2]
+        request = min(run[3] for run in runs) * 1000
+        overhead = min(run[3] - run[4] for run in runs) * 1000
+        out.write(f'{module:<24}{setup:>8.1f}ms{modules:>9}{middleware:>12}'
+                  f'{request:>9.3f}ms{overhead:>8.3f}ms\n')
+
+
+def bench_validation(out, tasks=100000, repeat=3):
+    """
+    Request validation: the compiled single-pass validator vs. DRF
+    serializers, ListField(child=DictField()) (shape only) and a
+    per-field Serializer(many=True) with the same checks.
+    """
+    from rest_framework import serializers
+
+    from .scoring.payload import validate_analysis_request
+
+    class ShapeSerializer(serializers.Serializer):
+        tasks = serializers.ListField(child=serializers.DictField())
+        strategy = serializers.ChoiceField(choices=get_valid_strategies(), default='smart_balance')
+
+    class TaskFieldsSerializer(serializers.Serializer):
+        id = serializers.IntegerField(required=False)
+        title = serializers.CharField(required=False)
+        due_date = serializers.DateField(required=False)
+        importance = serializers.FloatField(required=False, min_value=1, max_value=10)
+        estimated_hours = serializers.FloatField(required=False, min_value=0)
+        dependencies = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class FieldsSerializer(serializers.Serializer):
+        tasks = TaskFieldsSerializer(many=True)
+        strategy = serializers.ChoiceField(choices=get_valid_strategies(), default='smart_balance')
+
+    body = {'tasks': make_tasks(tasks, seed=5), 'strategy': 'smart_balance'}
+    drf_repeat = max(1, repeat // 3)
+
+    def drf(serializer_class):
+        serializer = serializer_class(data=body)
+        assert serializer.is_valid(), serializer.errors
+        return serializer.validated_data
+
+    out.write(f'validation: {tasks} tasks\n')
+    compiled, _ = _time(lambda: validate_analysis_request(body), repeat)
+    shape, _ = _time(lambda: drf(ShapeSerializer), drf_repeat)
+    fields, _ = _time(lambda: drf(FieldsSerializer), drf_repeat)
+    out.write(f'  compiled validator:          {compiled * 1000:9.1f} ms\n')
+    out.write(f'  DRF ListField(DictField):    {shape * 1000:9.1f} ms  ({shape / compiled:.1f}x)\n')
+    out.write(f'  DRF per-field serializer:    {fields * 1000:9.1f} ms  ({fields / compiled:.1f}x)\n')
+
+
+def bench_forecast(out, tasks=20000, repeat=3, days=30):
+    """A 30-day forecast vs. one analysis per day."""
+    from .scoring.context import AnalysisContext
+    from .scoring.forecast import forecast_tasks
+    from .scoring.payload import validate_tasks
+
+    start = date.today()
+    task_list, _ = validate_tasks(make_tasks(tasks, today=start))
+
+    def per_day():
+        return [
+            analyze_tasks(task_list, context=AnalysisContext(start + timedelta(days=d)))
+            for d in range(days)
+        ]
+
+    out.write(f'forecast: {tasks} tasks, {days} days\n')
+    one, _ = _time(lambda: analyze_tasks(task_list, context=AnalysisContext(start)), repeat)
+    daily, _ = _time(per_day, max(1, repeat // 3))
+    forecast, _ = _time(lambda: forecast_tasks(task_list, context=AnalysisContext(start), days=days), repeat)
+    out.write(f'  one analysis:                {one * 1000:9.1f} ms\n')
+    out.write(f'  analysis per day:            {daily * 1000:9.1f} ms\n')
+    out.write(f'  forecast_tasks:              {forecast * 1000:9.1f} ms  ({daily / forecast:.1f}x faster)\n')
+
+
+def bench_diff(out, tasks=100000, repeat=3):
+    """Ranking diff of one snapshot across two days vs. diffing two analyses."""
+    from .scoring.context import AnalysisContext
+    from .scoring.diff import diff_rankings
+    from .scoring.payload import validate_tasks
+
+    start = date.today()
+    task_list, _ = validate_tasks(make_tasks(tasks, today=start))
+    before = {'tasks': task_list, 'strategy': 'smart_balance', 'dependency_mode': 'direct',
+              'context': AnalysisContext(start)}
+    after = {**before, 'context': AnalysisContext(start + timedelta(days=1))}
+
+    def two_analyses():
+        old = analyze_tasks(task_list, context=before['context'])['results']
+        new = analyze_tasks(task_list, context=after['context'])['results']
+        old_rank = {task['id']: (rank, task) for rank, task in enumerate(old, 1)}
+        return [
+            (task['id'], old_rank[task['id']][0], rank)
+            for rank, task in enumerate(new, 1)
+            if old_rank[task['id']][0] != rank
+            or old_rank[task['id']][1]['priority_score'] != task['priority_score']
+        ]
+
+    out.write(f'diff: {tasks} tasks, today vs. tomorrow\n')
+    naive, changed = _time(two_analyses, repeat)
+    diff, result = _time(lambda: diff_rankings(before, after), repeat)
+    out.write(f'  two analyses + dict diff:    {naive * 1000:9.1f} ms  ({len(changed)} changed)\n')
+    out.write(f'  diff_rankings:               {diff * 1000:9.1f} ms  ({len(result["changes"])} changed, '
+              f'{naive / diff:.1f}x faster)\n')
+
+
+def bench_recurring(out, tasks=2000, repeat=3, materialized_days=90):
+    """
+    Recurring chores as templates expanded within their horizon vs. the
+    same chores materialized as one task per occurrence, and top-3
+    suggestions that stop expanding once no occurrence can make the top.
+    """
+    from .scoring.analyzer import get_top_suggestions
+    from .scoring.context import AnalysisContext
+    from .scoring.payload import validate_recurring
+    from .scoring.recurrence import expand
+
+    rng = random.Random(0)
+    start = date.today()
+    templates, _ = validate_recurring([
+        {
+            'id': f'chore-{i}',
+            'title': f'{rng.choice(TITLES)} #{i}',
+            'frequency': 'daily' if i % 3 == 0 else 'weekly',
+            'weekdays': ''.join(rng.choice('0001') for _ in range(6)) + '1',
+            'starts_on': str(start - timedelta(days=rng.randint(0, 365))),
+            'importance': rng.randint(1, 10),
+            'estimated_hours': rng.choice([0.25, 0.5, 1, 2]),
+        }
+        for i in range(tasks)
+    ])
+    context = AnalysisContext(start)
+    materialized = list(expand(templates, start, start + timedelta(days=materialized_days)))
+    expanded = list(expand(templates, start))
+
+    out.write(f'recurring: {tasks} templates\n')
+    full, _ = _time(lambda: analyze_tasks(materialized, context=context), repeat)
+    lazy, _ = _time(lambda: analyze_tasks(list(expand(templates, start)), context=context), repeat)
+    top, result = _time(
+        lambda: get_top_suggestions([], count=3, context=context, recurring=templates), repeat
+    )
+    out.write(f'  {materialized_days} days materialized:      {full * 1000:9.1f} ms  '
+              f'({len(materialized)} tasks)\n')
+    out.write(f'  expanded within horizon:     {lazy * 1000:9.1f} ms  ({len(expanded)} tasks)\n')
+    out.write(f'  top 3 suggestions:           {top * 1000:9.1f} ms  '
+              f'({len(result["suggestions"])} suggested)\n')
+
+
+def bench_reachability(out, tasks=100000, repeat=3, queries=2000):
+    """
+    Reachability index on a generated dependency graph: build time, query
+    latency (random and connected pairs) against a plain BFS, and the
+    cost of adding an edge in place.
+    """
+    from collections import deque
+
+    from .reachability import ReachabilityIndex
+
+    task_list = make_tasks(tasks, dependency_rate=0.5)
+    edges = [(task['id'], dep) for task in task_list for dep in task['dependencies']]
+    out.write(f'reachability: {tasks} tasks, {len(edges)} edges\n')
+
+    build, index = _time(lambda: ReachabilityIndex(range(tasks), edges), repeat)
+    out.write(f'  build index:                 {build * 1000:9.1f} ms\n')
+
+    rng = random.Random(1)
+    random_pairs = [(rng.randrange(tasks), rng.randrange(tasks)) for _ in range(queries)]
+    connected = []
+    while len(connected) < queries:
+        source = rng.randrange(tasks)
+        found = index.descendants(source)
+        if found:
+            connected.append((source, rng.choice(found)[0]))
+
+    def bfs(source, target):
+        seen = {source}
+        queue = deque([source])
+        while queue:
+            for child in index.children[queue.popleft()]:
+                if child == target:
+                    return True
+                if child not in seen:
+                    seen.add(child)
+                    queue.append(child)
+        return False
+
+    for name, pairs in (('random pairs', random_pairs), ('connected pairs', connected)):
+        indexed, _ = _time(lambda: [index.reachable(a, b) for a, b in pairs], repeat)
+        plain, _ = _time(lambda: [bfs(a, b) for a, b in pairs], 1)
+        out.write(f'  reachable, {name:<16}  {indexed / queries * 1e6:9.1f} us/query'
+                  f'  (BFS {plain / queries * 1e6:.1f} us)\n')
+
+    sources = [a for a, _ in connected[:200]]
+    listing, _ = _time(lambda: [index.descendants(a) for a in sources], repeat)
+    out.write(f'  descendants:                 {listing / len(sources) * 1e6:9.1f} us/query\n')
+
+    # New edges between random tasks, in dependency direction (no cycles)
+    new_edges = []
+    while len(new_edges) < 200:
+        a, b = sorted(rng.sample(range(tasks), 2))
+        new_edges.append((b, a))
+    started = time.perf_counter()
+    for task_id, depends_on in new_edges:
+        index.add_edge(task_id, depends_on)
+    added = time.perf_counter() - started
+    out.write(f'  add edge in place:           {added / len(new_edges) * 1e6:9.1f} us/edge\n')
+
+
+def bench_export(out, tasks=100000, repeat=1):
+    """
+    Stored-task export: time and peak traced memory of a CSV (and Parquet,
+    when pyarrow is installed) export against a full JSON ranking.
+    """
+    import tracemalloc
+
+    from django.db import connection
+
+    from .export import export_chunks, pyarrow, stored_export
+    from .models import Task
+    from .stored import rank_stored_tasks, sync_dependency_edges
+
+    def measure(fn):
+        tracemalloc.start()
+        try:
+            best, size = _time(fn, repeat)
+            return best, size, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def export(export_format):
+        rows, _ = stored_export('smart_balance', 'direct')
+        return sum(len(chunk) for chunk in export_chunks(rows, export_format))
+
+    def ranking_json():
+        return len(json.dumps(rank_stored_tasks('smart_balance', 'direct'), default=str))
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        out.write('export: stored tasks (time, output size, peak traced memory)\n')
+        created = 0
+        for size in sorted({max(tasks // 10, 1), tasks}):
+            rows = make_tasks(size, seed=1)[created:]
+            for row in rows:
+                row['id'] += 1
+                row['dependencies'] = [dep + 1 for dep in row['dependencies']]
+            Task.objects.bulk_create([Task(**row) for row in rows], batch_size=2000)
+            sync_dependency_edges(Task.objects.filter(pk__gt=created))
+            created = size
+
+            runs = [('json ranking', ranking_json), ('csv export', lambda: export('csv'))]
+            if pyarrow is not None:
+                runs.append(('parquet export', lambda: export('parquet')))
+            for name, fn in runs:
+                best, output, peak = measure(fn)
+                out.write(f'  {size:>8} {name:<16}{best * 1000:9.1f} ms{output / 1e6:8.1f} MB'
+                          f'{peak / 1e6:8.1f} MB peak\n')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def bench_bulk(out, tasks=5000, repeat=3):
+    """Bulk task changes: one set-based request vs. saving each task in turn."""
+    from django.db import connection, transaction
+
+    from .bulk import apply_bulk, parse_bulk_request
+    from .models import Task
+    from .stored import sync_dependency_edges
+
+    # A throwaway database, so the benchmark never touches real data
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        rows = make_tasks(tasks, seed=1)
+        for row in rows:
+            row['id'] += 1
+            row['dependencies'] = [dep + 1 for dep in row['dependencies']]
+        Task.objects.bulk_create([Task(**row) for row in rows], batch_size=2000)
+        sync_dependency_edges(Task.objects.all())
+        out.write(f'bulk: {tasks} stored tasks\n')
+
+        def bulk(body):
+            spec, _ = parse_bulk_request(body, tasks)
+            return apply_bulk(spec)
+
+        def save_each(importance):
+            with transaction.atomic():
+                for task in Task.objects.all():
+                    task.importance = importance
+                    task.save()
+
+        each, _ = _time(lambda: save_each(7), 1)
+        out.write(f'  set importance, per task:    {each * 1000:9.1f} ms\n')
+        for name, body in (
+            ('set importance, bulk', {'filter': {'id__gte': 1}, 'set': {'importance': 8}}),
+            ('shift due dates, bulk', {'filter': {'id__gte': 1}, 'shift_due_date': 1}),
+            ('set dependencies, bulk', {'filter': {'id__gt': 1}, 'set': {'dependencies': [1]}}),
+        ):
+            best, result = _time(lambda: bulk(body), repeat)
+            out.write(f'  {name + ":":<28} {best * 1000:9.1f} ms  ({result["matched"]} tasks)\n')
+
+        best, result = _time(lambda: bulk({'filter': {'id__gt': 1}, 'delete': True, 'confirm_count': tasks - 1}), 1)
+        out.write(f'  {"delete, bulk:":<28} {best * 1000:9.1f} ms  ({result["matched"]} tasks)\n')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+BENCHMARKS = {
+    'compression': bench_compression,
+    'batch': bench_batch,
+    'dependencies': bench_dependencies,
+    'plan': bench_plan,
+    'calendar': bench_calendar,
+    'tables': bench_tables,
+    'explanations': bench_explanations,
+    'stored': bench_stored,
+    'database': bench_database,
+    'startup': bench_startup,
+    'profile': bench_profile,
+    'validation': bench_validation,
+    'forecast': bench_forecast,
+    'reachability': bench_reachability,
+    'export': bench_export,
+    'diff': bench_diff,
+    'recurring': bench_recurring,
+    'bulk': bench_bulk,
+}
@@ -0,0 +1,367 @@
+"""
+Bulk changes to stored tasks: one request updates or deletes every task
+matching an id list and/or a filter, with set-based queries.
+
+apply_bulk() runs in one transaction:
+
+1. Lock and read the ids of the matching tasks; no task is loaded.
+2. One QuerySet.update() per SYNC_CHUNK_SIZE ids sets the new values. A
+   due date shift is an F() expression, so every row keeps its own date.
+   A deletion is one raw DELETE per chunk, after the edges of the deleted
+   tasks (a plain QuerySet.delete() would load every row to send
+   post_delete).
+3. Dependency edges follow: a new dependencies list rebuilds the edges of
+   the matched tasks (sync_dependency_edges), and a deletion recounts the
+   tasks the deleted ones were waiting on.
+4. One bump of the stored version carries every id and edge change, so
+   cached rankings, ETags, live streams and the reachability index see
+   one change instead of one per task.
+
+The per-task Task signals (tasks/signals.py) would sync edges and bump
+the version once per row; bulk_writes() mutes them meanwhile. Tasks have
+no completion state, so "mark done" is a deletion. A deletion selected
+by a filter must carry confirm_count, the number of tasks it matches;
+otherwise nothing is deleted and the count is returned instead.
+"""
+import math
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import DateField, ExpressionWrapper, F, Max, Min
+
+from .models import Task, TaskDependency
+from .ranking import bump_stored_version, stored_version
+from .scoring.payload import IMPORTANCE_RANGE
+from .scoring.validators import _parse_date_string
+from .stored import SYNC_CHUNK_SIZE, _chunks, refresh_blocked_counts, sync_dependency_edges
+
+# Fields a filter may test, and the lookups allowed on them
+FILTER_FIELDS = {
+    'id': 'integer',
+    'title': 'string',
+    'due_date': 'date',
+    'importance': 'number',
+    'estimated_hours': 'number',
+    'blocked_count': 'integer',
+}
+LOOKUPS = ('exact', 'lt', 'lte', 'gt', 'gte', 'in', 'range')
+TITLE_LOOKUPS = ('exact', 'iexact', 'contains', 'icontains', 'startswith', 'istartswith')
+
+UPDATE_FIELDS = ('title', 'due_date', 'importance', 'estimated_hours', 'dependencies')
+
+# Largest due date shift, in days either way
+MAX_SHIFT_DAYS = 3660
+
+# Requested ids reported as missing, at most
+MISSING_LIMIT = 100
+
+# Messages of the failures apply_bulk() returns
+CONFIRMATION_REQUIRED = 'Confirmation required'
+SHIFT_OUT_OF_RANGE = 'Shift out of range'
+
+_state = threading.local()
+
+
+@contextmanager
+def bulk_writes():
+    """Mute the per-task Task signals of this thread during a bulk change."""
+    _state.active = True
+    try:
+        yield
+    finally:
+        _state.active = False
+
+
+def in_bulk_write():
+    return getattr(_state, 'active', False)
+
+
+def _value_error(kind, value):
+    """Why value is not a `kind` filter or update value, or None."""
+    if kind == 'integer':
+        ok = type(value) is int
+    elif kind == 'number':
+        ok = type(value) in (int, float) and math.isfinite(value)
+    elif kind == 'string':
+        ok = type(value) is str
+    else:
+        if type(value) is not str:
+            return 'must be a date string'
+        try:
+            _parse_date_string(value)
+        except (ValueError, OverflowError):
+            return 'is not a valid date'
+        return None
+    return None if ok else f'must be a{"n" if kind == "integer" else ""} {kind}'
+
+
+def _parse_value(kind, value):
+    return _parse_date_string(value) if kind == 'date' else value
+
+
+def _parse_filter(filters, errors):
+    """Django lookups {field__lookup: value} from a request filter."""
+    lookups = {}
+    for key, value in filters.items():
+        field, _, lookup = key.partition('__')
+        lookup = lookup or 'exact'
+        kind = FILTER_FIELDS.get(field)
+        allowed = TITLE_LOOKUPS if kind == 'string' else LOOKUPS
+        if kind is None or lookup not in allowed:
+            errors.append({'field': f'filter.{key}', 'error': (
+                f'filter keys are <field>[__<lookup>] with fields {", ".join(FILTER_FIELDS)} '
+                f'and lookups {", ".join(LOOKUPS)} (title: {", ".join(TITLE_LOOKUPS)})'
+            )})
+            continue
+
+        values = value if lookup in ('in', 'range') else [value]
+        if lookup in ('in', 'range') and (
+                type(value) is not list or (lookup == 'range' and len(value) != 2)):
+            errors.append({'field': f'filter.{key}', 'error': (
+                'range takes a list of two values' if lookup == 'range' else 'in takes a list'
+            )})
+            continue
+        problems = [_value_error(kind, item) for item in values]
+        problem = next((p for p in problems if p), None)
+        if problem:
+            errors.append({'field': f'filter.{key}', 'error': f'{key} {problem}'})
+            continue
+
+        parsed = [_parse_value(kind, item) for item in values]
+        lookups[f'{field}__{lookup}'] = parsed if lookup in ('in', 'range') else parsed[0]
+    return lookups
+
+
+def _parse_updates(values, errors):
+    """Field values of a request's "set"."""
+    updates = {}
+    for field, value in values.items():
+        name = f'set.{field}'
+        if field not in UPDATE_FIELDS:
+            errors.append({'field': name, 'error': f'set may change {", ".join(UPDATE_FIELDS)}'})
+        elif field == 'title':
+            if type(value) is not str or not value.strip() or len(value) > 255:
+                errors.append({'field': name, 'error': 'title must be 1-255 characters'})
+            else:
+                updates[field] = value
+        elif field == 'due_date':
+            problem = _value_error('date', value)
+            if problem:
+                errors.append({'field': name, 'error': f'due_date {problem}'})
+            else:
+                updates[field] = _parse_date_string(value)
+        elif field == 'importance':
+            low, high = IMPORTANCE_RANGE
+            if type(value) is not int or not low <= value <= high:
+                errors.append({'field': name,
+                               'error': f'importance must be an integer from {low} to {high}'})
+            else:
+                updates[field] = value
+        elif field == 'estimated_hours':
+            if type(value) not in (int, float) or not 0 <= value < math.inf:
+                errors.append({'field': name,
+                               'error': 'estimated_hours must be a non-negative number'})
+            else:
+                updates[field] = value
+        else:
+            if type(value) is not list or any(type(dep) is not int for dep in value):
+                errors.append({'field': name, 'error': 'dependencies must be a list of task ids'})
+            else:
+                updates[field] = sorted(set(value))
+    return updates
+
+
+def parse_bulk_request(data, max_ids):
+    """
+    Validate a bulk request body.
+
+    Returns (spec, errors), errors in the payload.py format. spec holds
+    ids (list or None), filter (Django lookups), updates (field values),
+    shift (days or None), delete (bool) and confirm_count (int or None).
+    """
+    if not isinstance(data, dict):
+        return None, [{'field': None, 'error': 'Request body must be a JSON object'}]
+
+    errors = []
+    spec = {'ids': None, 'filter': {}, 'updates': {}, 'shift': None, 'delete': False,
+            'confirm_count': None}
+
+    ids = data.get('ids')
+    if ids is not None:
+        if type(ids) is not list or any(type(task_id) is not int for task_id in ids):
+            errors.append({'field': 'ids', 'error': 'ids must be a list of task ids'})
+        elif len(ids) > max_ids:
+            errors.append({'field': 'ids', 'error': f'ids may list at most {max_ids} tasks'})
+        else:
+            spec['ids'] = list(dict.fromkeys(ids))
+
+    filters = data.get('filter')
+    if filters is not None:
+        if type(filters) is not dict:
+            errors.append({'field': 'filter', 'error': 'filter must be an object'})
+        else:
+            spec['filter'] = _parse_filter(filters, errors)
+
+    if spec['ids'] is None and not filters and not errors:
+        errors.append({'field': 'ids', 'error': 'ids or filter is required'})
+
+    values = data.get('set')
+    if values is not None:
+        if type(values) is not dict:
+            errors.append({'field': 'set', 'error': 'set must be an object'})
+        else:
+            spec['updates'] = _parse_updates(values, errors)
+
+    shift = data.get('shift_due_date')
+    if shift is not None:
+        if type(shift) is not int or not -MAX_SHIFT_DAYS <= shift <= MAX_SHIFT_DAYS:
+            errors.append({'field': 'shift_due_date', 'error': (
+                f'shift_due_date must be an integer from {-MAX_SHIFT_DAYS} to {MAX_SHIFT_DAYS}'
+            )})
+        else:
+            spec['shift'] = shift
+
+    delete = data.get('delete', False)
+    if type(delete) is not bool:
+        errors.append({'field': 'delete', 'error': 'delete must be a boolean'})
+    spec['delete'] = delete is True
+
+    confirm_count = data.get('confirm_count')
+    if confirm_count is not None:
+        if type(confirm_count) is not int or confirm_count < 0:
+            errors.append({'field': 'confirm_count',
+                           'error': 'confirm_count must be a non-negative integer'})
+        else:
+            spec['confirm_count'] = confirm_count
+
+    changes = bool(values) or shift is not None
+    if not errors:
+        if spec['delete'] and changes:
+            errors.append({'field': 'delete',
+                           'error': 'delete cannot be combined with set or shift_due_date'})
+        elif not spec['delete'] and not changes:
+            errors.append({'field': 'set', 'error': 'set, shift_due_date or delete is required'})
+        elif 'due_date' in spec['updates'] and spec['shift'] is not None:
+            errors.append({'field': 'shift_due_date',
+                           'error': 'shift_due_date cannot be combined with set.due_date'})
+
+    return (None, errors) if errors else (spec, [])
+
+
+def _delete(ids):
+    """Delete tasks and their edges; recount the tasks they were waiting on."""
+    edges = []
+    for chunk in _chunks(ids, SYNC_CHUNK_SIZE):
+        chunk_edges = TaskDependency.objects.filter(task_id__in=chunk)
+        edges.extend(chunk_edges.values_list('task_id', 'depends_on'))
+        chunk_edges.delete()
+        tasks = Task.objects.filter(pk__in=chunk)
+        tasks._raw_delete(tasks.db)
+    refresh_blocked_counts({depends_on for _, depends_on in edges})
+    bump_stored_version(tasks_saved=[], tasks_deleted=ids, edges_removed=edges)
+
+
+def _shift_error(ids, shift):
+    """Why shifting the due dates of tasks by `shift` days fails, or None."""
+    bounds = [
+        Task.objects.filter(pk__in=chunk).aggregate(low=Min('due_date'), high=Max('due_date'))
+        for chunk in _chunks(ids, SYNC_CHUNK_SIZE)
+    ]
+    earliest = min(bound['low'] for bound in bounds)
+    latest = max(bound['high'] for bound in bounds)
+    if (date.max - latest).days < shift or (earliest - date.min).days < -shift:
+        return (f'Due dates of the matched tasks run from {earliest} to {latest}; shifting them '
+                f'by {shift} days would leave {date.min} to {date.max}')
+    return None
+
+
+def _update(ids, updates, shift):
+    """Set field values (and shift due dates) of tasks, then their edges."""
+    values = dict(updates)
+    if shift:
+        values['due_date'] = ExpressionWrapper(
+            F('due_date') + timedelta(days=shift), output_field=DateField()
+        )
+    for chunk in _chunks(ids, SYNC_CHUNK_SIZE):
+        Task.objects.filter(pk__in=chunk).update(**values)
+
+    if 'dependencies' in updates:
+        # Rebuilds the edges and bumps the version with their changes
+        sync_dependency_edges([Task(pk=task_id, dependencies=updates['dependencies'])
+                               for task_id in ids])
+    else:
+        bump_stored_version(tasks_saved=ids)
+
+
+def apply_bulk(spec):
+    """
+    Apply a parsed bulk request (see parse_bulk_request) in one transaction.
+
+    A deletion selected by a filter whose confirm_count is not the number
+    of matching tasks changes nothing and returns
+    {'success': False, 'message': 'Confirmation required', 'error': ...,
+    'matched': 5000}. So does a due date shift that would move a matched
+    task outside the dates a date can hold ('Shift out of range').
+
+    Returns:
+    {
+        'success': True,
+        'message': 'Updated 5000 tasks',
+        'matched': 5000,
+        'missing': [17],          (requested ids that matched no task)
+        'deleted': False,
+        'version': '42.9f0c...'   (stored version after the change)
+    }
+    """
+    with transaction.atomic(), bulk_writes():
+        tasks = Task.objects.select_for_update().order_by()
+        if spec['filter']:
+            tasks = tasks.filter(**spec['filter'])
+        if spec['ids'] is None:
+            ids = list(tasks.values_list('id', flat=True))
+        else:
+            ids = []
+            for chunk in _chunks(spec['ids'], SYNC_CHUNK_SIZE):
+                ids.extend(tasks.filter(pk__in=chunk).values_list('id', flat=True))
+        ids.sort()
+
+        if spec['delete'] and spec['filter'] and spec['confirm_count'] != len(ids):
+            return {
+                'success': False,
+                'message': CONFIRMATION_REQUIRED,
+                'error': f'The filter matches {len(ids)} tasks; send confirm_count: {len(ids)} '
+                         f'to delete them',
+                'matched': len(ids),
+            }
+
+        shift_error = spec['shift'] and ids and _shift_error(ids, spec['shift'])
+        if shift_error:
+            return {
+                'success': False,
+                'message': SHIFT_OUT_OF_RANGE,
+                'error': shift_error,
+                'matched': len(ids),
+            }
+
+        if ids:
+            if spec['delete']:
+                _delete(ids)
+            else:
+                _update(ids, spec['updates'], spec['shift'])
+
+    missing = []
+    if spec['ids'] is not None and len(ids) < len(spec['ids']):
+        found = set(ids)
+        missing = [task_id for task_id in spec['ids'] if task_id not in found][:MISSING_LIMIT]
+
+    verb = 'Deleted' if spec['delete'] else 'Updated'
+    return {
+        'success': True,
+        'message': f'{verb} {len(ids)} tasks',
+        'matched': len(ids),
+        'missing': missing,
+        'deleted': spec['delete'],
+        'version': stored_version(),
+    }
@@ -0,0 +1,100 @@
+"""
+Working calendars by name, compiled once per process.
+
+A name is looked up in the WorkingCalendar table first, then in the JSON
+file named by settings.TASKS_CALENDARS_FILE:
+
+    {"uk": {"weekmask": "1111100", "holidays": ["2026-12-25", "2026-12-28"]}}
+
+"default" is always the built-in Monday-Friday calendar without holidays,
+so requests that name no calendar never touch the database. Compiled
+calendars are cached until a WorkingCalendar row changes (see
+tasks/signals.py).
+"""
+import json
+import threading
+
+from django.conf import settings
+
+from .scoring.calendar import CompiledCalendar, default_calendar
+
+DEFAULT_CALENDAR_NAME = 'default'
+
+_compiled = {}
+_file_definitions = None
+_lock = threading.Lock()
+
+
+def _load_file_definitions():
+    global _file_definitions
+    if _file_definitions is None:
+        path = getattr(settings, 'TASKS_CALENDARS_FILE', None)
+        if path:
+            with open(path) as f:
+                _file_definitions = json.load(f)
+        else:
+            _file_definitions = {}
+    return _file_definitions
+
+
+def _load_definition(name):
+    """Return (weekmask, holidays) for name, or None if it is not defined."""
+    from .models import WorkingCalendar
+
+    row = WorkingCalendar.objects.filter(name=name).values('weekmask', 'holidays').first()
+    if row is not None:
+        return row['weekmask'], row['holidays']
+
+    definition = _load_file_definitions().get(name)
+    if definition is not None:
+        return definition.get('weekmask', '1111100'), definition.get('holidays', [])
+
+    return None
+
+
+def get_calendar(name=None):
+    """
+    Return the CompiledCalendar called `name` (default when empty), or
+    None if no such calendar exists.
+    """
+    if name is not None and not isinstance(name, str):
+        return None
+    name = name or DEFAULT_CALENDAR_NAME
+
+    if name == DEFAULT_CALENDAR_NAME:
+        return default_calendar()
+
+    calendar = _compiled.get(name)
+    if calendar is not None:
+        return calendar
+
+    definition = _load_definition(name)
+    if definition is None:
+        return None
+    calendar = CompiledCalendar(name, *definition)
+
+    with _lock:
+        return _compiled.setdefault(name, calendar)
+
+
+def preload_file_calendars():
+    """
+    Compile every calendar defined in TASKS_CALENDARS_FILE (unless a
+    WorkingCalendar row is already cached under its name). Does not query
+    the database, so it is safe during startup.
+    """
+    for name, definition in _load_file_definitions().items():
+        if name not in _compiled:
+            calendar = CompiledCalendar(
+                name, definition.get('weekmask', '1111100'), definition.get('holidays', [])
+            )
+            with _lock:
+                _compiled.setdefault(name, calendar)
+
+
+def clear_calendar_cache():
+    """Drop every compiled calendar; they are rebuilt on next use."""
+    global _file_definitions
+    with _lock:
+        _compiled.clear()
+        _file_definitions = None
@@ -0,0 +1,49 @@
+"""
+Conditional requests (ETag / If-None-Match) for the analysis endpoints.
+
+An analysis is determined by its inputs, so its ETag is derived from
+them, not from the rendered body: the ranking key of the request (see
+tasks/ranking.py: canonical payload, strategy and score tables, as-of
+date and calendar) plus any window parameters. That lets a view answer
+If-None-Match with a 304 before scoring or rendering anything. For the
+stored-task endpoints the inputs include the Task table's change counter.
+"""
+import hashlib
+import json
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .ranking import RANKING_CACHE_PREFIX
+
+
+def etag_for(key, *extra):
+    """Strong ETag for a response determined by a ranking key and `extra`."""
+    digest = key[len(RANKING_CACHE_PREFIX):]
+    if extra:
+        digest = hashlib.sha256(
+            json.dumps([digest, *extra], separators=(',', ':'), default=str).encode()
+        ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    """
+    Whether If-None-Match lists etag. Uses the weak comparison RFC 9110
+    prescribes for If-None-Match, since compressed responses carry the
+    weak form (see CompressionMiddleware).
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.removeprefix('W/') == opaque for tag in parse_etags(header))
+
+
+def not_modified(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
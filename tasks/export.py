@@ -0,0 +1,253 @@
+"""
+Analysis results as downloadable CSV or Parquet, written in chunks.
+
+export_chunks() turns ranked result rows into encoded chunks: CSV text, or
+one Parquet row group per CHUNK_SIZE rows. The chunks go straight into a
+StreamingHttpResponse (/export/<format>/, /stored/export/<format>/) or a
+file (`python manage.py export_tasks`), so only the current chunk is ever
+encoded in memory, however long the ranking.
+
+Posted tasks are ranked by analyze_tasks() first, so an export holds the
+request and its ranking, as /analyze/ does. Stored tasks in the direct
+dependency mode, without recurring templates, are not loaded at all:
+stored_export() reads the table once through a server-side cursor
+(QuerySet.iterator()) to score every task, keeps one integer sort key
+per task, then fetches and renders the ranked rows CHUNK_SIZE at a time
+while the export is written. The other dependency modes need the whole
+dependency graph, and templates add occurrences that are not rows; they
+use rank_stored_tasks(), or the cached stored ranking when there is one.
+
+Parquet needs the optional pyarrow package.
+"""
+import csv
+
+from backend.routers import analysis_reads
+
+from .models import RecurringTask, Task
+from .ranking import get_ranking, ranking_key, set_ranking, stored_version
+from .reachability import query_index
+from .scoring.analyzer import score_single_task, task_result
+from .scoring.components import calculate_dependencies, calculate_effort, calculate_importance
+from .scoring.context import AnalysisContext
+from .scoring.strategies import apply_weights
+from .stored import rank_stored_tasks
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Rows per database fetch, CSV chunk and Parquet row group
+CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = (
+    'rank', 'id', 'title', 'due_date', 'importance', 'estimated_hours', 'priority_score',
+    'priority_level', 'urgency', 'importance_score', 'effort', 'dependencies_count',
+    'explanation',
+)
+
+# Sort keys of stored tasks pack (-score, id) into one int (ids are below 2**63)
+_ID_SPACE = 1 << 63
+
+
+def format_error(export_format):
+    """Why export_format cannot be produced, or None."""
+    if export_format not in EXPORT_FORMATS:
+        return f'Format must be one of: {", ".join(EXPORT_FORMATS)}'
+    if export_format == 'parquet' and pyarrow is None:
+        return 'Parquet export needs the pyarrow package'
+    return None
+
+
+def _values(rank, row):
+    return (rank,) + tuple(row[field] for field in EXPORT_FIELDS[1:])
+
+
+class _Echo:
+    """File-like for csv.writer: writerow() returns the line it writes."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_chunks(rows):
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow(EXPORT_FIELDS)]
+    for rank, row in enumerate(rows, 1):
+        lines.append(writer.writerow(_values(rank, row)))
+        if len(lines) >= CHUNK_SIZE:
+            yield ''.join(lines).encode()
+            lines = []
+    if lines:
+        yield ''.join(lines).encode()
+
+
+class _Sink:
+    """Write target of a ParquetWriter that hands back what it was given."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _parquet_schema(string_ids):
+    pa = pyarrow
+    # Score table points and importance ratings may be fractional
+    return pa.schema([
+        ('rank', pa.int64()),
+        ('id', pa.string() if string_ids else pa.int64()),
+        ('title', pa.string()),
+        ('due_date', pa.string()),
+        ('importance', pa.float64()),
+        ('estimated_hours', pa.float64()),
+        ('priority_score', pa.int64()),
+        ('priority_level', pa.string()),
+        ('urgency', pa.float64()),
+        ('importance_score', pa.float64()),
+        ('effort', pa.float64()),
+        ('dependencies_count', pa.float64()),
+        ('explanation', pa.string()),
+    ])
+
+
+def _parquet_chunks(rows, string_ids):
+    schema = _parquet_schema(string_ids)
+    sink = _Sink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    batch = []
+
+    def write_row_group():
+        columns = list(zip(*batch))
+        if string_ids:
+            columns[1] = [str(task_id) for task_id in columns[1]]
+        writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        ))
+
+    for rank, row in enumerate(rows, 1):
+        batch.append(_values(rank, row))
+        if len(batch) >= CHUNK_SIZE:
+            write_row_group()
+            batch = []
+            yield sink.take()
+    if batch:
+        write_row_group()
+    writer.close()
+    yield sink.take()
+
+
+def export_chunks(rows, export_format, string_ids=False):
+    """
+    Encoded chunks (bytes) of an export of ranked result rows (the
+    `results` entries of analyze_tasks) in export_format. Parquet ids are
+    strings with string_ids, integers otherwise.
+    """
+    if export_format == 'parquet':
+        return _parquet_chunks(rows, string_ids)
+    return _csv_chunks(rows)
+
+
+def _cycle_result(cycle):
+    return {
+        'success': False,
+        'message': 'Circular dependency detected',
+        'results': [],
+        'error': f'Circular dependency detected: {" -> ".join(str(x) for x in cycle)}'
+    }
+
+
+def _ranked_stored_rows(keys, strategy, context):
+    """Result rows of the tasks behind sorted keys, fetched CHUNK_SIZE at a time."""
+    for start in range(0, len(keys), CHUNK_SIZE):
+        ids = [key % _ID_SPACE for key in keys[start:start + CHUNK_SIZE]]
+        with analysis_reads():
+            tasks = {
+                task['id']: task for task in Task.objects.filter(pk__in=ids).values(
+                    'id', 'title', 'due_date', 'importance', 'estimated_hours', 'blocked_count'
+                )
+            }
+        for task_id in ids:
+            task = tasks.get(task_id)
+            if task is None:
+                # Deleted since the scoring pass
+                continue
+            score_info = score_single_task(
+                task, None, strategy,
+                dependencies=calculate_dependencies(task['blocked_count']), context=context
+            )
+            yield task_result(task, score_info)
+
+
+def stored_export(strategy='smart_balance', dependency_mode='direct', context=None):
+    """
+    Rows for export_chunks() ranking every stored task, like
+    /stored/analyze/ (ties ranked by id).
+
+    Returns (rows, None), or (None, failed analysis result). In the direct
+    dependency mode the rows are produced lazily: tasks written while they
+    are read are exported as read.
+    """
+    context = context or AnalysisContext()
+    with analysis_reads():
+        key = ranking_key('stored', stored_version(), strategy, dependency_mode, context.cache_key)
+        analysis_result = get_ranking(key)
+        if analysis_result is None and (
+                dependency_mode != 'direct' or RecurringTask.objects.exists()):
+            analysis_result = rank_stored_tasks(strategy, dependency_mode, context)
+            if analysis_result['success']:
+                set_ranking(key, analysis_result)
+
+        if analysis_result is not None:
+            if not analysis_result['success']:
+                return None, analysis_result
+            return analysis_result['results'], None
+
+        cycle = query_index(lambda index: index.cycle())
+        if cycle:
+            return None, _cycle_result(cycle)
+
+        keys = []
+        rows = Task.objects.order_by().values_list(
+            'id', 'due_date', 'importance', 'estimated_hours', 'blocked_count'
+        )
+        for task_id, due_date, importance, hours, blocked in rows.iterator(chunk_size=CHUNK_SIZE):
+            score = apply_weights(
+                context.urgency(context.due_date(due_date)),
+                calculate_importance(importance),
+                calculate_effort(hours),
+                calculate_dependencies(blocked),
+                strategy
+            )
+            keys.append(task_id - score * _ID_SPACE)
+    keys.sort()
+    return _ranked_stored_rows(keys, strategy, context), None
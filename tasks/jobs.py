@@ -0,0 +1,312 @@
+"""
+Database-backed queue for analyses too large for one request.
+
+POST /api/tasks/jobs/ stores an AnalysisJob; workers started with
+`python manage.py run_jobs` claim queued jobs, run analyze_tasks with
+progress updates and store the ranking. There is no broker: a claim is a
+conditional UPDATE (queued -> running) on the existing database, so any
+number of workers can share the queue. At most TASKS_JOBS['MAX_RUNNING']
+jobs run at once across all workers (approximately, on databases that
+let two workers count at the same instant), and they run outside the web
+workers, so interactive requests keep their latency.
+
+Requests and results are stored as zlib-compressed JSON and deleted
+RESULT_TTL seconds after the job finishes. A running job holds a lease
+its worker renews on every progress update; a job whose lease lapses
+(worker killed) is queued again, up to MAX_ATTEMPTS claims.
+"""
+import asyncio
+import json
+import logging
+import time
+import zlib
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .calendars import get_calendar
+from .models import AnalysisJob
+from .scoring import analyze_tasks
+from .scoring.context import AnalysisContext
+from .scoring.validators import parse_as_of
+
+logger = logging.getLogger(__name__)
+
+JOBS_DEFAULTS = {
+    'MAX_RUNNING': 2,
+    'RESULT_TTL': 24 * 60 * 60,
+    'LEASE': 120,
+    'MAX_ATTEMPTS': 3,
+    'POLL_INTERVAL': 1.0,
+    # Seconds a /events/ stream stays open before the client reconnects
+    'STREAM_TIMEOUT': 60,
+}
+
+# Queued jobs looked at per claim attempt (others may take the first)
+CLAIM_CANDIDATES = 5
+
+FINISHED = (
+    AnalysisJob.Status.SUCCEEDED, AnalysisJob.Status.FAILED, AnalysisJob.Status.CANCELLED
+)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def get_jobs_settings():
+    """Return TASKS_JOBS merged over the defaults."""
+    return {**JOBS_DEFAULTS, **getattr(settings, 'TASKS_JOBS', {})}
+
+
+def compress_json(value):
+    # default=str: normalized tasks carry due dates as date objects
+    return zlib.compress(json.dumps(value, separators=(',', ':'), default=str).encode(), 6)
+
+
+def decompress_json(blob):
+    return json.loads(zlib.decompress(bytes(blob)))
+
+
+def enqueue_job(tasks, strategy='smart_balance', dependency_mode='direct', calendar=None,
+                as_of=None):
+    """Queue an analysis; arguments are the validated /analyze/ request fields."""
+    config = get_jobs_settings()
+    payload = {
+        'tasks': tasks,
+        'strategy': strategy,
+        'dependency_mode': dependency_mode,
+        'calendar': calendar,
+        'as_of': str(as_of) if as_of else None,
+    }
+    return AnalysisJob.objects.create(
+        payload=compress_json(payload),
+        total_tasks=len(tasks),
+        expires_at=timezone.now() + timedelta(seconds=config['RESULT_TTL'])
+    )
+
+
+def get_job(job_id):
+    """The job with this id, or None if it does not exist or has expired."""
+    return AnalysisJob.objects.filter(pk=job_id, expires_at__gt=timezone.now()).first()
+
+
+def job_summary(job):
+    """JSON-ready status of a job."""
+    def iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        'id': str(job.id),
+        'status': job.status,
+        'message': job.message,
+        'error': job.error or None,
+        'total_tasks': job.total_tasks,
+        'tasks_done': job.tasks_done,
+        'progress': round(job.tasks_done / job.total_tasks, 3) if job.total_tasks else 1.0,
+        'created_at': iso(job.created_at),
+        'started_at': iso(job.started_at),
+        'finished_at': iso(job.finished_at),
+        'expires_at': iso(job.expires_at),
+    }
+
+
+def job_result(job):
+    """The stored result of a succeeded job (see run_job)."""
+    return decompress_json(job.result)
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+async def job_events(job_id, interval=0.5):
+    """
+    Server-sent event stream of a job's progress (see job_events_view):
+    a "progress" event per change, "done" when finished, a comment line
+    as keep-alive, and nothing after STREAM_TIMEOUT seconds. An async
+    generator: an open stream waits on the event loop, not a worker.
+    """
+    deadline = time.monotonic() + get_jobs_settings()['STREAM_TIMEOUT']
+    yield 'retry: 1000\n\n'
+    last = None
+    read_job = sync_to_async(get_job)
+    while True:
+        job = await read_job(job_id)
+        if job is None:
+            yield _event('error', {'message': 'Job not found'})
+            return
+        summary = job_summary(job)
+        if summary != last:
+            yield _event('progress', summary)
+            last = summary
+        if job.status in FINISHED:
+            yield _event('done', summary)
+            return
+        if time.monotonic() >= deadline:
+            return
+        yield ': keep-alive\n\n'
+        await asyncio.sleep(interval)
+
+
+def claim_job():
+    """Mark the oldest queued job running and return it, or None."""
+    config = get_jobs_settings()
+    now = timezone.now()
+    with transaction.atomic():
+        if AnalysisJob.objects.filter(status=AnalysisJob.Status.RUNNING).count() >= config['MAX_RUNNING']:
+            return None
+        candidates = list(
+            AnalysisJob.objects.filter(status=AnalysisJob.Status.QUEUED)
+            .order_by('created_at').values_list('pk', flat=True)[:CLAIM_CANDIDATES]
+        )
+        for pk in candidates:
+            claimed = AnalysisJob.objects.filter(pk=pk, status=AnalysisJob.Status.QUEUED).update(
+                status=AnalysisJob.Status.RUNNING,
+                started_at=now,
+                lease_expires_at=now + timedelta(seconds=config['LEASE']),
+                attempts=F('attempts') + 1
+            )
+            if claimed:
+                return AnalysisJob.objects.get(pk=pk)
+    return None
+
+
+def _finish(job, status, **fields):
+    """Record a running job's outcome unless it was requeued meanwhile."""
+    config = get_jobs_settings()
+    now = timezone.now()
+    AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.Status.RUNNING).update(
+        status=status,
+        finished_at=now,
+        lease_expires_at=None,
+        expires_at=now + timedelta(seconds=config['RESULT_TTL']),
+        **fields
+    )
+
+
+def run_job(job):
+    """Run a claimed job to completion, failure or cancellation."""
+    config = get_jobs_settings()
+
+    def progress(done, total):
+        if AnalysisJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+            raise JobCancelled()
+        AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.Status.RUNNING).update(
+            tasks_done=done,
+            lease_expires_at=timezone.now() + timedelta(seconds=config['LEASE'])
+        )
+
+    try:
+        payload = decompress_json(job.payload)
+        as_of, _ = parse_as_of(payload['as_of'])
+        calendar = get_calendar(payload['calendar'])
+        if calendar is None:
+            _finish(job, AnalysisJob.Status.FAILED, message='Unknown calendar',
+                    error=f'No working calendar named {payload["calendar"]}')
+            return
+
+        context = AnalysisContext(as_of, calendar)
+        analysis = analyze_tasks(
+            payload['tasks'], payload['strategy'], payload['dependency_mode'], context,
+            progress=progress
+        )
+
+        if not analysis['success']:
+            _finish(job, AnalysisJob.Status.FAILED, message=analysis['message'],
+                    error=analysis['error'])
+            return
+
+        progress(job.total_tasks, job.total_tasks)
+        _finish(
+            job, AnalysisJob.Status.SUCCEEDED,
+            message=analysis['message'],
+            tasks_done=job.total_tasks,
+            result=compress_json({
+                'strategy': payload['strategy'],
+                'dependency_mode': payload['dependency_mode'],
+                'as_of': str(context.as_of),
+                'results': analysis['results'],
+            })
+        )
+
+    except JobCancelled:
+        _finish(job, AnalysisJob.Status.CANCELLED, message='Job cancelled')
+
+    except Exception as e:
+        logger.exception('Analysis job %s failed', job.pk)
+        _finish(job, AnalysisJob.Status.FAILED, message='Server error occurred', error=str(e))
+
+
+def cancel_job(job):
+    """
+    Cancel a job: queued jobs stop at once, running ones at their next
+    progress update. Returns the refreshed job.
+    """
+    config = get_jobs_settings()
+    now = timezone.now()
+    AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.Status.QUEUED).update(
+        status=AnalysisJob.Status.CANCELLED,
+        message='Job cancelled',
+        finished_at=now,
+        expires_at=now + timedelta(seconds=config['RESULT_TTL'])
+    )
+    AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.Status.RUNNING).update(
+        cancel_requested=True
+    )
+    job.refresh_from_db()
+    return job
+
+
+def requeue_stale_jobs():
+    """Queue again running jobs whose worker lease lapsed; fail repeat offenders."""
+    config = get_jobs_settings()
+    now = timezone.now()
+    stale = AnalysisJob.objects.filter(
+        status=AnalysisJob.Status.RUNNING, lease_expires_at__lt=now
+    )
+    stale.filter(attempts__gte=config['MAX_ATTEMPTS']).update(
+        status=AnalysisJob.Status.FAILED,
+        message='Job failed',
+        error=f'Worker lost {config["MAX_ATTEMPTS"]} times',
+        finished_at=now,
+        lease_expires_at=None,
+        expires_at=now + timedelta(seconds=config['RESULT_TTL'])
+    )
+    return stale.update(
+        status=AnalysisJob.Status.QUEUED, started_at=None, lease_expires_at=None, tasks_done=0
+    )
+
+
+def purge_expired_jobs():
+    """Delete jobs past their expiry; returns how many."""
+    deleted, _ = AnalysisJob.objects.filter(expires_at__lte=timezone.now()).exclude(
+        status=AnalysisJob.Status.RUNNING
+    ).delete()
+    return deleted
+
+
+def run_worker(once=False, stop=None):
+    """
+    Claim and run jobs until `stop` (a threading/multiprocessing Event) is
+    set, or, with once=True, until no job can be claimed.
+    """
+    config = get_jobs_settings()
+    while stop is None or not stop.is_set():
+        close_old_connections()
+        requeue_stale_jobs()
+        purge_expired_jobs()
+        job = claim_job()
+        if job is not None:
+            run_job(job)
+        elif once:
+            return
+        elif stop is not None:
+            stop.wait(config['POLL_INTERVAL'])
+        else:
+            time.sleep(config['POLL_INTERVAL'])
+
@@ -0,0 +1,235 @@
+"""
+Live ranking updates for stored tasks, as server-sent events.
+
+GET /api/tasks/stored/live/ (served under ASGI) sends the top of the
+stored-task ranking once, then only the rank and score changes whenever
+Task rows change or the day rolls over. Each process has one Broadcaster:
+
+- Task writes in this process notify it once their transaction commits
+  (stored_tasks_changed, see tasks/signals.py).
+- While anyone is subscribed, one poller per event loop reads the Task
+  table's change counter every POLL_INTERVAL seconds (one primary-key
+  read, however many subscribers), which catches writes by other
+  processes, and checks for a new day.
+
+A notification only wakes subscribers; each re-reads the ranking through
+the ranking cache (tasks/ranking.py), so subscribers with the same
+parameters share one analysis per change. Subscriber queues hold at most
+QUEUE_SIZE notifications: a slow client drops wake-ups, never data, as it
+diffs against the current ranking when it catches up. Between changes an
+open stream costs a parked coroutine and a keep-alive comment every
+KEEPALIVE seconds.
+"""
+import asyncio
+import json
+import threading
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from backend.routers import analysis_reads
+
+from . import metrics
+from .calendars import get_calendar
+from .ranking import get_ranking, ranking_key, set_ranking, stored_version
+from .scoring.context import AnalysisContext
+from .stored import rank_stored_tasks
+
+LIVE_DEFAULTS = {
+    'QUEUE_SIZE': 8,
+    'MAX_SUBSCRIBERS': 1000,
+    'POLL_INTERVAL': 2.0,
+    'KEEPALIVE': 15.0,
+}
+
+
+def get_live_settings():
+    """Return TASKS_LIVE merged over the defaults."""
+    return {**LIVE_DEFAULTS, **getattr(settings, 'TASKS_LIVE', {})}
+
+
+class Subscription:
+    """A bounded queue of change notifications for one open stream."""
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def offer(self, reason):
+        """Queue a notification (on the subscriber's loop); drop it when full."""
+        try:
+            self.queue.put_nowait(reason)
+        except asyncio.QueueFull:
+            metrics.increment('live.dropped')
+
+    async def wait(self, timeout):
+        """
+        The next notification, or None after timeout seconds. Notifications
+        queued behind it are dropped: one re-read covers them all.
+        """
+        try:
+            reason = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        return reason
+
+
+class Broadcaster:
+    """In-process fan-out of "stored tasks changed" notifications."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._pollers = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """
+        Register a subscriber on the running event loop; None when
+        MAX_SUBSCRIBERS are already open.
+        """
+        config = get_live_settings()
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(loop, config['QUEUE_SIZE'])
+        with self._lock:
+            if len(self._subscribers) >= config['MAX_SUBSCRIBERS']:
+                return None
+            self._subscribers.add(subscription)
+            if loop not in self._pollers and config['POLL_INTERVAL'] > 0:
+                self._pollers[loop] = loop.create_task(self._poll(loop, config['POLL_INTERVAL']))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, reason='changed'):
+        """Wake every subscriber. Safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, reason)
+            except RuntimeError:
+                # Its event loop has closed
+                self.unsubscribe(subscription)
+
+    async def _poll(self, loop, interval):
+        """Publish changes made outside this process, and day rollovers."""
+        task = asyncio.current_task()
+        version = await sync_to_async(stored_version)()
+        today = date.today()
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                with self._lock:
+                    if not any(s.loop is loop for s in self._subscribers):
+                        return
+                current = await sync_to_async(stored_version)()
+                if current != version:
+                    version = current
+                    self.publish('changed')
+                if date.today() != today:
+                    today = date.today()
+                    self.publish('day')
+        finally:
+            # Under the lock that subscribe() checks, so a new subscriber
+            # either sees this poller running or starts another
+            with self._lock:
+                if self._pollers.get(loop) is task:
+                    del self._pollers[loop]
+
+
+broadcaster = Broadcaster()
+
+
+def _stored_ranking(strategy, dependency_mode, calendar_name):
+    """(as_of, analysis result) of the stored tasks today, through the ranking cache."""
+    with analysis_reads():
+        context = AnalysisContext(date.today(), get_calendar(calendar_name))
+        key = ranking_key('stored', stored_version(), strategy, dependency_mode, context.cache_key)
+        analysis_result = get_ranking(key)
+        if analysis_result is None:
+            analysis_result = rank_stored_tasks(strategy, dependency_mode, context)
+            if analysis_result['success']:
+                set_ranking(key, analysis_result)
+    return context.as_of, analysis_result
+
+
+def _entry(rank, task):
+    return {
+        'id': task['id'],
+        'rank': rank,
+        'title': task['title'],
+        'priority_score': task['priority_score'],
+        'priority_level': task['priority_level'],
+    }
+
+
+def ranking_delta(previous, current):
+    """
+    Changes from one top-of-ranking list to the next: (changes, removed),
+    the entries whose rank, score or title differ (or are new) and the ids
+    that left the list.
+    """
+    def state(rank, task):
+        return rank, task['priority_score'], task['title']
+
+    before = {task['id']: state(rank, task) for rank, task in enumerate(previous, 1)}
+    changes = [
+        _entry(rank, task) for rank, task in enumerate(current, 1)
+        if before.get(task['id']) != state(rank, task)
+    ]
+    current_ids = {task['id'] for task in current}
+    removed = [task_id for task_id in before if task_id not in current_ids]
+    return changes, removed
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, separators=(",", ":"), default=str)}\n\n'
+
+
+async def ranking_events(subscription, strategy, dependency_mode, calendar_name, top):
+    """
+    Server-sent event stream for one subscriber: "snapshot" with the top
+    `top` tasks, then "ranking" with the changes after each notification
+    that altered them, and keep-alive comments in between.
+    """
+    config = get_live_settings()
+    load = sync_to_async(_stored_ranking)
+    try:
+        yield 'retry: 1000\n\n'
+        previous = None
+        while True:
+            as_of, analysis_result = await load(strategy, dependency_mode, calendar_name)
+            if not analysis_result['success']:
+                yield _event('error', {'message': analysis_result['message'],
+                                       'error': analysis_result['error']})
+            else:
+                current = analysis_result['results'][:top]
+                if previous is None:
+                    yield _event('snapshot', {
+                        'as_of': as_of,
+                        'total_tasks': len(analysis_result['results']),
+                        'results': [_entry(rank, task) for rank, task in enumerate(current, 1)],
+                    })
+                else:
+                    changes, removed = ranking_delta(previous, current)
+                    if changes or removed:
+                        yield _event('ranking', {
+                            'as_of': as_of,
+                            'total_tasks': len(analysis_result['results']),
+                            'changes': changes,
+                            'removed': removed,
+                        })
+                previous = current
+
+            while await subscription.wait(config['KEEPALIVE']) is None:
+                yield ': keep-alive\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
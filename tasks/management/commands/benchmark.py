@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from tasks.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run a scoring API performance benchmark and print a short report."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(BENCHMARKS))
+        parser.add_argument('--tasks', type=int,
+                            help="Number of tasks in the generated payload "
+                                 "(default: the benchmark's own size)")
+        parser.add_argument('--repeat', type=int,
+                            help="Runs per measurement, best time reported "
+                                 "(default: the benchmark's own)")
+
+    def handle(self, *args, **options):
+        # Benchmarks send large requests back to back from one client
+        admission = {
+            **getattr(settings, 'TASKS_ADMISSION', {}),
+            'RATE': 0,
+            'MAX_BODY_SIZE': 1024 ** 3,
+            'MAX_TASKS': 10 ** 8,
+            'MAX_DEPENDENCY_EDGES': 10 ** 9,
+        }
+        with override_settings(TASKS_ADMISSION=admission, DATA_UPLOAD_MAX_MEMORY_SIZE=None):
+            # Each benchmark's defaults are the sizes the README describes
+            sizes = {name: options[name] for name in ('tasks', 'repeat')
+                     if options[name] is not None}
+            BENCHMARKS[options['name']](self.stdout, **sizes)
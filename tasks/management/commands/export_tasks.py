@@ -0,0 +1,70 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.calendars import get_calendar
+from tasks.export import EXPORT_FORMATS, export_chunks, format_error, stored_export
+from tasks.scoring import analyze_tasks, get_valid_dependency_modes, get_valid_strategies
+from tasks.scoring.context import AnalysisContext
+from tasks.scoring.payload import error_message, validate_tasks
+from tasks.scoring.validators import parse_as_of
+
+
+class Command(BaseCommand):
+    help = "Export a task ranking as CSV or Parquet (stored tasks unless --input is given)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS,
+                            default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout, CSV only)')
+        parser.add_argument('--input',
+                            help='JSON file holding a task list, or an /analyze/ request body')
+        parser.add_argument('--strategy', choices=get_valid_strategies(), default='smart_balance')
+        parser.add_argument('--dependency-mode', choices=get_valid_dependency_modes(),
+                            default='direct')
+        parser.add_argument('--calendar', help='Working calendar name')
+        parser.add_argument('--as-of', help='Day urgency is measured from, YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        export_format = options['export_format']
+        error = format_error(export_format)
+        if error:
+            raise CommandError(error)
+        if export_format != 'csv' and not options['output']:
+            raise CommandError(f'{export_format} exports need --output')
+
+        calendar = get_calendar(options['calendar'])
+        if calendar is None:
+            raise CommandError(f'No working calendar named {options["calendar"]}')
+        as_of, as_of_error = parse_as_of(options['as_of'])
+        if as_of_error:
+            raise CommandError(as_of_error)
+        context = AnalysisContext(as_of, calendar)
+
+        string_ids = False
+        if options['input']:
+            with open(options['input']) as f:
+                body = json.load(f)
+            tasks, errors = validate_tasks(body.get('tasks') if isinstance(body, dict) else body)
+            if errors:
+                raise CommandError(error_message(errors))
+            analysis_result = analyze_tasks(
+                tasks, options['strategy'], options['dependency_mode'], context
+            )
+            if not analysis_result['success']:
+                raise CommandError(analysis_result['error'])
+            rows = analysis_result['results']
+            string_ids = any(isinstance(task['id'], str) for task in rows)
+        else:
+            rows, failed = stored_export(options['strategy'], options['dependency_mode'], context)
+            if rows is None:
+                raise CommandError(failed['error'])
+
+        chunks = export_chunks(rows, export_format, string_ids)
+        if options['output']:
+            with open(options['output'], 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
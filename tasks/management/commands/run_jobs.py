@@ -0,0 +1,56 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+
+
+def worker_process(stop):
+    """Entry point of a spawned worker; this module imports no models."""
+    # Ctrl+C reaches the whole process group: the parent sets `stop` and
+    # the worker finishes its current job first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import django
+    django.setup()
+
+    from tasks.jobs import run_worker
+    run_worker(stop=stop)
+
+
+class Command(BaseCommand):
+    help = "Run queued analysis jobs (POST /api/tasks/jobs/)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes (TASKS_JOBS MAX_RUNNING still caps running jobs)')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the queued jobs, then exit')
+
+    def handle(self, *args, **options):
+        from tasks.jobs import run_worker
+
+        if options['once'] or options['workers'] <= 1:
+            try:
+                run_worker(once=options['once'])
+            except KeyboardInterrupt:
+                pass
+            return
+
+        # Fresh interpreters: no database connections or threads are shared
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        processes = [
+            context.Process(target=worker_process, args=(stop,), daemon=True)
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Started {len(processes)} job workers')
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            stop.set()
+            for process in processes:
+                process.join()
@@ -0,0 +1,27 @@
+"""
+In-process counters for the tasks API, served by /api/tasks/metrics/.
+
+Counters are per worker process and reset when it restarts; scrape every
+worker (or sum across them) for totals.
+"""
+import threading
+from collections import Counter
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot():
+    """Return {counter name: value}, sorted by name."""
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+
+def reset():
+    with _lock:
+        _counters.clear()
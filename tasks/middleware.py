@@ -0,0 +1,306 @@
+import gzip
+import math
+import zlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+
+from . import metrics
+from .admission import TokenBucketLimiter, client_key, get_admission_settings
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+
+COMPRESSION_DEFAULTS = {
+    'MIN_RESPONSE_SIZE': 1024,
+    'MAX_DECOMPRESSED_SIZE': 50 * 1024 * 1024,
+    'GZIP_LEVEL': 6,
+    'ZSTD_LEVEL': 3,
+    'RESPONSE_URL_NAMES': ['analyze_tasks', 'suggest_tasks'],
+}
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class RequestBodyTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Decompressed request body is too large.'
+    default_code = 'request_body_too_large'
+
+
+def get_compression_settings():
+    """Return TASKS_COMPRESSION merged over the defaults."""
+    return {**COMPRESSION_DEFAULTS, **getattr(settings, 'TASKS_COMPRESSION', {})}
+
+
+def supported_encodings():
+    """Content codings this server can decode and produce, best first."""
+    if zstandard is not None:
+        return ['zstd', 'gzip']
+    return ['gzip']
+
+
+class DecompressingStream:
+    """
+    File-like wrapper that decompresses a request body as it is read.
+
+    The parser pulls bounded chunks through the decompressor, so the
+    compressed and decompressed bodies never both sit in memory, and
+    reading stops with RequestBodyTooLarge as soon as the output passes
+    max_size (zip bomb guard).
+    """
+
+    def __init__(self, raw, encoding, max_size):
+        self.encoding = encoding
+        self.max_size = max_size
+        self.total = 0
+        # Decompressed bytes read past a line end, served before the reader
+        self._pending = b''
+        if encoding == 'gzip':
+            self._reader = gzip.GzipFile(fileobj=raw, mode='rb')
+        else:
+            self._reader = zstandard.ZstdDecompressor().stream_reader(raw)
+
+    def _read_chunk(self, size):
+        try:
+            chunk = self._reader.read(size)
+        except (OSError, EOFError, zlib.error) as e:
+            raise ParseError(f'Malformed {self.encoding} request body: {e}')
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                raise ParseError(f'Malformed {self.encoding} request body: {e}')
+            raise
+
+        self.total += len(chunk)
+        if self.total > self.max_size:
+            raise RequestBodyTooLarge(
+                f'Decompressed request body exceeds {self.max_size} bytes'
+            )
+        return chunk
+
+    def read(self, size=-1):
+        if size is not None and size >= 0:
+            if self._pending:
+                chunk, self._pending = self._pending[:size], self._pending[size:]
+                return chunk
+            # Never ask for more than one past the limit in a single call
+            return self._read_chunk(min(size, self.max_size - self.total + 1))
+
+        chunks = [self._pending]
+        self._pending = b''
+        while True:
+            chunk = self._read_chunk(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def readline(self, size=-1):
+        """
+        Read up to and including the next newline, through the same
+        bounded chunks as read(), so a long line still stops at max_size.
+        """
+        limit = None if size is None or size < 0 else size
+        parts = []
+        length = 0
+        while limit is None or length < limit:
+            want = READ_CHUNK_SIZE if limit is None else min(READ_CHUNK_SIZE, limit - length)
+            chunk = self.read(want)
+            if not chunk:
+                break
+            end = chunk.find(b'\n') + 1
+            if end:
+                self._pending = chunk[end:] + self._pending
+                chunk = chunk[:end]
+            parts.append(chunk)
+            length += len(chunk)
+            if end:
+                break
+        return b''.join(parts)
+
+    def close(self):
+        self._reader.close()
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into {coding: q}.
+
+    'gzip;q=0.5, zstd' -> {'gzip': 0.5, 'zstd': 1.0}
+    """
+    codings = {}
+    for item in header.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def negotiate_encoding(header):
+    """Pick the best response coding for an Accept-Encoding header, or None."""
+    if not header:
+        return None
+
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0.0)
+
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress_bytes(content, encoding, config):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=config['ZSTD_LEVEL']).compress(content)
+    return gzip.compress(content, compresslevel=config['GZIP_LEVEL'], mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Request-body decompression and negotiated response compression.
+
+    Requests with Content-Encoding gzip/zstd get a streaming decompressor
+    in front of the body, so DRF's parser reads plain JSON. Responses from
+    the views named in RESPONSE_URL_NAMES are compressed with the best
+    coding the client accepts once they reach MIN_RESPONSE_SIZE bytes.
+
+    Configured with settings.TASKS_COMPRESSION (see COMPRESSION_DEFAULTS).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_compression_settings()
+        self.url_names = set(self.config['RESPONSE_URL_NAMES'])
+
+    def __call__(self, request):
+        error_response = self.process_request(request)
+        if error_response is not None:
+            return error_response
+
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_request(self, request):
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if not encoding or encoding == 'identity':
+            return None
+
+        if encoding not in supported_encodings():
+            return JsonResponse({
+                'success': False,
+                'message': 'Unsupported content encoding',
+                'error': f'Content-Encoding must be one of: {", ".join(supported_encodings())}'
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        request._stream = DecompressingStream(
+            request._stream, encoding, self.config['MAX_DECOMPRESSED_SIZE']
+        )
+        del request.META['HTTP_CONTENT_ENCODING']
+        return None
+
+    def process_response(self, request, response):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.url_name not in self.url_names:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if (response.streaming
+                or response.status_code != 200
+                or response.has_header('Content-Encoding')
+                or len(response.content) < self.config['MIN_RESPONSE_SIZE']):
+            return response
+
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress_bytes(response.content, encoding, self.config)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # The compressed body is a different representation, so a strong
+        # validator would be wrong here (same rule as GZipMiddleware).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
+
+
+class AdmissionMiddleware:
+    """
+    Early rejection for the analysis endpoints, before the view reads or
+    parses the body: a per-client token bucket (429 with Retry-After) and
+    a Content-Length limit (413). Task and dependency counts are checked
+    by the views after parsing (tasks.admission.check_task_limits).
+
+    Configured with settings.TASKS_ADMISSION (see ADMISSION_DEFAULTS).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_admission_settings()
+        self.url_names = set(self.config['URL_NAMES'])
+        self.limiter = None
+        if self.config['RATE'] > 0:
+            self.limiter = TokenBucketLimiter(
+                self.config['RATE'], self.config['BURST'], self.config['MAX_CLIENTS']
+            )
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.url_name not in self.url_names:
+            return None
+
+        if self.limiter is not None:
+            retry_after = self.limiter.take(client_key(request, self.config))
+            if retry_after:
+                metrics.increment('admission.rejected.rate_limited')
+                response = JsonResponse({
+                    'success': False,
+                    'message': 'Too many requests',
+                    'error': f'Rate limit exceeded, retry in {retry_after:.1f} seconds'
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+                response['Retry-After'] = str(math.ceil(retry_after))
+                return response
+
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > self.config['MAX_BODY_SIZE']:
+            metrics.increment('admission.rejected.body_size')
+            return JsonResponse({
+                'success': False,
+                'message': 'Request too large',
+                'error': f'Request body may be at most {self.config["MAX_BODY_SIZE"]} bytes'
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        metrics.increment('admission.admitted')
+        return None
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:20
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkingCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(help_text='Calendar identifier used in requests', max_length=64, unique=True)),
+                ('weekmask', models.CharField(default='1111100', help_text='Working days, Monday first (1111100 = Monday-Friday)', max_length=7, validators=[django.core.validators.RegexValidator('^[01]{7}$', 'Weekmask must be 7 characters of 0/1')])),
+                ('holidays', models.JSONField(blank=True, default=list, help_text='List of ISO dates that are not working days')),
+            ],
+            options={
+                'verbose_name': 'Working calendar',
+                'verbose_name_plural': 'Working calendars',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_dependency_edges(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskDependency = apps.get_model('tasks', 'TaskDependency')
+    db = schema_editor.connection.alias
+    edges = [
+        TaskDependency(task_id=task_id, depends_on=dep)
+        for task_id, dependencies in Task.objects.using(db).values_list('id', 'dependencies').iterator()
+        for dep in set(dependencies or [])
+        if isinstance(dep, int) and not isinstance(dep, bool)
+    ]
+    TaskDependency.objects.using(db).bulk_create(edges, batch_size=1000)
+    Task.objects.using(db).update(blocked_count=Coalesce(Subquery(
+        TaskDependency.objects.using(db).filter(depends_on=OuterRef('pk'))
+        .order_by().values('depends_on').annotate(n=Count('*')).values('n')
+    ), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_working_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depends_on', models.BigIntegerField(db_index=True, help_text='ID of the task it depends on')),
+            ],
+            options={
+                'verbose_name': 'Task dependency',
+                'verbose_name_plural': 'Task dependencies',
+            },
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='blocked_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of stored tasks listing this one as a dependency'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['blocked_count', '-importance', 'id', 'due_date', 'estimated_hours'], name='task_suggest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date', '-importance', 'id', 'estimated_hours', 'blocked_count'], name='task_due_importance_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='task',
+            field=models.ForeignKey(help_text='Task that depends on another', on_delete=django.db.models.deletion.CASCADE, related_name='dependency_edges', to='tasks.task'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.UniqueConstraint(fields=('task', 'depends_on'), name='unique_task_dependency'),
+        ),
+        migrations.RunPython(backfill_dependency_edges, migrations.RunPython.noop),
+    ]
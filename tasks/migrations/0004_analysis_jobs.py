@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:43
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_stored_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', help_text='Where the job is in its lifecycle', max_length=16)),
+                ('payload', models.BinaryField(help_text='zlib-compressed JSON request')),
+                ('result', models.BinaryField(blank=True, help_text='zlib-compressed JSON result', null=True)),
+                ('message', models.CharField(blank=True, help_text='Outcome summary', max_length=255)),
+                ('error', models.TextField(blank=True, help_text='Why the job failed')),
+                ('total_tasks', models.IntegerField(default=0, help_text='Tasks in the request')),
+                ('tasks_done', models.IntegerField(default=0, help_text='Tasks scored so far')),
+                ('cancel_requested', models.BooleanField(default=False, help_text='Stop the job at its next progress update')),
+                ('attempts', models.IntegerField(default=0, help_text='Times a worker has picked the job up')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the job was queued')),
+                ('started_at', models.DateTimeField(blank=True, help_text='When a worker picked the job up', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, help_text='When the job stopped running', null=True)),
+                ('lease_expires_at', models.DateTimeField(blank=True, help_text="Running job's worker lease", null=True)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='When the job and its result are deleted')),
+            ],
+            options={
+                'verbose_name': 'Analysis job',
+                'verbose_name_plural': 'Analysis jobs',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='job_queue_idx')],
+            },
+        ),
+    ]
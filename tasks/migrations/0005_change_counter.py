@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_analysis_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('scope', models.CharField(help_text='What this counter tracks', max_length=64, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0, help_text='Changes so far')),
+            ],
+            options={
+                'verbose_name': 'Change counter',
+                'verbose_name_plural': 'Change counters',
+            },
+        ),
+    ]
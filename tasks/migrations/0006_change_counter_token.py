@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_change_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changecounter',
+            name='token',
+            field=models.CharField(blank=True, default='', help_text='Random identifier of the latest change', max_length=32),
+        ),
+    ]
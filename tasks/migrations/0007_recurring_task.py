@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:22
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_change_counter_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(help_text='Title of every occurrence', max_length=255)),
+                ('importance', models.IntegerField(default=5, help_text='Importance rating from 1-10')),
+                ('estimated_hours', models.FloatField(default=2, help_text='Estimated hours of one occurrence')),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly')], default='weekly', help_text='How the task repeats', max_length=16)),
+                ('interval', models.PositiveIntegerField(default=1, help_text='Repeat every this many days or weeks')),
+                ('weekdays', models.CharField(blank=True, help_text="Days of weekly occurrences, Monday first (blank: starts_on's weekday)", max_length=7, validators=[django.core.validators.RegexValidator('^[01]{7}$', 'Weekdays must be 7 characters of 0/1')])),
+                ('starts_on', models.DateField(help_text='First day of the rule')),
+                ('ends_on', models.DateField(blank=True, help_text='Last day of the rule', null=True)),
+                ('horizon', models.PositiveIntegerField(default=7, help_text='Days ahead occurrences are included in analyses')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When this template was created')),
+            ],
+            options={
+                'verbose_name': 'Recurring task',
+                'verbose_name_plural': 'Recurring tasks',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.core.validators import RegexValidator
 from django.db import models
+import uuid
 from datetime import date
 
 class Task(models.Model):
@@ -44,6 +46,12 @@ class Task(models.Model):
         help_text="When this task was created"
     )
     
+    blocked_count = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of stored tasks listing this one as a dependency"
+    )
+    
     def __str__(self):
         return self.title
     
@@ -51,3 +59,335 @@ class Task(models.Model):
         ordering = ['-created_at']
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
+        # Cover every column stored suggestions score on (see tasks/stored.py):
+        # importance-ordered scans per dependency bucket, and due-date ranges
+        indexes = [
+            models.Index(
+                fields=['blocked_count', '-importance', 'id', 'due_date', 'estimated_hours'],
+                name='task_suggest_idx'
+            ),
+            models.Index(
+                fields=['due_date', '-importance', 'id', 'estimated_hours', 'blocked_count'],
+                name='task_due_importance_idx'
+            ),
+        ]
+
+
+class RecurringTask(models.Model):
+    """
+    Template of a task that repeats, expanded into occurrences by stored
+    analyses and suggestions instead of being stored as one Task row per
+    occurrence (see tasks/scoring/recurrence.py).
+    
+    Fields:
+    - title, importance, estimated_hours: Copied to every occurrence
+    - frequency: daily or weekly
+    - interval: Every that many days or weeks
+    - weekdays: 7 characters of 0/1, Monday first, for weekly rules
+      (blank: the weekday of starts_on)
+    - starts_on / ends_on: First day of the rule and, optionally, its last
+    - horizon: Days ahead of an analysis an occurrence may be due and
+      still be included
+    """
+    
+    class Frequency(models.TextChoices):
+        DAILY = 'daily', 'Daily'
+        WEEKLY = 'weekly', 'Weekly'
+    
+    title = models.CharField(
+        max_length=255,
+        help_text="Title of every occurrence"
+    )
+    
+    importance = models.IntegerField(
+        default=5,
+        help_text="Importance rating from 1-10"
+    )
+    
+    estimated_hours = models.FloatField(
+        default=2,
+        help_text="Estimated hours of one occurrence"
+    )
+    
+    frequency = models.CharField(
+        max_length=16,
+        choices=Frequency.choices,
+        default=Frequency.WEEKLY,
+        help_text="How the task repeats"
+    )
+    
+    interval = models.PositiveIntegerField(
+        default=1,
+        help_text="Repeat every this many days or weeks"
+    )
+    
+    weekdays = models.CharField(
+        max_length=7,
+        blank=True,
+        validators=[RegexValidator(r'^[01]{7}$', 'Weekdays must be 7 characters of 0/1')],
+        help_text="Days of weekly occurrences, Monday first (blank: starts_on's weekday)"
+    )
+    
+    starts_on = models.DateField(
+        help_text="First day of the rule"
+    )
+    
+    ends_on = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Last day of the rule"
+    )
+    
+    horizon = models.PositiveIntegerField(
+        default=7,
+        help_text="Days ahead occurrences are included in analyses"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When this template was created"
+    )
+    
+    def __str__(self):
+        return self.title
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Recurring task"
+        verbose_name_plural = "Recurring tasks"
+
+
+class TaskDependency(models.Model):
+    """
+    One edge of Task.dependencies, so "which tasks block others" and "how
+    many tasks wait on this one" are indexed queries.
+    
+    Kept in sync with the JSON field, along with Task.blocked_count, on
+    every Task save and delete (tasks/signals.py); call
+    tasks.stored.sync_dependency_edges after bulk writes, which skip
+    signals.
+    
+    Fields:
+    - task: The task that is waiting
+    - depends_on: ID of the task it waits on (may not exist)
+    """
+    
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='dependency_edges',
+        help_text="Task that depends on another"
+    )
+    
+    depends_on = models.BigIntegerField(
+        db_index=True,
+        help_text="ID of the task it depends on"
+    )
+    
+    def __str__(self):
+        return f'{self.task_id} -> {self.depends_on}'
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'depends_on'], name='unique_task_dependency')
+        ]
+        verbose_name = "Task dependency"
+        verbose_name_plural = "Task dependencies"
+
+
+class WorkingCalendar(models.Model):
+    """
+    Working calendar for a team or region, used to count business days.
+    
+    Fields:
+    - name: Identifier clients pass as "calendar" in analysis requests
+    - weekmask: 7 characters of 0/1, Monday first ("1111100" = Mon-Fri)
+    - holidays: JSON list of ISO dates (YYYY-MM-DD) that are not worked
+    """
+    
+    name = models.SlugField(
+        max_length=64,
+        unique=True,
+        help_text="Calendar identifier used in requests"
+    )
+    
+    weekmask = models.CharField(
+        max_length=7,
+        default='1111100',
+        validators=[RegexValidator(r'^[01]{7}$', 'Weekmask must be 7 characters of 0/1')],
+        help_text="Working days, Monday first (1111100 = Monday-Friday)"
+    )
+    
+    holidays = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="List of ISO dates that are not working days"
+    )
+    
+    def __str__(self):
+        return self.name
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Working calendar"
+        verbose_name_plural = "Working calendars"
+
+
+class AnalysisJob(models.Model):
+    """
+    An analysis queued through /api/tasks/jobs/ and run by
+    `python manage.py run_jobs` (see tasks/jobs.py).
+    
+    Request and results are stored as zlib-compressed JSON, and the job
+    and its results are deleted once expires_at passes.
+    
+    Fields:
+    - status: queued, running, succeeded, failed or cancelled
+    - payload: Compressed request (tasks, strategy, dependency_mode, calendar, as_of)
+    - result: Compressed ranking once succeeded
+    - total_tasks / tasks_done: Progress counters
+    - cancel_requested: Set by a cancel call while the job is running
+    - attempts: Claims so far; a job that keeps losing its worker fails
+    - lease_expires_at: A running job whose worker stops renewing this is requeued
+    """
+    
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+        CANCELLED = 'cancelled', 'Cancelled'
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        help_text="Where the job is in its lifecycle"
+    )
+    
+    payload = models.BinaryField(
+        help_text="zlib-compressed JSON request"
+    )
+    
+    result = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text="zlib-compressed JSON result"
+    )
+    
+    message = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Outcome summary"
+    )
+    
+    error = models.TextField(
+        blank=True,
+        help_text="Why the job failed"
+    )
+    
+    total_tasks = models.IntegerField(
+        default=0,
+        help_text="Tasks in the request"
+    )
+    
+    tasks_done = models.IntegerField(
+        default=0,
+        help_text="Tasks scored so far"
+    )
+    
+    cancel_requested = models.BooleanField(
+        default=False,
+        help_text="Stop the job at its next progress update"
+    )
+    
+    attempts = models.IntegerField(
+        default=0,
+        help_text="Times a worker has picked the job up"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the job was queued"
+    )
+    
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a worker picked the job up"
+    )
+    
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the job stopped running"
+    )
+    
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Running job's worker lease"
+    )
+    
+    expires_at = models.DateTimeField(
+        db_index=True,
+        help_text="When the job and its result are deleted"
+    )
+    
+    def __str__(self):
+        return f'{self.id} ({self.status})'
+    
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Analysis job"
+        verbose_name_plural = "Analysis jobs"
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_queue_idx'),
+        ]
+
+
+class ChangeCounter(models.Model):
+    """
+    Version number of a set of rows, bumped on every write to them, so
+    "has anything changed?" costs one primary-key read (see
+    tasks/ranking.py: stored ranking cache keys and the ETags of the
+    stored-task endpoints).
+    
+    Fields:
+    - scope: What the counter tracks ("tasks" for the Task table; a
+      per-tenant scope would be e.g. "tasks:<tenant>")
+    - value: Incremented on every change
+    - token: Random per change, so a version seen inside a transaction
+      that rolled back is never reused by a later change
+    """
+    
+    scope = models.CharField(
+        max_length=64,
+        primary_key=True,
+        help_text="What this counter tracks"
+    )
+    
+    value = models.BigIntegerField(
+        default=0,
+        help_text="Changes so far"
+    )
+    
+    token = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        help_text="Random identifier of the latest change"
+    )
+    
+    def __str__(self):
+        return f'{self.scope}: {self.value}'
+    
+    class Meta:
+        verbose_name = "Change counter"
+        verbose_name_plural = "Change counters"
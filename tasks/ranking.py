@@ -0,0 +1,154 @@
+"""
+Windows over a ranking: limit/cursor pagination backed by a cached ranking.
+
+A ranking is the sorted `results` list of an analysis. The first page
+builds it and caches it (Django cache, TASKS_RANKING_CACHE_TIMEOUT
+seconds) under a key derived from everything that determines it, so later
+pages are a cache read and a slice instead of a new analysis.
+
+Cursors are opaque to clients: URL-safe base64 of the JSON
+[priority_score, id] of the last task on the previous page. They point at
+a task, not an offset, so a rebuilt ranking for the same inputs resumes in
+the same place.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+
+from .models import ChangeCounter
+from .scoring import tables
+from .scoring.strategies import strategies_fingerprint
+
+DEFAULT_PAGE_SIZE = 50
+RANKING_CACHE_PREFIX = 'tasks:ranking:'
+
+# ChangeCounter scope of the Task table
+STORED_SCOPE = 'tasks'
+
+# Sent after every bump of the stored version, with the changes if known
+stored_tasks_changed = Signal()
+
+
+def encode_cursor(task):
+    payload = json.dumps([task['priority_score'], task['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (priority_score, id) from a cursor; ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, binascii.Error, UnicodeError):
+        raise ValueError('cursor is not valid')
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        raise ValueError('cursor is not valid')
+    return score, task_id
+
+
+def parse_limit(value):
+    """
+    Parse the limit request parameter.
+
+    Returns (limit, error): limit is None when value is missing.
+    """
+    if value is None or value == '':
+        return None, None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        limit = 0
+    if isinstance(value, (bool, float)) or not 1 <= limit <= settings.TASKS_MAX_PAGE_SIZE:
+        return None, f'limit must be an integer from 1 to {settings.TASKS_MAX_PAGE_SIZE}'
+    return limit, None
+
+
+def ranking_key(*parts):
+    """
+    Cache key for a ranking determined by JSON-serializable parts and the
+    active strategy weights and score tables.
+    """
+    parts = (strategies_fingerprint(), tables.active().fingerprint) + parts
+    digest = hashlib.sha256(
+        json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str).encode()
+    ).hexdigest()
+    return RANKING_CACHE_PREFIX + digest
+
+
+def get_ranking(key):
+    """The cached ranking under key, or None."""
+    return cache.get(key)
+
+
+def set_ranking(key, ranking):
+    cache.set(key, ranking, settings.TASKS_RANKING_CACHE_TIMEOUT)
+
+
+def _version(value, token):
+    return f'{value}.{token}'
+
+
+def stored_version(using='default'):
+    """
+    Version of the Task table (its ChangeCounter) of database `using`,
+    part of every stored ranking key and ETag: one primary-key read,
+    shared by all workers.
+    """
+    row = ChangeCounter.objects.using(using).filter(pk=STORED_SCOPE).values_list('value', 'token').first()
+    return _version(*row) if row else _version(0, '')
+
+
+def bump_stored_version(using='default', **changes):
+    """
+    Invalidate every cached stored ranking and ETag (called on Task
+    writes to database `using`). stored_tasks_changed receivers get
+    `using`, the `previous` and new `version`, and `changes` describing
+    the write: tasks_saved and tasks_deleted (ids), edges_added and
+    edges_removed ((task_id, depends_on) pairs).
+    """
+    with transaction.atomic(using=using):
+        counter, _ = (ChangeCounter.objects.using(using).select_for_update()
+                      .get_or_create(pk=STORED_SCOPE))
+        previous = _version(counter.value, counter.token)
+        counter.value += 1
+        counter.token = uuid.uuid4().hex
+        counter.save(using=using, update_fields=['value', 'token'])
+    stored_tasks_changed.send(
+        sender=bump_stored_version, using=using, previous=previous,
+        version=_version(counter.value, counter.token), **changes
+    )
+
+
+def window(ranking, limit, cursor=None):
+    """
+    Return (page, next_cursor): up to `limit` tasks after the cursor's
+    task, and the cursor of the following page (None on the last page).
+
+    Raises ValueError if the cursor is malformed or its task is not in the
+    ranking.
+    """
+    start = 0
+    if cursor:
+        score, task_id = decode_cursor(cursor)
+        # Scores are descending: bisect to the cursor's score, then find
+        # its task among the ties
+        start = bisect_left(ranking, -score, key=lambda task: -task['priority_score'])
+        while start < len(ranking) and ranking[start]['priority_score'] == score:
+            if ranking[start]['id'] == task_id:
+                break
+            start += 1
+        else:
+            raise ValueError('cursor does not match this ranking')
+        start += 1
+
+    page = ranking[start:start + limit]
+    next_cursor = encode_cursor(page[-1]) if page and start + limit < len(ranking) else None
+    return page, next_cursor
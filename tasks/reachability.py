@@ -0,0 +1,385 @@
+"""
+Transitive dependency queries over stored tasks: what finishing a task
+unblocks (descendants), what it is waiting on (ancestors), and whether
+one task waits on another at all (reachable).
+
+Queries run on a ReachabilityIndex, built once per process from the
+TaskDependency edges and kept until the Task table's version moves on.
+Edges point from a task to the tasks waiting on it. Tasks on a cycle are
+condensed into one component, and every component has:
+
+- rank: its position in a topological order. A task can only reach
+  components ranked after its own.
+- low/high: an interval that contains the interval of every component it
+  reaches (high is a DFS post-order number, low the least high it
+  reaches). A task whose interval does not contain another's cannot
+  reach it.
+
+So most "no" answers to reachable() take O(1), and a "yes" is a DFS that
+skips every branch the ranks and intervals rule out. Descendant and
+ancestor listings are a BFS, proportional to the answer.
+
+Writes made by this process update the index in place (stored_tasks_changed
+carries the edge changes, see tasks/signals.py): a new edge moves the
+components between its ends into topological order (Pearce-Kelly) and
+widens the intervals of the components that now reach further. A removed
+edge only leaves the ranks and intervals looser than necessary, which
+keeps them correct. Anything else (a write from another process, a new
+cycle, a cycle broken up) drops the index, and the next query rebuilds it.
+
+Since those updates happen in place, request threads query the index
+through query_index(), which holds the same lock as apply_changes().
+"""
+import threading
+from collections import deque
+
+from .models import Task, TaskDependency
+from .ranking import stored_version
+
+_index = None
+_lock = threading.Lock()
+
+
+class ReachabilityIndex:
+    """
+    Reachability over a dependency graph of integer task ids.
+
+    Args:
+        task_ids: ids of the stored tasks
+        edges: (task_id, depends_on) pairs, like TaskDependency rows
+        version: stored version the graph was read at
+    """
+
+    def __init__(self, task_ids, edges, version=None):
+        self.version = version
+        self.ids = []
+        self.node_of = {}
+        self.children = []
+        self.parents = []
+        self.stored = set()
+
+        for task_id in task_ids:
+            self.stored.add(self._node(task_id))
+        for task_id, depends_on in edges:
+            blocker, waiting = self._node(depends_on), self._node(task_id)
+            self.children[blocker].add(waiting)
+            self.parents[waiting].add(blocker)
+
+        self._label()
+
+    def _node(self, task_id):
+        node = self.node_of.get(task_id)
+        if node is None:
+            node = self.node_of[task_id] = len(self.ids)
+            self.ids.append(task_id)
+            self.children.append(set())
+            self.parents.append(set())
+        return node
+
+    def _label(self):
+        """
+        Components, ranks and intervals, from one iterative Tarjan pass.
+        Components are found sinks first, which is a post-order of the
+        condensed graph and the reverse of a topological order.
+        """
+        n = len(self.ids)
+        self.component = [-1] * n
+        self.members = []
+        number = [-1] * n
+        lowlink = [0] * n
+        on_stack = [False] * n
+        stack = []
+        counter = 0
+
+        for root in range(n):
+            if number[root] != -1:
+                continue
+            number[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, iter(self.children[root]))]
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if number[child] == -1:
+                        number[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, iter(self.children[child])))
+                        break
+                    if on_stack[child]:
+                        lowlink[node] = min(lowlink[node], number[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == number[node]:
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            self.component[member] = len(self.members)
+                            members.append(member)
+                            if member == node:
+                                break
+                        self.members.append(members)
+
+        count = len(self.members)
+        self.rank = [count - 1 - c for c in range(count)]
+        self.high = list(range(count))
+        self.low = list(range(count))
+        self.next_high = count
+        # Sinks first, so every component below c is already final
+        for c, members in enumerate(self.members):
+            low = self.low[c]
+            for member in members:
+                for child in self.children[member]:
+                    low = min(low, self.low[self.component[child]])
+            self.low[c] = low
+
+    def _covers(self, a, b):
+        """Whether component a's interval contains component b's."""
+        return self.low[a] <= self.low[b] and self.high[b] <= self.high[a]
+
+    def _ruled_out(self, a, b):
+        return self.rank[a] >= self.rank[b] or not self._covers(a, b)
+
+    def reachable(self, source, target):
+        """Whether the task `target` waits on `source`, directly or not."""
+        if source not in self.node_of or target not in self.node_of:
+            return False
+        a, b = self.node_of[source], self.node_of[target]
+        if a == b:
+            return False
+        goal = self.component[b]
+        if self.component[a] == goal:
+            return True
+        if self._ruled_out(self.component[a], goal):
+            return False
+
+        seen = {a}
+        stack = [a]
+        while stack:
+            for child in self.children[stack.pop()]:
+                if child in seen:
+                    continue
+                seen.add(child)
+                c = self.component[child]
+                if c == goal:
+                    return True
+                if not self._ruled_out(c, goal):
+                    stack.append(child)
+        return False
+
+    def cycle(self):
+        """
+        Ids along one dependency cycle, following "waits on" edges and
+        ending where it started, or None when there is no cycle.
+        """
+        for members in self.members:
+            start = members[0]
+            if len(members) == 1 and start not in self.parents[start]:
+                continue
+            component = self.component[start]
+            previous = {}
+            queue = deque([start])
+            while queue:
+                node = queue.popleft()
+                for parent in self.parents[node]:
+                    if parent == start:
+                        path = [node]
+                        while path[-1] != start:
+                            path.append(previous[path[-1]])
+                        return [self.ids[n] for n in reversed(path)] + [self.ids[start]]
+                    if parent not in previous and self.component[parent] == component:
+                        previous[parent] = node
+                        queue.append(parent)
+        return None
+
+    def _walk(self, task_id, edges):
+        """Stored tasks reachable over `edges` from task_id: [(id, depth)], nearest first."""
+        start = self.node_of.get(task_id)
+        if start is None:
+            return []
+        depth = {start: 0}
+        queue = deque([start])
+        found = []
+        while queue:
+            node = queue.popleft()
+            for neighbour in edges[node]:
+                if neighbour not in depth:
+                    depth[neighbour] = depth[node] + 1
+                    queue.append(neighbour)
+                    if neighbour in self.stored:
+                        found.append((self.ids[neighbour], depth[neighbour]))
+        return found
+
+    def descendants(self, task_id):
+        """Tasks waiting on task_id, directly or not: [(id, depth)]."""
+        return self._walk(task_id, self.children)
+
+    def ancestors(self, task_id):
+        """Tasks task_id waits on, directly or not: [(id, depth)]."""
+        return self._walk(task_id, self.parents)
+
+    def add_task(self, task_id):
+        self.stored.add(self._add_node(task_id))
+
+    def remove_task(self, task_id):
+        node = self.node_of.get(task_id)
+        if node is not None:
+            self.stored.discard(node)
+
+    def _add_node(self, task_id):
+        node = self.node_of.get(task_id)
+        if node is None:
+            node = self._node(task_id)
+            c = len(self.members)
+            self.component.append(c)
+            self.members.append([node])
+            self.rank.append(len(self.rank))
+            self.high.append(self.next_high)
+            self.low.append(self.next_high)
+            self.next_high += 1
+        return node
+
+    def add_edge(self, task_id, depends_on):
+        """
+        Record that task_id waits on depends_on. Returns False, leaving
+        the index unusable, if the edge closes a cycle.
+        """
+        blocker, waiting = self._add_node(depends_on), self._add_node(task_id)
+        if waiting in self.children[blocker]:
+            return True
+        a, b = self.component[blocker], self.component[waiting]
+        if a != b and self.rank[a] > self.rank[b] and not self._reorder(a, b):
+            return False
+        self.children[blocker].add(waiting)
+        self.parents[waiting].add(blocker)
+
+        # Every component reaching `a` now also reaches b's interval
+        low, high = self.low[b], self.high[b]
+        queue = deque([a])
+        while queue:
+            c = queue.popleft()
+            if self.low[c] <= low and self.high[c] >= high:
+                continue
+            self.low[c] = min(self.low[c], low)
+            self.high[c] = max(self.high[c], high)
+            for member in self.members[c]:
+                queue.extend(self.component[p] for p in self.parents[member])
+        return True
+
+    def _reorder(self, a, b):
+        """
+        Pearce-Kelly: make rank[a] < rank[b] for a new edge a -> b by
+        reshuffling the ranks of the components between them. False if b
+        reaches a (the edge would close a cycle).
+        """
+        lower, upper = self.rank[b], self.rank[a]
+
+        def search(start, edges, inside):
+            found = {start}
+            stack = [start]
+            while stack:
+                for member in self.members[stack.pop()]:
+                    for node in edges[member]:
+                        c = self.component[node]
+                        if c not in found and inside(self.rank[c]):
+                            found.add(c)
+                            stack.append(c)
+            return found
+
+        forward = search(b, self.children, lambda rank: rank <= upper)
+        if a in forward:
+            return False
+        backward = search(a, self.parents, lambda rank: rank >= lower)
+
+        moved = sorted(backward, key=self.rank.__getitem__) + sorted(forward, key=self.rank.__getitem__)
+        ranks = sorted(self.rank[c] for c in moved)
+        for c, rank in zip(moved, ranks):
+            self.rank[c] = rank
+        return True
+
+    def remove_edge(self, task_id, depends_on):
+        """
+        Forget that task_id waits on depends_on. Returns False, leaving the
+        index unusable, if the edge was on a cycle (it may have split).
+        """
+        blocker, waiting = self.node_of.get(depends_on), self.node_of.get(task_id)
+        if blocker is None or waiting is None or waiting not in self.children[blocker]:
+            return True
+        self.children[blocker].discard(waiting)
+        self.parents[waiting].discard(blocker)
+        return self.component[blocker] != self.component[waiting]
+
+
+def load_index():
+    """Build the index of the stored tasks from the database."""
+    version = stored_version()
+    return ReachabilityIndex(
+        Task.objects.values_list('id', flat=True).iterator(),
+        TaskDependency.objects.values_list('task_id', 'depends_on').iterator(),
+        version
+    )
+
+
+def _current_index():
+    """The index of the current stored tasks (the caller holds _lock)."""
+    global _index
+    if _index is None or _index.version != stored_version():
+        _index = load_index()
+    return _index
+
+
+def get_index():
+    """
+    The index of the current stored tasks, built on first use after a
+    change. Writes by other threads may update it while it is queried;
+    use query_index() unless no other thread writes tasks.
+    """
+    with _lock:
+        return _current_index()
+
+
+def query_index(query):
+    """
+    Return query(index) for the current index, run under the lock so
+    apply_changes() cannot update the index halfway through the query.
+    """
+    with _lock:
+        return query(_current_index())
+
+
+def apply_changes(previous, version, tasks_saved=None, tasks_deleted=None, edges_added=None,
+                  edges_removed=None):
+    """
+    Apply a write by this process, which moved the stored version from
+    `previous` to `version`, to the index (see stored_tasks_changed). The
+    index is dropped when the changes are unknown or it missed other writes.
+    """
+    global _index
+    with _lock:
+        if _index is None:
+            return
+        if tasks_saved is None or _index.version != previous:
+            _index = None
+            return
+
+        ok = True
+        for task_id in tasks_saved:
+            _index.add_task(task_id)
+        for task_id, depends_on in edges_removed or ():
+            ok = ok and _index.remove_edge(task_id, depends_on)
+        for task_id, depends_on in edges_added or ():
+            ok = ok and _index.add_edge(task_id, depends_on)
+        for task_id in tasks_deleted or ():
+            _index.remove_task(task_id)
+
+        if ok:
+            _index.version = version
+        else:
+            _index = None
@@ -1,9 +1,14 @@
-from .analyzer import analyze_tasks, get_top_suggestions
-from .strategies import get_valid_strategies, STRATEGIES
+from .analyzer import analyze_tasks, analyze_batch, get_top_suggestions
+from .strategies import (
+    get_valid_strategies, get_valid_dependency_modes, STRATEGIES, DEPENDENCY_MODES
+)
 
 __all__ = [
     'analyze_tasks',
+    'analyze_batch',
     'get_top_suggestions',
     'get_valid_strategies',
-    'STRATEGIES'
+    'get_valid_dependency_modes',
+    'STRATEGIES',
+    'DEPENDENCY_MODES'
 ]
@@ -1,47 +1,31 @@
-from .components import (
-    calculate_urgency, calculate_importance, calculate_effort, calculate_dependencies
-)
-from .validators import parse_date, detect_circular_dependencies, count_blocked_tasks
-from .strategies import apply_weights
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from . import tables
+from .components import calculate_importance, calculate_effort, calculate_dependencies
+from .validators import detect_circular_dependencies, count_blocked_tasks
+from .strategies import apply_weights, get_valid_strategies, get_valid_dependency_modes
+from .graph import DependencyGraph, score_dependencies, task_key
+from .identity import TaskIndex
+from .calendar import default_calendar
+from .context import AnalysisContext
+from .payload import error_message, validate_tasks
+from .recurrence import top_occurrences
+
+# Tasks scored between calls of a progress callback
+PROGRESS_INTERVAL = 1000
 
 
 def generate_explanation(urgency, importance, effort, dependencies):
     """
     Generate human-readable explanation of score breakdown.
     
-    Converts numeric scores into words:
+    Converts numeric scores into words using the explanation tables.
+    Memoized by component tuple: tasks with the same breakdown get the
+    same (interned) string object.
     """
-    parts = []
-    
-    if urgency == 100:
-        parts.append("OVERDUE: Maximum urgency")
-    elif urgency == 50:
-        parts.append("Due in 0-3 days: High urgency")
-    elif urgency == 25:
-        parts.append("Due in 4-7 days: Medium urgency")
-    elif urgency == 10:
-        parts.append("Due in 8-14 days: Low urgency")
-    else:
-        parts.append("15+ days away: No urgency")
-    
-    if importance >= 80:
-        parts.append("Very important (8-10/10)")
-    elif importance >= 50:
-        parts.append("Moderately important (5-7/10)")
-    else:
-        parts.append("Less important (1-4/10)")
-    
-    if effort == 15:
-        parts.append("Quick task (under 1.5 hrs)")
-    elif effort == 5:
-        parts.append("Medium length (1.5-3 hrs)")
-    else:
-        parts.append("Long task (3+ hrs)")
-    
-    if dependencies > 0:
-        parts.append(f"Blocks other tasks (+{dependencies})")
-    
-    return " | ".join(parts)
+    return tables.active().explanation(urgency, importance, effort, dependencies)
 
 
 def assign_priority_level(score):
@@ -50,18 +34,17 @@ def assign_priority_level(score):
     
     Returns: 'HIGH' (red), 'MEDIUM' (yellow), or 'LOW' (green)
     """
-    if score >= 150:
-        return 'HIGH'
-    elif score >= 50:
-        return 'MEDIUM'
-    else:
-        return 'LOW'
+    return tables.active().priority_level(score)
 
 
-def score_single_task(task, all_tasks, strategy='smart_balance'):
+def score_single_task(task, all_tasks, strategy='smart_balance', dependencies=None, context=None):
     """
     Score ONE task with all 4 components.
     
+    `dependencies` is the precomputed dependency score; when omitted the
+    direct blocked count is taken from all_tasks. `context` is the
+    AnalysisContext (as-of date and calendar) urgency is measured in.
+    
     Returns dictionary with:
     {
         'score': 165,
@@ -73,13 +56,16 @@ def score_single_task(task, all_tasks, strategy='smart_balance'):
         'priority_level': 'HIGH'
     }
     """
-    urgency = calculate_urgency(parse_date(task.get('due_date')))
+    if context is None:
+        context = AnalysisContext()
+    
+    urgency = context.urgency(context.due_date(task.get('due_date')))
     importance = calculate_importance(task.get('importance', 5))
     effort = calculate_effort(task.get('estimated_hours', 2))
     
-    task_id = task.get('id') or task.get('title')
-    blocked_count = count_blocked_tasks(task_id, all_tasks)
-    dependencies = calculate_dependencies(blocked_count)
+    if dependencies is None:
+        blocked_count = count_blocked_tasks(task_key(task), all_tasks)
+        dependencies = calculate_dependencies(blocked_count)
     
     score = apply_weights(urgency, importance, effort, dependencies, strategy)
     
@@ -94,29 +80,97 @@ def score_single_task(task, all_tasks, strategy='smart_balance'):
     }
 
 
-def analyze_tasks(tasks, strategy='smart_balance'):
+def assign_default_ids(tasks):
+    """Give every task dict without an id its position in the list."""
+    for i, task in enumerate(tasks):
+        if isinstance(task, dict):
+            task['id'] = task.get('id', i)
+
+
+def score_tasks(tasks, strategy='smart_balance', dependency_mode='direct', graph=None,
+                context=None, progress=None):
+    """
+    Score every task in input order, without sorting.
+    
+    Expects tasks checked by payload.validate_tasks (every entry a dict
+    with valid fields). Assigns missing ids (the task's position) in
+    place. Returns a list of (input_index, task_result). Pass `graph` to
+    reuse a DependencyGraph built after assign_default_ids.
+    `progress(done, total)` is called every PROGRESS_INTERVAL tasks; an
+    exception it raises stops scoring.
+    """
+    assign_default_ids(tasks)
+    
+    if context is None:
+        context = AnalysisContext()
+    
+    dependency_scores = score_dependencies(tasks, dependency_mode, graph)
+    
+    scored = []
+    
+    for i, task in enumerate(tasks):
+        if progress is not None and i and i % PROGRESS_INTERVAL == 0:
+            progress(i, len(tasks))
+        
+        score_info = score_single_task(
+            task, tasks, strategy,
+            dependencies=dependency_scores[i], context=context
+        )
+        
+        scored.append((i, task_result(task, score_info)))
+    
+    return scored
+
+
+def task_result(task, score_info):
+    """One entry of an analysis's results, from a task and its score_single_task info."""
+    return {
+        'id': task['id'],
+        'title': task.get('title', 'Untitled'),
+        'due_date': str(task.get('due_date', '')),
+        'importance': task.get('importance', 5),
+        'estimated_hours': task.get('estimated_hours', 2),
+        'priority_score': score_info['score'],
+        'urgency': score_info['urgency'],
+        'importance_score': score_info['importance'],
+        'effort': score_info['effort'],
+        'dependencies_count': score_info['dependencies'],
+        'explanation': score_info['explanation'],
+        'priority_level': score_info['priority_level']
+    }
+
+
+def analyze_tasks(tasks, strategy='smart_balance', dependency_mode='direct', context=None,
+                  progress=None):
     """
     Main analysis function.
     
-    Takes list of tasks and returns them scored and sorted.
+    Takes a validated list of tasks (see payload.validate_tasks) and
+    returns them scored and sorted. dependency_mode picks how the
+    dependency component is scored (see DEPENDENCY_MODES); context is the
+    AnalysisContext (as-of date and working calendar) shared by every
+    task; a fresh one for today is used when omitted. progress is passed
+    to score_tasks.
     
     Returns:
     {
         'success': True/False,
         'message': 'Successfully analyzed 5 tasks',
         'results': [scored_task_1, scored_task_2, ...],
+        'references': {...},     (dependency reference problems, see TaskIndex.report)
         'error': None or error message
     }
     """
-    if not isinstance(tasks, list) or len(tasks) == 0:
+    if not tasks:
         return {
-            'success': True if len(tasks) == 0 else False,
-            'message': 'No tasks provided' if len(tasks) == 0 else 'Invalid input',
+            'success': True,
+            'message': 'No tasks provided',
             'results': [],
-            'error': None if len(tasks) == 0 else 'tasks must be a list'
+            'error': None
         }
     
-    has_cycles, cycle_message = detect_circular_dependencies(tasks)
+    index = TaskIndex(tasks)
+    has_cycles, cycle_message = detect_circular_dependencies(tasks, index)
     if has_cycles:
         return {
             'success': False,
@@ -125,36 +179,12 @@ def analyze_tasks(tasks, strategy='smart_balance'):
             'error': cycle_message
         }
     
-    scored_tasks = []
-    
-    for i, task in enumerate(tasks):
-        try:
-            if not isinstance(task, dict):
-                continue
-            
-            task['id'] = task.get('id', i)
-            
-            score_info = score_single_task(task, tasks, strategy)
-            
-            task_result = {
-                'id': task['id'],
-                'title': task.get('title', 'Untitled'),
-                'due_date': str(task.get('due_date', '')),
-                'importance': task.get('importance', 5),
-                'estimated_hours': task.get('estimated_hours', 2),
-                'priority_score': score_info['score'],
-                'urgency': score_info['urgency'],
-                'importance_score': score_info['importance'],
-                'effort': score_info['effort'],
-                'dependencies_count': score_info['dependencies'],
-                'explanation': score_info['explanation'],
-                'priority_level': score_info['priority_level']
-            }
-            
-            scored_tasks.append(task_result)
-        
-        except Exception:
-            continue
+    scored_tasks = [
+        result for _, result in score_tasks(
+            tasks, strategy, dependency_mode, DependencyGraph(tasks, index),
+            context=context, progress=progress
+        )
+    ]
     
     scored_tasks.sort(key=lambda x: x['priority_score'], reverse=True)
     
@@ -162,15 +192,20 @@ def analyze_tasks(tasks, strategy='smart_balance'):
         'success': True,
         'message': f'Successfully analyzed {len(scored_tasks)} tasks',
         'results': scored_tasks,
+        'references': index.report(),
         'error': None
     }
 
 
-def get_top_suggestions(tasks, strategy='smart_balance', count=3):
+def get_top_suggestions(tasks, strategy='smart_balance', count=3, dependency_mode='direct',
+                        context=None, recurring=()):
     """
     Get top N tasks for /suggest/ endpoint.
     
-    Returns top 3 (or N) tasks formatted for suggestions.
+    Returns top 3 (or N) tasks formatted for suggestions. Occurrences of
+    validated recurring templates (see recurrence.py) compete with the
+    tasks and lose ties to them; only as many are expanded as can still
+    make the top.
     
     Returns:
     {
@@ -187,7 +222,10 @@ def get_top_suggestions(tasks, strategy='smart_balance', count=3):
         'message': 'Top 3 tasks for today'
     }
     """
-    analysis = analyze_tasks(tasks, strategy)
+    if context is None:
+        context = AnalysisContext()
+    
+    analysis = analyze_tasks(tasks, strategy, dependency_mode, context)
     
     if not analysis['success']:
         return {
@@ -209,8 +247,181 @@ def get_top_suggestions(tasks, strategy='smart_balance', count=3):
         for task in top_tasks
     ]
     
+    if recurring:
+        floor = top_tasks[-1]['priority_score'] if len(top_tasks) == count else None
+        entries, _ = top_occurrences(recurring, strategy, count, context, floor)
+        suggestions.extend(
+            {
+                'title': task['title'],
+                'reason': generate_explanation(*components),
+                'priority': assign_priority_level(score),
+                'due_date': str(task['due_date']),
+                'priority_score': score
+            }
+            for score, task, components in entries
+        )
+        # Stable: tasks stay ahead of occurrences with the same score
+        suggestions.sort(key=lambda suggestion: -suggestion['priority_score'])
+        del suggestions[count:]
+    
     return {
         'success': True,
         'suggestions': suggestions,
         'message': f'Top {len(suggestions)} tasks for today'
     }
+
+
+def builtin_calendar(name=None):
+    """Calendar lookup without a database: only the default calendar."""
+    return default_calendar() if name in (None, '', 'default') else None
+
+
+def validate_batch_jobs(jobs, get_calendar=builtin_calendar, as_of=None):
+    """
+    Validate every job of a batch, envelope and tasks, in one pass.
+    
+    Returns a list of (job_id, tasks, options, error) in job order, where
+    tasks are normalized by payload.validate_tasks, options holds the
+    job's strategy, dependency_mode and AnalysisContext, and error is None
+    for runnable jobs and an error result otherwise.
+    Job ids default to the job's position and are returned as strings,
+    since they become JSON object keys. Calendars are resolved once per
+    distinct name through get_calendar, and every context shares as_of
+    (today, read once, when not given).
+    """
+    valid_strategies = get_valid_strategies()
+    valid_modes = get_valid_dependency_modes()
+    as_of = as_of or date.today()
+    contexts = {}
+    checked = []
+    
+    for i, job in enumerate(jobs):
+        if not isinstance(job, dict):
+            checked.append((str(i), None, None, _job_error('Invalid job', 'job must be an object')))
+            continue
+        
+        job_id = str(job.get('id', i))
+        tasks = job.get('tasks', [])
+        options = {
+            'strategy': job.get('strategy', 'smart_balance'),
+            'dependency_mode': job.get('dependency_mode', 'direct'),
+        }
+        calendar_name = job.get('calendar') or 'default'
+        error = None
+        
+        tasks, task_errors = validate_tasks(tasks)
+        if task_errors:
+            error = _job_error('Invalid request', error_message(task_errors))
+            error['errors'] = task_errors
+        elif options['strategy'] not in valid_strategies:
+            error = _job_error(
+                'Invalid strategy',
+                f'Strategy must be one of: {", ".join(valid_strategies)}'
+            )
+        elif options['dependency_mode'] not in valid_modes:
+            error = _job_error(
+                'Invalid dependency mode',
+                f'Dependency mode must be one of: {", ".join(valid_modes)}'
+            )
+        else:
+            if not isinstance(calendar_name, str):
+                calendar_name = str(calendar_name)
+            if calendar_name not in contexts:
+                calendar = get_calendar(calendar_name)
+                contexts[calendar_name] = calendar and AnalysisContext(as_of, calendar)
+            options['context'] = contexts[calendar_name]
+            if options['context'] is None:
+                error = _job_error('Unknown calendar', f'No working calendar named {calendar_name}')
+        
+        checked.append((job_id, tasks, options, error))
+    
+    return checked
+
+
+def _job_error(message, error):
+    return {'success': False, 'message': message, 'error': error}
+
+
+def _run_job(tasks, options):
+    try:
+        analysis = analyze_tasks(
+            tasks, options['strategy'], options['dependency_mode'], options['context']
+        )
+    except Exception as e:
+        return _job_error('Server error occurred', str(e))
+    
+    if not analysis['success']:
+        return _job_error(analysis['message'], analysis['error'])
+    
+    return {
+        'success': True,
+        'message': analysis['message'],
+        'strategy': options['strategy'],
+        'dependency_mode': options['dependency_mode'],
+        'calendar': options['context'].calendar.name,
+        'as_of': str(options['context'].as_of),
+        'total_tasks': len(analysis['results']),
+        'results': analysis['results'],
+        'references': analysis['references']
+    }
+
+
+def analyze_batch(jobs, parallel=False, max_workers=4, get_calendar=builtin_calendar,
+                  as_of=None):
+    """
+    Analyze many independent task lists in one call.
+    
+    Each job is {"id": ..., "tasks": [...], "strategy": ...}, optionally with
+    "dependency_mode" and "calendar". Jobs share the process-wide
+    parsed-date cache, each compiled calendar and one as_of date, so
+    repeated dates across jobs are parsed once, business days are table
+    lookups and every job is scored against the same day. With
+    parallel=True jobs run on a thread pool; that helps most on
+    free-threaded builds, elsewhere it mainly overlaps the cache-warm jobs.
+    
+    Returns:
+    {
+        'success': True,
+        'message': 'Analyzed 2 jobs (1 failed)',
+        'total_jobs': 2,
+        'results': {
+            'a': {'success': True, 'strategy': ..., 'total_tasks': ..., 'results': [...]},
+            'b': {'success': False, 'message': ..., 'error': ...}
+        },
+        'error': None or error message (e.g. duplicate job ids)
+    }
+    """
+    checked = validate_batch_jobs(jobs, get_calendar, as_of)
+    
+    id_counts = Counter(job_id for job_id, _, _, _ in checked)
+    duplicates = sorted(job_id for job_id, n in id_counts.items() if n > 1)
+    if duplicates:
+        return {
+            'success': False,
+            'message': 'Duplicate job id',
+            'total_jobs': 0,
+            'results': {},
+            'error': f'Job ids must be unique: {", ".join(duplicates)}'
+        }
+    
+    runnable = [(tasks, options) for _, tasks, options, error in checked if error is None]
+    
+    if parallel and len(runnable) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            outcomes = iter(list(pool.map(lambda job: _run_job(*job), runnable)))
+    else:
+        outcomes = (_run_job(tasks, options) for tasks, options in runnable)
+    
+    results = {}
+    for job_id, _, _, error in checked:
+        results[job_id] = error if error is not None else next(outcomes)
+    
+    failed = sum(1 for result in results.values() if not result['success'])
+    
+    return {
+        'success': True,
+        'message': f'Analyzed {len(results)} jobs ({failed} failed)',
+        'total_jobs': len(results),
+        'results': results,
+        'error': None
+    }
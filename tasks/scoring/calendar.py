@@ -0,0 +1,142 @@
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+
+DEFAULT_WEEKMASK = '1111100'
+
+# Window covered by the precomputed table, relative to the compile date.
+# Dates outside it still work, through the slower arithmetic path.
+TABLE_DAYS_BEFORE = 2 * 366
+TABLE_DAYS_AFTER = 5 * 366
+
+
+def parse_weekmask(weekmask):
+    """
+    Validate a weekmask: 7 characters of '0'/'1', Monday first.
+
+    '1111100' is Monday-Friday; '1111001' is Sunday-Thursday.
+    """
+    if (not isinstance(weekmask, str) or len(weekmask) != 7
+            or set(weekmask) - {'0', '1'} or '1' not in weekmask):
+        raise ValueError(
+            "weekmask must be 7 characters of '0'/'1' (Monday first) with at least one working day"
+        )
+    return tuple(c == '1' for c in weekmask)
+
+
+class CompiledCalendar:
+    """
+    A working calendar (weekmask plus holidays) compiled for O(1) lookups.
+
+    At compile time every day in a window around today gets its running
+    business-day index (business days since 0001-01-01), stored in a flat
+    array keyed by date ordinal, so the business days between two dates is
+    one subtraction. Dates outside the window fall back to week arithmetic
+    plus a bisect over the sorted holiday ordinals.
+    """
+
+    def __init__(self, name, weekmask=DEFAULT_WEEKMASK, holidays=(), today=None):
+        self.name = name
+        self.weekmask = weekmask
+        self.working = parse_weekmask(weekmask)
+        self.week_total = sum(self.working)
+
+        # Holidays only matter when they fall on a working weekday
+        holiday_dates = {_as_date(h) for h in holidays}
+        self.holidays = sorted(
+            d.toordinal() for d in holiday_dates if self.working[d.weekday()]
+        )
+        holiday_set = set(self.holidays)
+        # Identifies the calendar's content, for cache keys and ETags
+        self.fingerprint = hashlib.sha256(
+            f'{weekmask}:{self.holidays}'.encode()
+        ).hexdigest()[:16]
+
+        today = today or date.today()
+        self.base = today.toordinal() - TABLE_DAYS_BEFORE
+        size = TABLE_DAYS_BEFORE + TABLE_DAYS_AFTER + 1
+
+        # index[k] = business days in [0001-01-01, base + k]
+        self.index = array('l')
+        running = self._count_through(self.base - 1)
+        weekday = date.fromordinal(self.base).weekday()
+        for k in range(size):
+            if self.working[weekday] and (self.base + k) not in holiday_set:
+                running += 1
+            self.index.append(running)
+            weekday = (weekday + 1) % 7
+
+    def _in_table(self, ordinal):
+        return 0 <= ordinal - self.base < len(self.index)
+
+    def _count_through(self, ordinal):
+        """Business days in [0001-01-01, ordinal]."""
+        if self._in_table(ordinal):
+            return self.index[ordinal - self.base]
+
+        # Ordinal 1 (0001-01-01) is a Monday, so weekdays line up with the mask
+        weeks, extra = divmod(ordinal, 7)
+        count = weeks * self.week_total + sum(self.working[:extra])
+        return count - bisect_right(self.holidays, ordinal)
+
+    def business_days_between(self, start, end):
+        """Business days in (start, end]; 0 when end <= start."""
+        if end <= start:
+            return 0
+        return self._count_through(end.toordinal()) - self._count_through(start.toordinal())
+
+    def is_business_day(self, day):
+        ordinal = day.toordinal()
+        return (self.working[day.weekday()]
+                and bisect_left(self.holidays, ordinal) == bisect_right(self.holidays, ordinal))
+
+    def add_business_days(self, start, n):
+        """
+        The n-th business day after start (n >= 1), or the first business
+        day on or after start when n == 0.
+        """
+        if n == 0:
+            day = start
+            while not self.is_business_day(day):
+                day += timedelta(days=1)
+            return day
+
+        ordinal = start.toordinal()
+        if self._in_table(ordinal):
+            target = self.index[ordinal - self.base] + n
+            k = bisect_left(self.index, target, ordinal - self.base)
+            if k < len(self.index):
+                return date.fromordinal(self.base + k)
+
+        day = start
+        while n > 0:
+            day += timedelta(days=1)
+            if self.is_business_day(day):
+                n -= 1
+        return day
+
+    def last_day_within(self, start, n):
+        """Latest date d with business_days_between(start, d) <= n."""
+        return self.add_business_days(start, n + 1) - timedelta(days=1)
+
+    def __repr__(self):
+        return f'<CompiledCalendar {self.name} {self.weekmask} holidays={len(self.holidays)}>'
+
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+_default_calendar = None
+
+
+def default_calendar():
+    """Monday-Friday, no holidays. Compiled on first use."""
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = CompiledCalendar('default')
+    return _default_calendar
@@ -1,11 +1,23 @@
-from datetime import date, timedelta
+from datetime import date
 
-def calculate_urgency(due_date, today=None):
+from . import tables
+from .calendar import default_calendar
+
+POINTS_PER_BLOCKED_TASK = 20
+POINTS_PER_CRITICAL_HOUR = 5
+MAX_DEPENDENCY_POINTS = 100
+
+# Blocked-task counts above this no longer change the dependency score
+BLOCKED_COUNT_SATURATION = -(-MAX_DEPENDENCY_POINTS // POINTS_PER_BLOCKED_TASK)
+
+
+def calculate_urgency(due_date, today=None, calendar=None):
     """
     Calculate urgency score (0-100) based on business days until due.
-    Weekends are excluded from the count.
+    Non-working days of the calendar (default: weekends) and its holidays
+    are excluded from the count.
     
-    Scoring:
+    Scoring (default urgency table, see tables.py):
     - Overdue (past) or TODAY: +100
     - 1-3 business days: +50
     - 4-7 business days: +25
@@ -15,57 +27,44 @@ def calculate_urgency(due_date, today=None):
     if today is None:
         today = date.today()
     
-    # Calculate business days between today and due_date
-    business_days = 0
-    current = today
-    
     # If overdue or today, return max urgency
     if due_date <= today:
-        return 100
+        return tables.active().overdue_urgency
     
-    # Count business days (Monday=0, Sunday=6)
-    while current < due_date:
-        current += timedelta(days=1)
-        # Monday to Friday are business days (0-4)
-        if current.weekday() < 5:
-            business_days += 1
+    if calendar is None:
+        calendar = default_calendar()
     
-    # Score based on business days
-    if business_days <= 3:
-        return 50
-    elif business_days <= 7:
-        return 25
-    elif business_days <= 14:
-        return 10
-    else:
-        return 0
+    # O(1) lookup in the calendar's compiled business-day table
+    business_days = calendar.business_days_between(today, due_date)
+    
+    # Score based on business days (array-indexed bucket table)
+    return tables.active().urgency(business_days)
 
 
 def calculate_importance(importance_rating):
     """Scale importance (1-10) to score (10-100). Default 5 if missing."""
+    table = tables.active()
     if importance_rating is None:
-        importance_rating = 5
+        importance_rating = table.default_importance
     
-    importance_rating = max(1, min(10, int(importance_rating)))
-    return importance_rating * 10
+    # Ratings outside the table are clamped to its ends
+    return table.importance(int(importance_rating))
 
 
-def calculate_effort(estimated_hours):
-    """Calculate effort bonus/penalty. Quick=+15, medium=+5, long=-5."""
+def normalize_hours(estimated_hours):
+    """Convert estimated_hours to float. Default 2 if missing or invalid."""
     if estimated_hours is None:
-        estimated_hours = 2
+        return tables.active().default_hours
     
     try:
-        estimated_hours = float(estimated_hours)
+        return float(estimated_hours)
     except (ValueError, TypeError):
-        estimated_hours = 2
-    
-    if estimated_hours < 1.5:
-        return 15
-    elif estimated_hours <= 3:
-        return 5
-    else:
-        return -5
+        return tables.active().default_hours
+
+
+def calculate_effort(estimated_hours):
+    """Calculate effort bonus/penalty. Quick=+15, medium=+5, long=-5."""
+    return tables.active().effort(normalize_hours(estimated_hours))
 
 
 def calculate_dependencies(blocked_count):
@@ -85,4 +84,21 @@ def calculate_dependencies(blocked_count):
     blocked_count = int(blocked_count)
     
     # 20 points per blocked task, max 100
-    return min(blocked_count * 20, 100)
+    return min(blocked_count * POINTS_PER_BLOCKED_TASK, MAX_DEPENDENCY_POINTS)
+
+
+def calculate_critical_path(downstream_hours):
+    """
+    Calculate dependency bonus from the critical path behind a task.
+    
+    Args:
+        downstream_hours: Estimated hours on the longest chain of tasks
+            waiting on this one (excluding the task itself)
+    
+    Returns:
+        int: Dependency score (0-100 points, 5 per downstream hour)
+    """
+    if not downstream_hours or downstream_hours < 0:
+        return 0
+    
+    return min(int(round(downstream_hours * POINTS_PER_CRITICAL_HOUR)), MAX_DEPENDENCY_POINTS)
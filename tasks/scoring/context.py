@@ -0,0 +1,41 @@
+from datetime import date
+
+from .calendar import default_calendar
+from .components import calculate_urgency
+from .validators import parse_date
+
+
+class AnalysisContext:
+    """
+    Per-request analysis settings, computed once and threaded through the
+    scoring pipeline.
+
+    Attributes:
+        as_of: the day urgency is measured from, and the fallback for
+            missing or invalid due dates (default: today, read once)
+        calendar: CompiledCalendar used to count business days
+
+    Every task in one analysis is scored against the same day, even if the
+    request runs across midnight, and the same inputs always give the same
+    result, which makes (payload, strategy, cache_key) a stable cache key.
+    """
+
+    __slots__ = ('as_of', 'calendar')
+
+    def __init__(self, as_of=None, calendar=None):
+        self.as_of = as_of or date.today()
+        self.calendar = calendar or default_calendar()
+
+    def due_date(self, value):
+        """Parse a task's due_date; missing or invalid dates become as_of."""
+        return parse_date(value, default=self.as_of)
+
+    def urgency(self, due_date):
+        return calculate_urgency(due_date, today=self.as_of, calendar=self.calendar)
+
+    @property
+    def cache_key(self):
+        return f'{self.as_of.isoformat()}:{self.calendar.name}:{self.calendar.fingerprint}'
+
+    def __repr__(self):
+        return f'<AnalysisContext as_of={self.as_of} calendar={self.calendar.name}>'
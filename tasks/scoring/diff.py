@@ -0,0 +1,214 @@
+"""
+Ranking diffs: what moved between two analyses of the same tasks, two
+days, two strategies or two snapshots of a task list.
+
+Neither side builds result dicts. Each becomes two arrays over its task
+list, the score of each task (the components and weights score_tasks()
+uses, without explanations or result fields) and its rank from one sort
+of the indices; when both sides rank one snapshot, only the component
+they disagree on (urgency for two days, dependency points for two modes,
+none for two strategies) is computed twice. diff_rankings() then matches the sides
+by id: when both share one snapshot the indices already match, otherwise
+through an id -> index map of the "to" side. One pass over the "from"
+side and one over the ids only the "to" side has produce the diff, and a
+dict is built only for each reported change.
+"""
+from .analyzer import assign_default_ids, assign_priority_level
+from .components import calculate_effort, calculate_importance
+from .context import AnalysisContext
+from .graph import DependencyGraph, score_dependencies
+from .identity import TaskIndex
+from .strategies import apply_weights
+from .validators import detect_circular_dependencies
+
+# Largest min_rank_change / min_score_change a request may set
+MAX_CHANGE_THRESHOLD = 1000000
+
+
+def _columns(tasks, dependency_mode, context, graph=None, reuse=None):
+    """
+    Urgency, importance, effort and dependency points of every task, as
+    four lists. `graph` is the tasks' DependencyGraph, if built. `reuse`
+    is (columns, dependency_mode, context) already computed for the same
+    tasks list: the columns that cannot differ are shared instead of
+    recomputed.
+    """
+    if reuse is None:
+        importance = [calculate_importance(task.get('importance', 5)) for task in tasks]
+        effort = [calculate_effort(task.get('estimated_hours', 2)) for task in tasks]
+    else:
+        columns, reuse_mode, reuse_context = reuse
+        importance, effort = columns[1], columns[2]
+
+    if reuse is not None and reuse_context.cache_key == context.cache_key:
+        urgency = columns[0]
+    else:
+        due_date = context.due_date
+        urgency = [context.urgency(due_date(task.get('due_date'))) for task in tasks]
+
+    if reuse is not None and reuse_mode == dependency_mode:
+        dependencies = columns[3]
+    else:
+        dependencies = score_dependencies(tasks, dependency_mode, graph)
+
+    return urgency, importance, effort, dependencies
+
+
+def _rank(columns, strategy):
+    scores = [
+        apply_weights(urgency, importance, effort, dependencies, strategy)
+        for urgency, importance, effort, dependencies in zip(*columns)
+    ]
+    ranks = [0] * len(scores)
+    for rank, i in enumerate(sorted(range(len(scores)), key=scores.__getitem__, reverse=True), 1):
+        ranks[i] = rank
+    return scores, ranks
+
+
+def rank_scores(tasks, strategy='smart_balance', dependency_mode='direct', context=None):
+    """
+    (scores, ranks) of validated tasks: per input index, the score and the
+    1-based rank analyze_tasks() gives it (ties keep input order). Assigns
+    missing ids in place.
+    """
+    assign_default_ids(tasks)
+    return _rank(_columns(tasks, dependency_mode, context or AnalysisContext()), strategy)
+
+
+def _failure(message, error):
+    return {
+        'success': False,
+        'message': message,
+        'changes': [],
+        'added': [],
+        'removed': [],
+        'error': error
+    }
+
+
+def _snapshot_error(tasks, index):
+    """Failure result if tasks cannot be matched by id or ranked, else None."""
+    if index.duplicate_ids:
+        duplicates = ', '.join(str(task_id) for task_id in index.duplicate_ids)
+        return _failure('Duplicate task id',
+                        f'Task ids must be unique to compare rankings: {duplicates}')
+
+    has_cycles, cycle_message = detect_circular_dependencies(tasks, index)
+    if has_cycles:
+        return _failure('Circular dependency detected', cycle_message)
+    return None
+
+
+def _entry(task, score, rank):
+    return {
+        'id': task['id'],
+        'title': task.get('title', 'Untitled'),
+        'rank': rank,
+        'priority_score': score,
+        'priority_level': assign_priority_level(score),
+    }
+
+
+def diff_rankings(before, after, min_rank_change=1, min_score_change=1):
+    """
+    Compare two rankings. `before` and `after` are dicts of validated
+    tasks, strategy, dependency_mode and context (an AnalysisContext);
+    pass the same tasks list to both to compare one snapshot.
+
+    A task is reported when its rank moves by at least min_rank_change,
+    its score by at least min_score_change, or its priority level changes.
+
+    Returns:
+    {
+        'success': True,
+        'message': '2 of 40 tasks changed',
+        'changes': [               (by rank in `after`)
+            {'id': 7, 'title': '...', 'from_rank': 5, 'to_rank': 2, 'rank_change': 3,
+             'from_score': 120, 'to_score': 165, 'score_change': 45,
+             'from_level': 'MEDIUM', 'to_level': 'HIGH'},
+            ...
+        ],
+        'added': [{'id': 9, 'title': '...', 'rank': 4, 'priority_score': 130,
+                   'priority_level': 'HIGH'}, ...],     (only in `after`)
+        'removed': [...],                               (only in `before`)
+        'unchanged': 37,
+        'error': None
+    }
+    """
+    before_tasks, after_tasks = before['tasks'], after['tasks']
+    same_snapshot = before_tasks is after_tasks
+    graphs = []
+    for tasks in (before_tasks,) if same_snapshot else (before_tasks, after_tasks):
+        assign_default_ids(tasks)
+        index = TaskIndex(tasks)
+        failure = _snapshot_error(tasks, index)
+        if failure:
+            return failure
+        graphs.append(DependencyGraph(tasks, index))
+
+    columns = _columns(before_tasks, before['dependency_mode'], before['context'], graphs[0])
+    before_scores, before_ranks = _rank(columns, before['strategy'])
+    if same_snapshot:
+        # One task list: only the columns the sides disagree on are recomputed
+        reuse = (columns, before['dependency_mode'], before['context'])
+        columns = _columns(after_tasks, after['dependency_mode'], after['context'], graphs[0], reuse)
+    else:
+        columns = _columns(after_tasks, after['dependency_mode'], after['context'], graphs[1])
+    after_scores, after_ranks = _rank(columns, after['strategy'])
+
+    if same_snapshot:
+        after_index = None
+    else:
+        after_index = {task['id']: i for i, task in enumerate(after_tasks)}
+
+    changes = []
+    removed = []
+    matched = 0
+    for i, task in enumerate(before_tasks):
+        j = i if after_index is None else after_index.get(task['id'])
+        if j is None:
+            removed.append(_entry(task, before_scores[i], before_ranks[i]))
+            continue
+        matched += 1
+
+        from_rank, to_rank = before_ranks[i], after_ranks[j]
+        from_score, to_score = before_scores[i], after_scores[j]
+        from_level = assign_priority_level(from_score)
+        to_level = from_level if to_score == from_score else assign_priority_level(to_score)
+        if (abs(from_rank - to_rank) >= min_rank_change
+                or abs(to_score - from_score) >= min_score_change
+                or from_level != to_level):
+            changes.append({
+                'id': task['id'],
+                'title': after_tasks[j].get('title', 'Untitled'),
+                'from_rank': from_rank,
+                'to_rank': to_rank,
+                'rank_change': from_rank - to_rank,
+                'from_score': from_score,
+                'to_score': to_score,
+                'score_change': to_score - from_score,
+                'from_level': from_level,
+                'to_level': to_level,
+            })
+
+    added = []
+    if after_index is not None and matched < len(after_tasks):
+        before_ids = {task['id'] for task in before_tasks}
+        added = [
+            _entry(task, after_scores[j], after_ranks[j])
+            for j, task in enumerate(after_tasks) if task['id'] not in before_ids
+        ]
+
+    changes.sort(key=lambda change: change['to_rank'])
+    added.sort(key=lambda entry: entry['rank'])
+    removed.sort(key=lambda entry: entry['rank'])
+
+    return {
+        'success': True,
+        'message': f'{len(changes)} of {matched} tasks changed',
+        'changes': changes,
+        'added': added,
+        'removed': removed,
+        'unchanged': matched - len(changes),
+        'error': None
+    }
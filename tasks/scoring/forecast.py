@@ -0,0 +1,265 @@
+"""
+Priority forecasts: how a ranking evolves over the coming days.
+
+Only urgency depends on the day, and it changes only when a task's
+business days left drop to an urgency bucket boundary (the max_days of
+the urgency table) or the task falls due. forecast_tasks() scores the
+tasks once, computes each task's change points from the calendar, and
+sweeps the day range with a queue of them: an event re-scores one task
+and, if it now makes the top, moves it into the day's top entries. A
+30-day forecast costs about one analysis plus one update per change
+point, instead of 30 analyses.
+
+Every day's ranking is what analyze_tasks() returns with as_of set to
+that day (ties keep input order), recurring occurrences included: an
+occurrence joins the ranking on the first day its due date is within
+its template's horizon and leaves it the day after it falls due, both
+queued as events like the change points.
+"""
+import heapq
+from bisect import insort
+from datetime import timedelta
+
+from . import tables
+from .analyzer import assign_priority_level, score_tasks
+from .components import calculate_urgency
+from .context import AnalysisContext
+from .graph import DependencyGraph
+from .identity import TaskIndex
+from .recurrence import DEFAULT_HORIZON, occurrence, occurrence_dates
+from .strategies import apply_weights
+from .validators import detect_circular_dependencies
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+
+def change_points(due_date, start, end, calendar, thresholds):
+    """
+    Days in (start, end] on which the urgency of a task due on due_date
+    can change: when its business days left drop to one of `thresholds`,
+    and the day it falls due.
+    """
+    if due_date <= start:
+        return []
+
+    days_left = calendar.business_days_between(start, due_date)
+    points = []
+    for max_days in thresholds:
+        if max_days < days_left:
+            # The (days_left - max_days)-th business day leaves max_days
+            day = calendar.add_business_days(start, days_left - max_days)
+            if day < due_date and day <= end:
+                points.append(day)
+    if due_date <= end:
+        points.append(due_date)
+    return points
+
+
+def _entry(result, score, urgency):
+    return {
+        'id': result['id'],
+        'title': result['title'],
+        'priority_score': score,
+        'priority_level': assign_priority_level(score),
+        'urgency': urgency,
+    }
+
+
+def _point(day, score, urgency):
+    return {
+        'date': str(day),
+        'priority_score': score,
+        'priority_level': assign_priority_level(score),
+        'urgency': urgency,
+    }
+
+
+def forecast_tasks(tasks, strategy='smart_balance', dependency_mode='direct', context=None,
+                   days=DEFAULT_DAYS, top=DEFAULT_TOP, trajectory=False, recurring=()):
+    """
+    Rank validated tasks (see payload.validate_tasks) and the occurrences
+    of validated recurring templates on each of `days` days from
+    context.as_of.
+
+    Returns:
+    {
+        'success': True,
+        'message': 'Forecast 30 days for 5 tasks',
+        'forecast': [
+            {'date': '2025-11-28', 'changed': 0,
+             'top': [{'id': 1, 'title': '...', 'priority_score': 165,
+                      'priority_level': 'HIGH', 'urgency': 50}, ...]},
+            ...
+        ],
+        'trajectories': [          (only with trajectory=True)
+            {'id': 1, 'title': '...',
+             'points': [{'date': '2025-11-28', 'priority_score': 165,
+                         'priority_level': 'HIGH', 'urgency': 50}, ...]},
+            ...
+        ],
+        'error': None
+    }
+
+    `changed` counts the tasks whose score changed that day, and the
+    occurrences that joined or left the ranking. A trajectory lists a
+    task's score on its first day in the ranking and on every day it
+    changed.
+    """
+    context = context or AnalysisContext()
+    start = context.as_of
+    end = start + timedelta(days=days - 1)
+    # Occurrences seen from any day of the range, after the tasks, and
+    # the first day each is seen
+    shows_from = {}
+    if recurring:
+        tasks = list(tasks)
+        for template in recurring:
+            horizon = timedelta(days=template.get('horizon', DEFAULT_HORIZON))
+            for due_date in occurrence_dates(template, start, end + horizon):
+                shows_from[len(tasks)] = due_date - horizon
+                tasks.append(occurrence(template, due_date))
+    if not tasks:
+        return {'success': True, 'message': 'No tasks provided', 'forecast': [], 'error': None}
+
+    index = TaskIndex(tasks)
+    has_cycles, cycle_message = detect_circular_dependencies(tasks, index)
+    if has_cycles:
+        return {
+            'success': False,
+            'message': 'Circular dependency detected',
+            'forecast': [],
+            'error': cycle_message
+        }
+
+    calendar = context.calendar
+    thresholds = sorted(set(tables.active().source['urgency']['max_days']))
+
+    results = [
+        result for _, result in score_tasks(
+            tasks, strategy, dependency_mode, DependencyGraph(tasks, index), context=context
+        )
+    ]
+    scores = [result['priority_score'] for result in results]
+    urgencies = [result['urgency'] for result in results]
+
+    # Event queue: the tasks to re-score on each day of the range, and
+    # the occurrences joining (i) or leaving (~i) the ranking
+    events = [[] for _ in range(days)]
+    moves = [[] for _ in range(days)]
+    due_dates = []
+    active = [True] * len(tasks)
+    for i, task in enumerate(tasks):
+        due_date = context.due_date(task.get('due_date'))
+        due_dates.append(due_date)
+        for day in change_points(due_date, start, end, calendar, thresholds):
+            events[(day - start).days].append(i)
+    for i, day in shows_from.items():
+        if day > start:
+            active[i] = False
+            moves[(day - start).days].append(i)
+        if due_dates[i] < end:
+            moves[(due_dates[i] - start).days + 1].append(~i)
+
+    # The top entries as sorted (-score, index) keys. Urgency never falls
+    # as days pass with the default tables, so scores only rise and the
+    # k-th best key only improves: a task outside the top can only enter
+    # on a day it is re-scored or joins. A table where urgency falls again
+    # (and so a score drops) gets the top rebuilt that day, as does an
+    # occurrence leaving the top.
+    def top_keys():
+        return heapq.nsmallest(
+            top, ((-score, i) for i, score in enumerate(scores) if active[i])
+        )
+
+    def rise(i, key, old_key=None):
+        if i in in_best:
+            best.remove(old_key)
+            insort(best, key)
+        elif len(best) < top or key < best[-1]:
+            insort(best, key)
+            in_best.add(i)
+            if len(best) > top:
+                in_best.discard(best.pop()[1])
+
+    best = top_keys()
+    in_best = {i for _, i in best}
+
+    points = None
+    if trajectory:
+        points = [
+            [_point(start, score, urgency)] if shown else []
+            for score, urgency, shown in zip(scores, urgencies, active)
+        ]
+    forecast = []
+    for offset, due_today in enumerate(events):
+        day = start + timedelta(days=offset)
+        changed = 0
+        rebuild = False
+        for move in moves[offset]:
+            changed += 1
+            if move < 0:
+                i = ~move
+                active[i] = False
+                rebuild = rebuild or i in in_best
+                continue
+            i = move
+            active[i] = True
+            urgency = urgencies[i] = calculate_urgency(due_dates[i], today=day, calendar=calendar)
+            result = results[i]
+            score = scores[i] = apply_weights(
+                urgency, result['importance_score'], result['effort'],
+                result['dependencies_count'], strategy
+            )
+            if trajectory:
+                points[i].append(_point(day, score, urgency))
+            if not rebuild:
+                rise(i, (-score, i))
+
+        for i in due_today:
+            if not active[i]:
+                continue
+            urgency = calculate_urgency(due_dates[i], today=day, calendar=calendar)
+            if urgency == urgencies[i]:
+                continue
+            result = results[i]
+            score = apply_weights(
+                urgency, result['importance_score'], result['effort'],
+                result['dependencies_count'], strategy
+            )
+            old_score = scores[i]
+            scores[i] = score
+            urgencies[i] = urgency
+            changed += 1
+            if trajectory:
+                points[i].append(_point(day, score, urgency))
+
+            if score < old_score:
+                rebuild = True
+            elif not rebuild and score != old_score:
+                rise(i, (-score, i), (-old_score, i))
+
+        if rebuild:
+            best = top_keys()
+            in_best = {i for _, i in best}
+
+        forecast.append({
+            'date': str(day),
+            'changed': changed,
+            'top': [_entry(results[i], scores[i], urgencies[i]) for _, i in best],
+        })
+
+    forecast_result = {
+        'success': True,
+        'message': f'Forecast {days} days for {len(tasks)} tasks',
+        'forecast': forecast,
+        'error': None
+    }
+    if trajectory:
+        forecast_result['trajectories'] = [
+            {'id': result['id'], 'title': result['title'], 'points': task_points}
+            for result, task_points in zip(results, points)
+        ]
+    return forecast_result
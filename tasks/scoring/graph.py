@@ -0,0 +1,135 @@
+from collections import deque
+
+from .components import (
+    BLOCKED_COUNT_SATURATION, calculate_critical_path, calculate_dependencies,
+    normalize_hours
+)
+from .identity import TaskIndex
+
+
+def task_key(task):
+    """A task's id, or its title when it has none."""
+    task_id = task.get('id')
+    return task.get('title') if task_id is None else task_id
+
+
+class DependencyGraph:
+    """
+    Dependency graph over a task list, built from its TaskIndex (see
+    identity.py): one node per distinct id, edges from the resolved
+    dependency references.
+
+    Attributes:
+        index: the TaskIndex
+        node_of: node index for each task (None for non-dict entries)
+        dependents: for each node, the task indices that depend on it
+        hours: estimated hours of each node (first task with that id)
+    """
+
+    def __init__(self, tasks, index=None):
+        self.index = index = index or TaskIndex(tasks)
+        self.node_of = index.node_of
+        self.dependents = [[] for _ in index.ids]
+        self.hours = [normalize_hours(tasks[i].get('estimated_hours', 2)) for i in index.task_of]
+
+        dependents = self.dependents
+        for i, deps in enumerate(index.dependencies):
+            for node in deps:
+                dependents[node].append(i)
+
+    def topological_order(self):
+        """
+        Kahn's algorithm over blocker -> dependent edges: every node comes
+        before the nodes waiting on it. Nodes on a cycle are left out.
+        """
+        indegree = [0] * len(self.dependents)
+        for waiting in self.dependents:
+            for i in waiting:
+                indegree[self.node_of[i]] += 1
+
+        queue = deque(node for node, d in enumerate(indegree) if d == 0)
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for i in self.dependents[node]:
+                child = self.node_of[i]
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+
+        return order
+
+    def direct_counts(self):
+        """Number of tasks directly waiting on each node."""
+        return [len(waiting) for waiting in self.dependents]
+
+    def transitive_counts(self, cap=BLOCKED_COUNT_SATURATION):
+        """
+        Number of distinct nodes transitively waiting on each node, capped.
+
+        One pass in reverse topological order. Each node keeps at most `cap`
+        descendant ids, so the unions stay O(cap) and the pass is O(V + E)
+        while counts below the cap stay exact (diamonds are not double
+        counted).
+        """
+        descendants = [()] * len(self.dependents)
+
+        for node in reversed(self.topological_order()):
+            found = set()
+            for i in self.dependents[node]:
+                child = self.node_of[i]
+                found.add(child)
+                if len(found) >= cap:
+                    break
+                for grandchild in descendants[child]:
+                    found.add(grandchild)
+                    if len(found) >= cap:
+                        break
+                if len(found) >= cap:
+                    break
+            descendants[node] = tuple(found)
+
+        return [len(found) for found in descendants]
+
+    def downstream_hours(self):
+        """
+        Estimated hours on the longest chain waiting on each node (the node
+        itself excluded), by DP in reverse topological order: O(V + E).
+        """
+        chain = [0.0] * len(self.dependents)
+        downstream = [0.0] * len(self.dependents)
+
+        for node in reversed(self.topological_order()):
+            longest = 0.0
+            for i in self.dependents[node]:
+                longest = max(longest, chain[self.node_of[i]])
+            downstream[node] = longest
+            chain[node] = self.hours[node] + longest
+
+        return downstream
+
+
+def score_dependencies(tasks, mode='direct', graph=None):
+    """
+    Dependency score for every task in the list, in input order.
+
+    Modes:
+    - direct: tasks waiting on this one (20 each, max 100)
+    - transitive: tasks waiting on this one directly or indirectly
+    - critical_path: hours on the longest chain waiting on this one
+
+    Non-dict entries get 0. `graph` may be a DependencyGraph already built
+    for the same list.
+    """
+    if graph is None:
+        graph = DependencyGraph(tasks)
+
+    if mode == 'critical_path':
+        node_scores = [calculate_critical_path(h) for h in graph.downstream_hours()]
+    elif mode == 'transitive':
+        node_scores = [calculate_dependencies(n) for n in graph.transitive_counts()]
+    else:
+        node_scores = [calculate_dependencies(n) for n in graph.direct_counts()]
+
+    return [0 if node is None else node_scores[node] for node in graph.node_of]
@@ -0,0 +1,210 @@
+"""
+Task identity: which task each dependency reference points at.
+
+TaskIndex resolves a task list once, in linear time. Every task gets a
+dense integer node (tasks sharing an id share one node), and every
+dependency reference is looked up in hash indexes, in this order:
+
+1. ids (a missing id is the task's position, as assign_default_ids()
+   gives it; id 0 is an id like any other)
+2. external_id, an optional key a task carries from another system
+3. titles
+
+The external_id and title indexes are only built once a reference
+misses the ids. A reference that matches nothing is dangling, and one
+that matches an external_id or title several tasks share is ambiguous.
+Neither becomes a dependency edge; both are listed by report(), along
+with ids used by more than one task. Everything downstream (DependencyGraph, the cycle
+check) works on the node arrays and never resolves a reference again.
+"""
+
+# Problems listed per kind by report(); the counts include the rest
+REPORT_LIMIT = 100
+
+# Value of a secondary key (external_id or title) several nodes share
+_AMBIGUOUS = -1
+
+
+def _add_key(keys, shared, key, node):
+    """Index a secondary key; remember every node of a key that is not unique."""
+    if key is None:
+        return
+    try:
+        known = keys.setdefault(key, node)
+    except TypeError:
+        return
+    if known != node:
+        nodes = shared.setdefault(key, [] if known == _AMBIGUOUS else [known])
+        if node not in nodes:
+            nodes.append(node)
+        keys[key] = _AMBIGUOUS
+
+
+class TaskIndex:
+    """
+    Resolved identities and dependency references of a task list.
+
+    Attributes:
+        node_of: node of each task (None for non-dict entries)
+        ids: id of each node
+        task_of: index of the first task of each node
+        dependencies: resolved dependency nodes of each task, without
+            repeats (empty for non-dict entries)
+        dangling: (task index, reference) of references matching no task
+        ambiguous: (task index, reference, matching nodes) of references
+            to an external_id or title shared by several tasks
+        duplicate_ids: {id: [task indices]} of ids used by several tasks
+    """
+
+    def __init__(self, tasks):
+        node_of = self.node_of = []
+        ids = self.ids = []
+        task_of = self.task_of = []
+        dependencies = self.dependencies = []
+        self.dangling = []
+        self.ambiguous = []
+        self.duplicate_ids = {}
+        self._tasks = tasks
+        self._secondary = None
+
+        by_id = {}
+        for i, task in enumerate(tasks):
+            if type(task) is not dict:
+                node_of.append(None)
+                continue
+            task_id = task.get('id', i)
+            node = len(ids)
+            try:
+                known = by_id.setdefault(task_id, node)
+            except TypeError:
+                # Unhashable id: a node nothing can reference
+                known = node
+                task_id = None
+            if known == node:
+                ids.append(task_id)
+                task_of.append(i)
+            else:
+                self.duplicate_ids.setdefault(task_id, [task_of[known]]).append(i)
+            node_of.append(known)
+
+        get_id = by_id.get
+        for i, task in enumerate(tasks):
+            deps = task.get('dependencies') if type(task) is dict else None
+            if not deps or type(deps) is not list:
+                dependencies.append(())
+                continue
+            try:
+                resolved = list(map(get_id, deps))
+            except TypeError:
+                resolved = [None]
+            if None in resolved:
+                resolved = self._resolve(i, deps, get_id)
+            elif len(resolved) > 1 and len(set(resolved)) < len(resolved):
+                resolved = list(dict.fromkeys(resolved))
+            dependencies.append(resolved)
+
+    def _resolve(self, i, deps, get_id):
+        """Resolve the references of task i one by one, recording the misses."""
+        resolved = []
+        for dep in deps:
+            try:
+                node = get_id(dep)
+                if node is None:
+                    field, node = self._lookup(dep)
+            except TypeError:
+                continue
+            if node is None:
+                self.dangling.append((i, dep))
+            elif node == _AMBIGUOUS:
+                self.ambiguous.append((i, dep, self._secondary[field][1][dep]))
+            elif node not in resolved:
+                resolved.append(node)
+        return resolved
+
+    def _lookup(self, reference):
+        """(field, node) of a reference by external_id, then title."""
+        if self._secondary is None:
+            # Built on the first reference that is not an id
+            self._secondary = {'external_id': ({}, {}), 'title': ({}, {})}
+            for field, (keys, shared) in self._secondary.items():
+                for i, task in enumerate(self._tasks):
+                    if type(task) is dict:
+                        _add_key(keys, shared, task.get(field), self.node_of[i])
+        for field, (keys, _) in self._secondary.items():
+            node = keys.get(reference)
+            if node is not None:
+                return field, node
+        return None, None
+
+    def node_dependencies(self):
+        """Dependency nodes of each node (the union over tasks sharing an id)."""
+        if not self.duplicate_ids:
+            return [self.dependencies[i] for i in self.task_of]
+        merged = [[] for _ in self.ids]
+        for i, deps in enumerate(self.dependencies):
+            node = self.node_of[i]
+            if node is not None:
+                merged[node].extend(dep for dep in deps if dep not in merged[node])
+        return merged
+
+    def cycle(self):
+        """Ids along one dependency cycle, ending where it started, or None."""
+        deps = self.node_dependencies()
+        # 0: not visited, 1: on the current path, 2: done
+        state = [0] * len(deps)
+
+        for root in range(len(deps)):
+            if state[root]:
+                continue
+            state[root] = 1
+            path = [root]
+            stack = [iter(deps[root])]
+            while stack:
+                for dep in stack[-1]:
+                    if state[dep] == 1:
+                        return [self.ids[node] for node in path[path.index(dep):]] + [self.ids[dep]]
+                    if state[dep] == 0:
+                        state[dep] = 1
+                        path.append(dep)
+                        stack.append(iter(deps[dep]))
+                        break
+                else:
+                    stack.pop()
+                    state[path.pop()] = 2
+        return None
+
+    def report(self, limit=REPORT_LIMIT):
+        """
+        Reference problems, for analysis responses (at most `limit` of
+        each kind are listed):
+
+        {
+            'dangling': [{'task': 3, 'dependency': 99}],
+            'ambiguous': [{'task': 4, 'dependency': 'Fix bug', 'matches': [1, 7]}],
+            'duplicate_ids': [{'id': 5, 'count': 2}],
+            'dangling_count': 1,
+            'ambiguous_count': 1,
+            'duplicate_id_count': 1
+        }
+        """
+        task_id = self.task_id
+        duplicates = list(self.duplicate_ids.items())
+        return {
+            'dangling': [
+                {'task': task_id(i), 'dependency': dep} for i, dep in self.dangling[:limit]
+            ],
+            'ambiguous': [
+                {'task': task_id(i), 'dependency': dep, 'matches': [self.ids[n] for n in nodes]}
+                for i, dep, nodes in self.ambiguous[:limit]
+            ],
+            'duplicate_ids': [
+                {'id': duplicate, 'count': len(indices)} for duplicate, indices in duplicates[:limit]
+            ],
+            'dangling_count': len(self.dangling),
+            'ambiguous_count': len(self.ambiguous),
+            'duplicate_id_count': len(duplicates),
+        }
+
+    def task_id(self, i):
+        """Id of the task at index i."""
+        return self.ids[self.node_of[i]]
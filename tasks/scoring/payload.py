@@ -0,0 +1,301 @@
+"""
+Single-pass validation of analysis request bodies.
+
+validate_analysis_request() checks the envelope (strategy, dependency
+mode, calendar, as_of, hours_per_day) and every task in one pass, and
+returns the request with its tasks normalized, or every problem found
+(up to MAX_ERRORS), each naming its field and task index:
+
+    {'index': 3, 'field': 'importance', 'error': 'importance must be a number from 1 to 10'}
+
+Normalized tasks are shallow copies of the input with an id (the task's
+position when missing), due_date parsed to a date, and dependencies a
+list. Missing title, importance and estimated_hours stay missing so the
+scoring defaults apply. Everything downstream of this check (analyzer,
+planner, graph) can trust the shape of its input.
+
+The optional "recurring" list holds recurring task templates (see
+recurrence.py), checked by validate_recurring(); their errors name the
+list: {'list': 'recurring', 'index': 0, 'field': 'frequency', ...}.
+"""
+import math
+import re
+
+from .recurrence import FREQUENCIES, MAX_HORIZON
+from .strategies import get_valid_dependency_modes, get_valid_strategies
+from .validators import _parse_date_string, parse_as_of
+
+# Errors reported per request; validation stops once this many are found
+MAX_ERRORS = 100
+
+IMPORTANCE_RANGE = (1, 10)
+
+# Smallest daily capacity a plan may be packed with
+MIN_HOURS_PER_DAY = 0.25
+
+
+def _compile_task_validator():
+    """
+    Build validate_tasks with every check and constant bound to a local
+    name, so the per-task loop does no attribute or global lookups.
+    """
+    parse = _parse_date_string
+    isfinite = math.isfinite
+    low, high = IMPORTANCE_RANGE
+    importance_error = f'importance must be a number from {low} to {high}'
+
+    def validate_tasks(tasks, max_errors=MAX_ERRORS, field='tasks'):
+        """
+        Check and normalize a task list. Returns (normalized, errors);
+        normalized is None when there are errors.
+        """
+        if type(tasks) is not list:
+            return None, [{'field': field, 'error': f'{field} must be a list'}]
+
+        normalized = []
+        append = normalized.append
+        errors = []
+
+        def fail(index, name, message):
+            errors.append({'index': index, 'field': name, 'error': message})
+            return len(errors) >= max_errors
+
+        for index, task in enumerate(tasks):
+            if type(task) is not dict:
+                if fail(index, None, 'task must be an object'):
+                    break
+                continue
+
+            task = dict(task)
+            get = task.get
+            ok = True
+
+            task_id = get('id')
+            if task_id is None:
+                task['id'] = index
+            elif not ((type(task_id) is int) or (type(task_id) is str and task_id)):
+                ok = False
+                if fail(index, 'id', 'id must be an integer or a non-empty string'):
+                    break
+
+            external_id = get('external_id')
+            if external_id is not None and not (
+                    (type(external_id) is int) or (type(external_id) is str and external_id)):
+                ok = False
+                if fail(index, 'external_id', 'external_id must be an integer or a non-empty string'):
+                    break
+
+            title = get('title')
+            if title is not None and type(title) is not str:
+                ok = False
+                if fail(index, 'title', 'title must be a string'):
+                    break
+
+            due_date = get('due_date')
+            if due_date is None or due_date == '':
+                task.pop('due_date', None)
+            elif type(due_date) is str:
+                try:
+                    task['due_date'] = parse(due_date)
+                except (ValueError, OverflowError):
+                    ok = False
+                    if fail(index, 'due_date', 'due_date is not a valid date'):
+                        break
+            elif not hasattr(due_date, 'isoformat'):
+                ok = False
+                if fail(index, 'due_date', 'due_date must be a date string'):
+                    break
+
+            importance = get('importance')
+            if importance is not None:
+                kind = type(importance)
+                if not ((kind is int or kind is float) and low <= importance <= high):
+                    ok = False
+                    if fail(index, 'importance', importance_error):
+                        break
+
+            hours = get('estimated_hours')
+            if hours is not None:
+                kind = type(hours)
+                if not ((kind is int or kind is float) and hours >= 0 and isfinite(hours)):
+                    ok = False
+                    if fail(index, 'estimated_hours',
+                            'estimated_hours must be a non-negative number'):
+                        break
+
+            dependencies = get('dependencies')
+            if dependencies is None:
+                task['dependencies'] = []
+            elif type(dependencies) is not list:
+                ok = False
+                if fail(index, 'dependencies', 'dependencies must be a list'):
+                    break
+            else:
+                for dep in dependencies:
+                    if not ((type(dep) is int) or (type(dep) is str and dep)):
+                        ok = False
+                        fail(index, 'dependencies',
+                             'dependencies must be task ids (integers or strings)')
+                        break
+                if len(errors) >= max_errors:
+                    break
+
+            if ok:
+                append(task)
+
+        return (None, errors) if errors else (normalized, [])
+
+    return validate_tasks
+
+
+validate_tasks = _compile_task_validator()
+
+WEEKDAYS_PATTERN = re.compile(r'^[01]{7}$')
+
+
+def validate_recurring(templates, max_errors=MAX_ERRORS):
+    """
+    Check and normalize recurring task templates. Returns (normalized,
+    errors) like validate_tasks: shallow copies with an id (the
+    template's position when missing), starts_on and ends_on parsed to
+    dates, and interval and horizon set.
+    """
+    if type(templates) is not list:
+        return None, [{'field': 'recurring', 'error': 'recurring must be a list'}]
+
+    low, high = IMPORTANCE_RANGE
+    normalized = []
+    errors = []
+    for index, template in enumerate(templates):
+        if len(errors) >= max_errors:
+            break
+        if type(template) is not dict:
+            errors.append({'list': 'recurring', 'index': index, 'field': None,
+                           'error': 'template must be an object'})
+            continue
+
+        template = dict(template)
+        problems = []
+        template.setdefault('id', index)
+        template_id = template['id']
+        if not ((type(template_id) is int) or (type(template_id) is str and template_id)):
+            problems.append(('id', 'id must be an integer or a non-empty string'))
+
+        title = template.get('title')
+        if title is not None and type(title) is not str:
+            problems.append(('title', 'title must be a string'))
+
+        importance = template.get('importance')
+        if importance is not None and not (
+                type(importance) in (int, float) and low <= importance <= high):
+            problems.append(('importance', f'importance must be a number from {low} to {high}'))
+
+        hours = template.get('estimated_hours')
+        if hours is not None and not (
+                type(hours) in (int, float) and hours >= 0 and math.isfinite(hours)):
+            problems.append(('estimated_hours', 'estimated_hours must be a non-negative number'))
+
+        if template.get('frequency') not in FREQUENCIES:
+            problems.append(('frequency', f'frequency must be one of: {", ".join(FREQUENCIES)}'))
+
+        for field, default, lowest, highest in (('interval', 1, 1, 366),
+                                                ('horizon', None, 0, MAX_HORIZON)):
+            value = template.get(field, default)
+            if value is None:
+                template.pop(field, None)
+            elif type(value) is not int or not lowest <= value <= highest:
+                problems.append((field, f'{field} must be an integer from {lowest} to {highest}'))
+            else:
+                template[field] = value
+
+        weekdays = template.get('weekdays')
+        if weekdays is not None and not (
+                type(weekdays) is str and WEEKDAYS_PATTERN.match(weekdays) and '1' in weekdays):
+            problems.append(('weekdays', 'weekdays must be 7 characters of 0/1, Monday first'))
+
+        for field in ('starts_on', 'ends_on'):
+            value = template.get(field)
+            if value is None:
+                if field == 'starts_on':
+                    problems.append((field, 'starts_on is required'))
+                continue
+            if type(value) is str:
+                try:
+                    template[field] = _parse_date_string(value)
+                except (ValueError, OverflowError):
+                    problems.append((field, f'{field} is not a valid date'))
+            elif not hasattr(value, 'isoformat'):
+                problems.append((field, f'{field} must be a date string'))
+
+        for field, message in problems:
+            errors.append({'list': 'recurring', 'index': index, 'field': field, 'error': message})
+        if not problems:
+            normalized.append(template)
+
+    return (None, errors[:max_errors]) if errors else (normalized, [])
+
+
+def validate_analysis_request(data):
+    """
+    Validate an analysis request body.
+
+    Returns (request, errors). request holds tasks (normalized), recurring
+    (normalized templates, possibly empty), strategy, dependency_mode,
+    calendar (name or None), as_of (date or None) and hours_per_day (or
+    None); it is None when errors is not empty.
+    """
+    if not isinstance(data, dict):
+        return None, [{'field': None, 'error': 'Request body must be a JSON object'}]
+
+    errors = []
+    request = {
+        'strategy': data.get('strategy', 'smart_balance'),
+        'dependency_mode': data.get('dependency_mode', 'direct'),
+        'calendar': data.get('calendar'),
+        'hours_per_day': data.get('hours_per_day'),
+    }
+
+    valid_strategies = get_valid_strategies()
+    if request['strategy'] not in valid_strategies:
+        errors.append({'field': 'strategy',
+                       'error': f'Strategy must be one of: {", ".join(valid_strategies)}'})
+
+    valid_modes = get_valid_dependency_modes()
+    if request['dependency_mode'] not in valid_modes:
+        errors.append({'field': 'dependency_mode',
+                       'error': f'Dependency mode must be one of: {", ".join(valid_modes)}'})
+
+    if request['calendar'] is not None and not isinstance(request['calendar'], str):
+        errors.append({'field': 'calendar', 'error': 'calendar must be a string'})
+
+    request['as_of'], as_of_error = parse_as_of(data.get('as_of'))
+    if as_of_error:
+        errors.append({'field': 'as_of', 'error': as_of_error})
+
+    hours_per_day = request['hours_per_day']
+    if hours_per_day is not None and (
+            isinstance(hours_per_day, bool)
+            or not isinstance(hours_per_day, (int, float))
+            or not MIN_HOURS_PER_DAY <= hours_per_day < math.inf):
+        errors.append({'field': 'hours_per_day',
+                       'error': f'hours_per_day must be a number of at least {MIN_HOURS_PER_DAY}'})
+
+    request['tasks'], task_errors = validate_tasks(
+        data.get('tasks', []), max_errors=MAX_ERRORS - len(errors)
+    )
+    errors.extend(task_errors)
+
+    request['recurring'], recurring_errors = validate_recurring(
+        data.get('recurring', []), max_errors=MAX_ERRORS - len(errors)
+    )
+    errors.extend(recurring_errors)
+
+    return (None, errors) if errors else (request, [])
+
+
+def error_message(errors):
+    """One-line summary of validation errors, for the response's "error"."""
+    first = errors[0]
+    where = f'{first.get("list", "tasks")}[{first["index"]}]: ' if 'index' in first else ''
+    more = f' (and {len(errors) - 1} more)' if len(errors) > 1 else ''
+    return f'{where}{first["error"]}{more}'
@@ -0,0 +1,201 @@
+import heapq
+import math
+
+from .analyzer import assign_default_ids, score_tasks
+from .context import AnalysisContext
+from .components import normalize_hours
+from .graph import DependencyGraph
+from .identity import TaskIndex
+from .validators import detect_circular_dependencies
+
+# Most working days a packed plan may span
+MAX_PLAN_DAYS = 1000
+
+
+def order_by_priority(graph, scored):
+    """
+    Topological order of the scored tasks that always picks the
+    highest-scoring task whose dependencies are already done.
+
+    Kahn's algorithm with a heap keyed by (-priority_score, input index):
+    O((V + E) log V). Dependencies on tasks that are not in `scored` (not
+    dicts, failed to score, or unknown ids) count as already satisfied.
+
+    Args:
+        graph: DependencyGraph of the original task list
+        scored: list of (input_index, task_result) from score_tasks
+
+    Returns:
+        List of (input_index, task_result) in execution order
+    """
+    result_of = dict(scored)
+
+    tasks_of = [[] for _ in graph.dependents]
+    for i in result_of:
+        tasks_of[graph.node_of[i]].append(i)
+
+    waiting_on = dict.fromkeys(result_of, 0)
+    for node, waiting in enumerate(graph.dependents):
+        for i in waiting:
+            if i in waiting_on:
+                waiting_on[i] += len(tasks_of[node])
+
+    ready = [(-result_of[i]['priority_score'], i) for i, n in waiting_on.items() if n == 0]
+    heapq.heapify(ready)
+
+    order = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        order.append((i, result_of[i]))
+        for dependent in graph.dependents[graph.node_of[i]]:
+            if dependent not in waiting_on:
+                continue
+            waiting_on[dependent] -= 1
+            if waiting_on[dependent] == 0:
+                heapq.heappush(ready, (-result_of[dependent]['priority_score'], dependent))
+
+    return order
+
+
+def pack_into_days(plan, hours_per_day, context):
+    """
+    Assign each planned task a start and end day, in plan order.
+
+    A task that does not fit in what is left of the current day moves to
+    the next day; a task longer than a day starts on a fresh day and spans
+    as many days as it needs. Mutates the plan items and returns the
+    per-day summary. Day 1 is the first business day of the context's
+    calendar on or after its as_of date; later days skip non-working days.
+
+    Returns None instead if a task would end after MAX_PLAN_DAYS (checked
+    before its days are built) or a day would fall after year 9999.
+    """
+    days = []
+    day = 1
+    used = 0.0
+
+    for item in plan:
+        hours = max(normalize_hours(item['estimated_hours']), 0.0)
+
+        if used > 0 and used + hours > hours_per_day:
+            day += 1
+            used = 0.0
+
+        span = max(1, math.ceil(hours / hours_per_day))
+        item['start_day'] = day
+        item['end_day'] = day + span - 1
+        if item['end_day'] > MAX_PLAN_DAYS:
+            return None
+
+        while len(days) < item['end_day']:
+            days.append({'day': len(days) + 1, 'hours': 0.0, 'task_ids': []})
+
+        remaining = hours
+        for d in range(day, day + span):
+            chunk = min(remaining, hours_per_day)
+            days[d - 1]['hours'] += chunk
+            remaining -= chunk
+        days[day - 1]['task_ids'].append(item['id'])
+
+        if span > 1:
+            day += span
+            used = 0.0
+        else:
+            used += hours
+
+    calendar = context.calendar
+    try:
+        day_date = calendar.add_business_days(context.as_of, 0)
+        for i, summary in enumerate(days, 1):
+            summary['date'] = str(day_date)
+            if i < len(days):
+                day_date = calendar.add_business_days(day_date, 1)
+    except OverflowError:
+        # Runs past the last representable date
+        return None
+
+    return days
+
+
+def plan_tasks(tasks, strategy='smart_balance', hours_per_day=None, dependency_mode='direct',
+               context=None):
+    """
+    Build an execution order that never schedules a task before its
+    dependencies, preferring higher priority scores among ready tasks.
+
+    With hours_per_day, tasks are also packed into daily capacity buckets
+    dated by the working calendar.
+
+    Returns:
+    {
+        'success': True/False,
+        'message': 'Planned 5 tasks',
+        'plan': [
+            {'order': 1, 'id': 3, 'title': '...', 'priority_score': 165,
+             'priority_level': 'HIGH', 'estimated_hours': 2,
+             'start_day': 1, 'end_day': 1},
+            ...
+        ],
+        'days': [{'day': 1, 'date': '2025-12-01', 'hours': 7.5, 'task_ids': [3, 1]}, ...]
+                or None,
+        'error': None or error message
+    }
+    """
+    if not isinstance(tasks, list) or len(tasks) == 0:
+        return {
+            'success': isinstance(tasks, list),
+            'message': 'No tasks provided' if isinstance(tasks, list) else 'Invalid input',
+            'plan': [],
+            'days': None,
+            'error': None if isinstance(tasks, list) else 'tasks must be a list'
+        }
+
+    index = TaskIndex(tasks)
+    has_cycles, cycle_message = detect_circular_dependencies(tasks, index)
+    if has_cycles:
+        return {
+            'success': False,
+            'message': 'Circular dependency detected',
+            'plan': [],
+            'days': None,
+            'error': cycle_message
+        }
+
+    assign_default_ids(tasks)
+    graph = DependencyGraph(tasks, index)
+    context = context or AnalysisContext()
+    scored = score_tasks(tasks, strategy, dependency_mode, graph, context)
+
+    plan = [
+        {
+            'order': position,
+            'id': result['id'],
+            'title': result['title'],
+            'due_date': result['due_date'],
+            'priority_score': result['priority_score'],
+            'priority_level': result['priority_level'],
+            'estimated_hours': result['estimated_hours'],
+        }
+        for position, (_, result) in enumerate(order_by_priority(graph, scored), start=1)
+    ]
+
+    days = None
+    if hours_per_day:
+        days = pack_into_days(plan, hours_per_day, context)
+        if days is None:
+            return {
+                'success': False,
+                'message': 'Plan too long',
+                'plan': [],
+                'days': None,
+                'error': f'The plan would span more than {MAX_PLAN_DAYS} working days or run '
+                         f'past year 9999; raise hours_per_day or split the tasks'
+            }
+
+    return {
+        'success': True,
+        'message': f'Planned {len(plan)} tasks',
+        'plan': plan,
+        'days': days,
+        'error': None
+    }
@@ -0,0 +1,183 @@
+"""
+Recurring tasks: one template (a rule plus a horizon) instead of a row
+per occurrence.
+
+A template repeats daily or weekly from starts_on (every `interval` days
+or weeks, on the `weekdays` of a weekly rule) until ends_on, if set. An
+analysis as of a day only sees the occurrences due from that day to
+`horizon` days later: a daily chore with a horizon of 7 is eight tasks,
+however long it has been or will be repeating. Occurrences carry the
+template's title, importance and estimated hours, are due on their day
+and have the id "<template id>@<YYYY-MM-DD>". Templates have no
+dependencies and nothing depends on them, so an occurrence's score is its
+urgency plus points fixed per template.
+
+Everything here is a generator: occurrence_dates() computes the first
+date it needs and steps from there, expand() yields the occurrences of
+a window one at a time, and top_occurrences() reads every template's
+dates in order of an upper bound of their scores, and stops once no
+later occurrence can make the top. Templates are validated by
+payload.validate_recurring().
+"""
+import heapq
+from bisect import bisect_left
+from datetime import timedelta
+
+from . import tables
+from .components import calculate_effort, calculate_importance
+from .strategies import apply_weights
+
+FREQUENCIES = ('daily', 'weekly')
+
+# Days after the analysis day an occurrence may be due
+DEFAULT_HORIZON = 7
+MAX_HORIZON = 366
+
+ONE_WEEK = timedelta(days=7)
+
+
+def occurrence_dates(template, start, end=None):
+    """
+    Due dates of a template's occurrences from start to end (inclusive;
+    None for no end other than ends_on), in order.
+    """
+    starts_on, ends_on = template['starts_on'], template.get('ends_on')
+    if ends_on is not None and (end is None or ends_on < end):
+        end = ends_on
+    first = max(start, starts_on)
+    interval = template.get('interval') or 1
+
+    if template['frequency'] == 'daily':
+        step = timedelta(days=interval)
+        day = starts_on + step * -(-(first - starts_on).days // interval)
+        while end is None or day <= end:
+            yield day
+            day += step
+        return
+
+    weekdays = template.get('weekdays') or ''.join(
+        '1' if weekday == starts_on.weekday() else '0' for weekday in range(7)
+    )
+    anchor = starts_on - timedelta(days=starts_on.weekday())
+    week = (first - anchor).days // 7
+    # First week of the rule at or after `first`
+    week += -week % interval
+    monday = anchor + ONE_WEEK * week
+    step = ONE_WEEK * interval
+    while True:
+        for weekday, flag in enumerate(weekdays):
+            if flag != '1':
+                continue
+            day = monday + timedelta(days=weekday)
+            if end is not None and day > end:
+                return
+            if day >= first:
+                yield day
+        monday += step
+
+
+def occurrence(template, due_date):
+    """The task of a template due on due_date."""
+    task = {
+        'id': f'{template["id"]}@{due_date.isoformat()}',
+        'title': template.get('title', 'Untitled'),
+        'due_date': due_date,
+        'dependencies': [],
+    }
+    for field in ('importance', 'estimated_hours'):
+        if field in template:
+            task[field] = template[field]
+    return task
+
+
+def horizon_end(template, as_of):
+    """Last day an occurrence of the template is seen from as_of."""
+    return as_of + timedelta(days=template.get('horizon', DEFAULT_HORIZON))
+
+
+def expand(templates, as_of, until=None):
+    """
+    Occurrences of templates seen from as_of, template by template, each
+    in date order. With `until`, also those seen from any day up to it.
+    """
+    for template in templates:
+        end = horizon_end(template, until or as_of)
+        for due_date in occurrence_dates(template, as_of, end):
+            yield occurrence(template, due_date)
+
+
+def urgency_ceiling(context):
+    """
+    ceiling(due_date): the most urgency points of any due date on or
+    after due_date, from the urgency ranges of context (see
+    ScoreTables.urgency_buckets).
+    """
+    buckets = tables.active().urgency_buckets(context.as_of, context.calendar)
+    uppers = [upper for _, upper, _ in buckets[:-1]]
+    suffix = []
+    best = float('-inf')
+    for _, _, points in reversed(buckets):
+        best = max(best, points)
+        suffix.append(best)
+    suffix.reverse()
+
+    def ceiling(due_date):
+        return suffix[bisect_left(uppers, due_date)]
+
+    return ceiling
+
+
+def top_occurrences(templates, strategy, count, context, floor=None):
+    """
+    The best `count` occurrences seen from context.as_of, by (score desc,
+    template order, date). With `floor`, only occurrences scoring above
+    it. Occurrences are scored in order of an upper bound of their
+    score, and scoring stops once no remaining bound can enter.
+
+    Returns (entries, scored): entries are (score, occurrence, components)
+    best first, scored the number of occurrences scored.
+    """
+    ceiling = urgency_ceiling(context)
+    frontier = []
+    for position, template in enumerate(templates):
+        importance = calculate_importance(template.get('importance', 5))
+        effort = calculate_effort(template.get('estimated_hours', 2))
+        dates = occurrence_dates(template, context.as_of, horizon_end(template, context.as_of))
+        due_date = next(dates, None)
+        if due_date is not None:
+            bound = apply_weights(ceiling(due_date), importance, effort, 0, strategy)
+            frontier.append((-bound, position, due_date, dates, importance, effort))
+    heapq.heapify(frontier)
+
+    # Min-heap of the best `count` as (score, -position, -ordinal, ...)
+    best = []
+    scored = 0
+    while frontier and count > 0:
+        negative_bound, position, due_date, dates, importance, effort = heapq.heappop(frontier)
+        if floor is not None and -negative_bound <= floor:
+            break
+        if len(best) == count and -negative_bound < best[0][0]:
+            break
+
+        components = (context.urgency(due_date), importance, effort, 0)
+        score = apply_weights(*components, strategy)
+        scored += 1
+        if floor is None or score > floor:
+            entry = (score, -position, -due_date.toordinal(), templates[position], due_date,
+                     components)
+            if len(best) < count:
+                heapq.heappush(best, entry)
+            elif entry[:3] > best[0][:3]:
+                heapq.heapreplace(best, entry)
+
+        due_date = next(dates, None)
+        if due_date is not None:
+            bound = apply_weights(ceiling(due_date), importance, effort, 0, strategy)
+            heapq.heappush(frontier, (-bound, position, due_date, dates, importance, effort))
+
+    best.sort(key=lambda entry: entry[:3], reverse=True)
+    entries = [
+        (score, occurrence(template, due_date), components)
+        for score, _, _, template, due_date, components in best
+    ]
+    return entries, scored
@@ -1,3 +1,7 @@
+import copy
+import hashlib
+import json
+
 STRATEGIES = {
     'smart_balance': {
         'urgency': 1,
@@ -29,19 +33,72 @@ STRATEGIES = {
     }
 }
 
+DEPENDENCY_MODES = {
+    'direct': 'Tasks directly waiting on this one',
+    'transitive': 'All tasks waiting on this one, directly or indirectly',
+    'critical_path': 'Hours on the longest chain of tasks waiting on this one'
+}
+
+
+DEFAULT_STRATEGIES = copy.deepcopy(STRATEGIES)
+
+COMPONENTS = ('urgency', 'importance', 'effort', 'dependencies')
+
+# name -> (urgency, importance, effort, dependencies) weights, compiled
+# from STRATEGIES by configure_strategies()
+_weight_vectors = {}
+_fingerprint = ''
+
+
+def configure_strategies(overrides=None):
+    """
+    Compile STRATEGIES (defaults plus overrides, e.g. settings.TASKS_STRATEGIES)
+    into weight vectors. STRATEGIES is updated in place so every module
+    holding a reference sees the change.
+    
+    Raises ValueError, leaving the active strategies untouched, unless
+    every strategy has a non-negative number for each component (stored
+    suggestions rely on non-negative weights for their score bounds).
+    """
+    global _weight_vectors, _fingerprint
+    merged = copy.deepcopy(DEFAULT_STRATEGIES)
+    for name, strategy in (overrides or {}).items():
+        merged[name] = {**merged.get(name, {'description': ''}), **strategy}
+    
+    vectors = {}
+    for name, strategy in merged.items():
+        weights = tuple(strategy.get(component) for component in COMPONENTS)
+        if any(isinstance(w, bool) or not isinstance(w, (int, float)) or w < 0 for w in weights):
+            raise ValueError(f'strategy {name} needs a non-negative weight for each of {COMPONENTS}')
+        vectors[name] = weights
+    
+    STRATEGIES.clear()
+    STRATEGIES.update(merged)
+    _weight_vectors = vectors
+    _fingerprint = hashlib.sha256(json.dumps(vectors, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def strategy_weights(strategy):
+    """Compiled (urgency, importance, effort, dependencies) weights."""
+    return _weight_vectors.get(strategy) or _weight_vectors['smart_balance']
+
+
+def strategies_fingerprint():
+    """Short digest of the compiled weights, for cache keys."""
+    return _fingerprint
+
 
 def apply_weights(urgency, importance, effort, dependencies, strategy='smart_balance'):
     """Apply strategy weights to components and return final score."""
-    if strategy not in STRATEGIES:
-        strategy = 'smart_balance'
-    
-    weights = STRATEGIES[strategy]
+    w_urgency, w_importance, w_effort, w_dependencies = (
+        _weight_vectors.get(strategy) or _weight_vectors['smart_balance']
+    )
     
     score = (
-        urgency * weights['urgency'] +
-        importance * weights['importance'] +
-        effort * weights['effort'] +
-        dependencies * weights['dependencies']
+        urgency * w_urgency +
+        importance * w_importance +
+        effort * w_effort +
+        dependencies * w_dependencies
     )
     
     return int(round(score))
@@ -50,3 +107,11 @@ def apply_weights(urgency, importance, effort, dependencies, strategy='smart_bal
 def get_valid_strategies():
     """Return list of valid strategy names."""
     return list(STRATEGIES.keys())
+
+
+def get_valid_dependency_modes():
+    """Return list of valid dependency scoring modes."""
+    return list(DEPENDENCY_MODES.keys())
+
+
+configure_strategies()
@@ -0,0 +1,291 @@
+"""
+Declarative score tables for the scoring components.
+
+Each ladder (urgency, importance, effort, priority level and the
+explanation phrases) is data in DEFAULT_SCORE_TABLES, compiled once into
+array-indexed lookups (integer domains) or bisect lookups (real-valued
+thresholds). Every scoring path goes through the compiled tables, so
+changing a threshold is a settings change, not a code change:
+
+    TASKS_SCORE_TABLES = {'effort': {'bounds': [1, 4], ...}}   # settings.py
+    TASKS_SCORE_TABLES_FILE=/etc/task-analyzer/tables.json     # environment
+
+Overrides replace whole top-level tables (and whole sub-tables under
+'explanations').
+"""
+import copy
+import hashlib
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+
+# Distinct (urgency, importance, effort, dependencies) tuples remembered by
+# CompiledScoreTables.explanation; the default tables produce a few thousand
+# at most (5 x 10 x 3 x 101).
+EXPLANATION_CACHE_SIZE = 16384
+
+
+DEFAULT_SCORE_TABLES = {
+    # Business days until due -> points. Overdue or due today scores
+    # 'overdue'; otherwise the first bucket whose max_days is >= the
+    # business-day count, and 'beyond' past the last one.
+    'urgency': {
+        'overdue': 100,
+        'max_days': [3, 7, 14],
+        'points': [50, 25, 10],
+        'beyond': 0,
+    },
+    # Importance rating (clamped to min_rating..max_rating) -> points
+    'importance': {
+        'min_rating': 1,
+        'max_rating': 10,
+        'default_rating': 5,
+        'points': [10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
+    },
+    # Estimated hours -> points. Bucket i applies below bounds[i]
+    # (at or below it when inclusive[i]); the last points entry applies
+    # above every bound.
+    'effort': {
+        'default_hours': 2,
+        'bounds': [1.5, 3],
+        'inclusive': [False, True],
+        'points': [15, 5, -5],
+    },
+    # Total score -> label: the label of the highest min_score reached
+    'priority_level': {
+        'min_scores': [50, 150],
+        'labels': ['LOW', 'MEDIUM', 'HIGH'],
+    },
+    'explanations': {
+        'urgency': {
+            '100': 'OVERDUE: Maximum urgency',
+            '50': 'Due in 0-3 days: High urgency',
+            '25': 'Due in 4-7 days: Medium urgency',
+            '10': 'Due in 8-14 days: Low urgency',
+            'default': '15+ days away: No urgency',
+        },
+        'importance': {
+            'min_scores': [50, 80],
+            'labels': [
+                'Less important (1-4/10)',
+                'Moderately important (5-7/10)',
+                'Very important (8-10/10)',
+            ],
+        },
+        'effort': {
+            '15': 'Quick task (under 1.5 hrs)',
+            '5': 'Medium length (1.5-3 hrs)',
+            'default': 'Long task (3+ hrs)',
+        },
+        'dependencies': 'Blocks other tasks (+{points})',
+    },
+}
+
+
+def threshold_lookup(bounds, values, inclusive=None):
+    """
+    Compile a step function over sorted upper bounds into one bisect.
+
+    values[i] applies to x below bounds[i] (or equal to it when
+    inclusive[i]); values[-1] applies past the last bound.
+    """
+    if len(values) != len(bounds) + 1:
+        raise ValueError('a threshold table needs exactly one more value than bounds')
+    if list(bounds) != sorted(bounds):
+        raise ValueError('threshold bounds must be sorted')
+
+    inclusive = list(inclusive) if inclusive is not None else [False] * len(bounds)
+    if len(inclusive) != len(bounds):
+        raise ValueError('inclusive must have one flag per bound')
+
+    values = tuple(values)
+    if all(inclusive):
+        keys = tuple(float(b) for b in bounds)
+        return lambda x: values[bisect_left(keys, x)]
+    if not any(inclusive):
+        keys = tuple(float(b) for b in bounds)
+        return lambda x: values[bisect_right(keys, x)]
+
+    # x is past (b, 0) when x >= b and past (b, 1) when x > b
+    keys = tuple((float(b), 1 if flag else 0) for b, flag in zip(bounds, inclusive))
+    return lambda x: values[bisect_left(keys, (x, 0.5))]
+
+
+def integer_lookup(low, values):
+    """
+    Compile a table over a small integer domain starting at `low` into a
+    list index; arguments outside the domain are clamped to its ends.
+    """
+    high = low + len(values) - 1
+    padded = tuple(values)
+
+    def lookup(n):
+        if n <= low:
+            return padded[0]
+        if n >= high:
+            return padded[-1]
+        return padded[n - low]
+
+    return lookup
+
+
+class CompiledScoreTables:
+    """
+    The score tables compiled into lookups shared by all scoring code.
+
+    urgency(business_days), importance(rating), effort(hours) and
+    priority_level(score) are plain functions, so a lookup is a single call.
+    Labels and explanations are interned, and explanation() is memoized by
+    its component tuple, so every task with the same breakdown shares one
+    string object.
+    """
+
+    def __init__(self, tables):
+        self.source = tables
+        # Short digest of the tables, for cache keys
+        self.fingerprint = hashlib.sha256(
+            json.dumps(tables, sort_keys=True).encode()
+        ).hexdigest()[:16]
+
+        urgency = tables['urgency']
+        if len(urgency['max_days']) != len(urgency['points']):
+            raise ValueError('urgency needs one points entry per max_days bucket')
+        self.overdue_urgency = urgency['overdue']
+        ladder = threshold_lookup(
+            urgency['max_days'], list(urgency['points']) + [urgency['beyond']],
+            inclusive=[True] * len(urgency['max_days'])
+        )
+        last_day = int(max(urgency['max_days'], default=0)) + 1
+        self.urgency = integer_lookup(0, [ladder(d) for d in range(last_day + 1)])
+
+        importance = tables['importance']
+        span = importance['max_rating'] - importance['min_rating'] + 1
+        if len(importance['points']) != span:
+            raise ValueError('importance needs one points entry per rating')
+        self.default_importance = importance['default_rating']
+        self.importance = integer_lookup(importance['min_rating'], importance['points'])
+        # Highest importance points at or below a rating (an upper bound for
+        # rows read in descending importance order)
+        ceilings = []
+        for points in importance['points']:
+            ceilings.append(max(points, ceilings[-1]) if ceilings else points)
+        self.importance_ceiling = integer_lookup(importance['min_rating'], ceilings)
+
+        effort = tables['effort']
+        self.default_hours = float(effort['default_hours'])
+        self.effort = threshold_lookup(effort['bounds'], effort['points'], effort.get('inclusive'))
+
+        levels = tables['priority_level']
+        self.priority_level = threshold_lookup(
+            levels['min_scores'], [sys.intern(label) for label in levels['labels']]
+        )
+
+        explanations = tables['explanations']
+        self._urgency_text = _keyed_phrases(explanations['urgency'])
+        self._effort_text = _keyed_phrases(explanations['effort'])
+        importance_text = explanations['importance']
+        self.importance_text = threshold_lookup(
+            importance_text['min_scores'], importance_text['labels']
+        )
+        self.dependencies_text = explanations['dependencies']
+
+        # Per instance, so reconfiguring the tables also drops the memo
+        self.explanation = lru_cache(maxsize=EXPLANATION_CACHE_SIZE)(self._build_explanation)
+
+    def _build_explanation(self, urgency, importance, effort, dependencies):
+        parts = [
+            self.urgency_text(urgency),
+            self.importance_text(importance),
+            self.effort_text(effort),
+        ]
+        if dependencies > 0:
+            parts.append(self.dependencies_text.format(points=dependencies))
+        return sys.intern(" | ".join(parts))
+
+    def urgency_buckets(self, as_of, calendar):
+        """
+        Split due dates into ranges of equal urgency, measured from as_of.
+
+        Returns a list of (lower, upper, points): due dates in (lower, upper]
+        score `points`, with None for an open end. The first range is
+        overdue/today.
+        """
+        urgency = self.source['urgency']
+        buckets = [(None, as_of, self.overdue_urgency)]
+        lower = as_of
+        for max_days, points in zip(urgency['max_days'], urgency['points']):
+            upper = calendar.last_day_within(as_of, max_days)
+            buckets.append((lower, upper, points))
+            lower = upper
+        buckets.append((lower, None, urgency['beyond']))
+        return buckets
+
+    def effort_buckets(self):
+        """
+        Split estimated hours into ranges of equal effort points.
+
+        Returns a list of (lower, lower_inclusive, upper, upper_inclusive,
+        points), with None for an open end.
+        """
+        effort = self.source['effort']
+        inclusive = effort.get('inclusive') or [False] * len(effort['bounds'])
+        buckets = []
+        lower, lower_inclusive = None, False
+        for bound, flag, points in zip(effort['bounds'], inclusive, effort['points']):
+            buckets.append((lower, lower_inclusive, bound, flag, points))
+            lower, lower_inclusive = bound, not flag
+        buckets.append((lower, lower_inclusive, None, False, effort['points'][-1]))
+        return buckets
+
+    def urgency_text(self, urgency):
+        return self._urgency_text.get(urgency, self._urgency_text['default'])
+
+    def effort_text(self, effort):
+        return self._effort_text.get(effort, self._effort_text['default'])
+
+
+def _keyed_phrases(phrases):
+    """{'100': text, ..., 'default': text} -> {100: text, ..., 'default': text}"""
+    keyed = {'default': phrases['default']}
+    for key, text in phrases.items():
+        if key != 'default':
+            keyed[int(float(key))] = text
+    return keyed
+
+
+def merge_tables(overrides):
+    """DEFAULT_SCORE_TABLES with overrides applied (see module docstring)."""
+    tables = copy.deepcopy(DEFAULT_SCORE_TABLES)
+    for name, table in (overrides or {}).items():
+        if name not in tables:
+            raise ValueError(f'unknown score table: {name}')
+        if name == 'explanations':
+            tables[name].update(table)
+        else:
+            tables[name] = table
+    return tables
+
+
+_active = CompiledScoreTables(DEFAULT_SCORE_TABLES)
+
+
+def active():
+    """The compiled tables every scoring function reads."""
+    return _active
+
+
+def configure(overrides=None, path=None):
+    """
+    Compile and activate the default tables with overrides from a dict
+    and/or a JSON file (file entries win). Raises ValueError on a malformed
+    table, leaving the active tables untouched.
+    """
+    global _active
+    merged = dict(overrides or {})
+    if path:
+        with open(path) as f:
+            merged.update(json.load(f))
+    _active = CompiledScoreTables(merge_tables(merged))
+    return _active
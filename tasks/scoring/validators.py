@@ -1,62 +1,73 @@
-from dateutil import parser
 from datetime import date
+from functools import lru_cache
 
-def parse_date(date_string):
-    """Parse any date format. Returns date object or today if invalid."""
+from .identity import TaskIndex
+
+
+@lru_cache(maxsize=8192)
+def _parse_date_string(date_string):
+    """Parse one date string. Cached: task lists repeat the same few dates."""
+    if len(date_string) == 10 and date_string[4] == '-' and date_string[7] == '-':
+        # YYYY-MM-DD, what clients almost always send
+        try:
+            return date.fromisoformat(date_string)
+        except ValueError:
+            pass
+    
+    # Anything else goes through dateutil, imported on first use: it is
+    # the slowest import of the scoring engine and rarely needed
+    from dateutil import parser
+    return parser.parse(date_string).date()
+
+
+def parse_date(date_string, default=None):
+    """
+    Parse any date format. Returns date object, or `default` (today when
+    not given) if missing or invalid.
+    """
     if isinstance(date_string, date):
         return date_string
     
     if not date_string:
-        return date.today()
+        return default or date.today()
     
     try:
-        parsed = parser.parse(date_string)
-        return parsed.date()
-    except (ValueError, TypeError, AttributeError):
-        return date.today()
+        return _parse_date_string(date_string)
+    except (ValueError, TypeError, AttributeError, OverflowError):
+        return default or date.today()
 
 
-def detect_circular_dependencies(tasks):
+def parse_as_of(value):
     """
-    Detect circular dependencies using DFS.
+    Parse the optional `as_of` request parameter (YYYY-MM-DD).
+    
+    Returns (as_of, error): as_of is None when the parameter is absent.
+    """
+    if value is None or value == '':
+        return None, None
+    
+    if not isinstance(value, str):
+        return None, 'as_of must be a date string (YYYY-MM-DD)'
+    
+    try:
+        return date.fromisoformat(value), None
+    except ValueError:
+        return None, 'as_of must be a date string (YYYY-MM-DD)'
+
+
+def detect_circular_dependencies(tasks, index=None):
+    """
+    Detect circular dependencies with an iterative DFS over the resolved
+    references of `index` (a TaskIndex of tasks, built when not given).
     Returns (has_cycles, error_message)
     """
     if not isinstance(tasks, list) or not tasks:
         return False, ""
     
-    task_ids = set()
-    task_dependencies = {}
-    
-    for task in tasks:
-        if isinstance(task, dict):
-            task_id = task.get('id') or task.get('title')
-            task_ids.add(task_id)
-            deps = task.get('dependencies', [])
-            task_dependencies[task_id] = deps if isinstance(deps, list) else []
-    
-    def has_cycle(task_id, visited, path):
-        if task_id in path:
-            return True, list(path) + [task_id]
-        if task_id in visited:
-            return False, []
-        
-        visited.add(task_id)
-        new_path = path + [task_id]
-        
-        for dep_id in task_dependencies.get(task_id, []):
-            has_cycl, cycle_path = has_cycle(dep_id, visited, new_path)
-            if has_cycl:
-                return True, cycle_path
-        
-        return False, []
-    
-    visited = set()
-    for task_id in task_ids:
-        if task_id not in visited:
-            has_cycl, cycle_path = has_cycle(task_id, visited, [])
-            if has_cycl:
-                cycle_str = " -> ".join(str(x) for x in cycle_path)
-                return True, f"Circular dependency detected: {cycle_str}"
+    cycle = (index or TaskIndex(tasks)).cycle()
+    if cycle:
+        cycle_str = " -> ".join(str(x) for x in cycle)
+        return True, f"Circular dependency detected: {cycle_str}"
     
     return False, ""
 
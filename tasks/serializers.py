@@ -58,23 +58,6 @@ class TaskSerializer(serializers.ModelSerializer):
         return value
 
 
-class AnalyzeTasksRequestSerializer(serializers.Serializer):
-    """
-    Validates incoming request to POST /api/tasks/analyze/
-    """
-    
-    tasks = serializers.ListField(
-        child=serializers.DictField(),
-        help_text="List of task dictionaries to analyze"
-    )
-    
-    strategy = serializers.ChoiceField(
-        choices=['smart_balance', 'fastest_wins', 'high_impact', 'deadline_driven'],
-        default='smart_balance',
-        help_text="Sorting strategy to use"
-    )
-
-
 class AnalyzeTasksResponseSerializer(serializers.Serializer):
     """
     Formats response from POST /api/tasks/analyze/
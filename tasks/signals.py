@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .calendars import clear_calendar_cache
+from .models import RecurringTask, Task, WorkingCalendar
+from . import reachability
+from .bulk import in_bulk_write
+from .live import broadcaster
+from .ranking import bump_stored_version, stored_tasks_changed
+from .scoring import tables
+from .scoring.strategies import configure_strategies
+from .stored import refresh_blocked_counts, sync_dependency_edges
+
+# Sent after strategy weights or score tables are recompiled
+scoring_config_changed = Signal()
+
+SCORING_SETTINGS = ('TASKS_STRATEGIES', 'TASKS_SCORE_TABLES', 'TASKS_SCORE_TABLES_FILE')
+
+
+@receiver([post_save, post_delete], sender=WorkingCalendar)
+def working_calendar_changed(sender, **kwargs):
+    """Recompile calendars after any WorkingCalendar change."""
+    clear_calendar_cache()
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, using, **kwargs):
+    """Mirror Task.dependencies into TaskDependency edges."""
+    if in_bulk_write():
+        return
+    sync_dependency_edges([instance], using)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, using, **kwargs):
+    """Its edges are gone with it; recount the tasks it was waiting on."""
+    if in_bulk_write():
+        return
+    dependencies = {dep for dep in set(instance.dependencies or [])
+                    if isinstance(dep, int) and not isinstance(dep, bool)}
+    refresh_blocked_counts(dependencies, using)
+    bump_stored_version(
+        using, tasks_saved=[], tasks_deleted=[instance.pk],
+        edges_removed=[(instance.pk, dep) for dep in dependencies]
+    )
+
+
+@receiver([post_save, post_delete], sender=RecurringTask)
+def recurring_task_changed(sender, using, **kwargs):
+    """Its occurrences are part of every stored ranking; no task or edge changed."""
+    bump_stored_version(using, tasks_saved=[])
+
+
+@receiver(stored_tasks_changed)
+def notify_live_rankings(sender, using='default', **kwargs):
+    """Wake this process's live ranking streams once the write commits."""
+    # Streams and the index follow the default database only
+    if using != 'default':
+        return
+    transaction.on_commit(broadcaster.publish)
+
+
+@receiver(stored_tasks_changed)
+def update_reachability_index(sender, previous, version, using='default', tasks_saved=None,
+                              tasks_deleted=None, edges_added=None, edges_removed=None, **kwargs):
+    """Keep this process's dependency reachability index current."""
+    if using != 'default':
+        return
+    reachability.apply_changes(
+        previous, version, tasks_saved, tasks_deleted, edges_added, edges_removed
+    )
+
+
+def configure_scoring():
+    """
+    Compile strategy weights and score tables with the overrides from
+    settings, then announce it with scoring_config_changed.
+    """
+    configure_strategies(getattr(settings, 'TASKS_STRATEGIES', None))
+    tables.configure(
+        getattr(settings, 'TASKS_SCORE_TABLES', None),
+        getattr(settings, 'TASKS_SCORE_TABLES_FILE', None),
+    )
+    scoring_config_changed.send(sender=configure_scoring)
+
+
+@receiver(setting_changed)
+def scoring_setting_changed(setting, **kwargs):
+    """Recompile when scoring or calendar settings change (e.g. in tests)."""
+    if setting in SCORING_SETTINGS:
+        configure_scoring()
+    elif setting == 'TASKS_CALENDARS_FILE':
+        clear_calendar_cache()
+
+
+@receiver(scoring_config_changed)
+def rewarm_scoring(sender, **kwargs):
+    """Rebuild the warm caches that depend on weights and tables."""
+    if getattr(settings, 'TASKS_WARMUP', False):
+        from .warmup import warm_scoring
+        warm_scoring()
@@ -0,0 +1,336 @@
+"""
+Top-N suggestions over the Task table without loading it into Python.
+
+A score is a non-negative weighting of four components, and the score
+tables split each of three into a few ranges of equal points:
+
+- urgency: due-date ranges (ScoreTables.urgency_buckets)
+- effort: estimated-hours ranges (ScoreTables.effort_buckets)
+- dependencies: Task.blocked_count values, saturating at
+  BLOCKED_COUNT_SATURATION
+
+Every combination of ranges is a stream: an indexed scan of the matching
+rows in (importance desc, id) order. Within a stream only importance
+varies, so importance_ceiling(rating of the next row) gives an upper bound
+for every row left in it. The stream with the highest bound is read next
+(streams are not queried until their bound is the highest), and reading
+stops once no stream can beat the current k-th best (score, -id), i.e.
+the threshold algorithm. The result is exactly the top k by (score desc,
+id asc), and the rows read depend on k and the score distribution, not on
+the size of the table.
+
+Stored recurring task templates (RecurringTask) take part as their
+occurrences (see tasks/scoring/recurrence.py), after the tasks on ties:
+rank_stored_tasks() adds every occurrence in the templates' horizons,
+and suggest_stored_tasks() only scores the ones that can still make the
+top.
+"""
+import heapq
+from itertools import islice
+
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import RecurringTask, Task, TaskDependency
+from .scoring import tables
+from .ranking import bump_stored_version
+from .scoring.analyzer import analyze_tasks, assign_priority_level, generate_explanation
+from .scoring.components import (
+    BLOCKED_COUNT_SATURATION, calculate_dependencies, calculate_effort, calculate_importance
+)
+from .scoring.context import AnalysisContext
+from .scoring.recurrence import expand, top_occurrences
+from .scoring.strategies import apply_weights, strategy_weights
+
+# Rows fetched per query from one stream
+PAGE_SIZE = 32
+
+# Task ids per UPDATE/DELETE when syncing dependency edges
+SYNC_CHUNK_SIZE = 500
+
+STREAM_FIELDS = ('id', 'due_date', 'importance', 'estimated_hours', 'blocked_count')
+
+TEMPLATE_FIELDS = (
+    'id', 'title', 'importance', 'estimated_hours', 'frequency', 'interval', 'weekdays',
+    'starts_on', 'ends_on', 'horizon',
+)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def refresh_blocked_counts(task_ids, using='default'):
+    """Recount Task.blocked_count from the dependency edges."""
+    blocked = Subquery(
+        TaskDependency.objects.using(using).filter(depends_on=OuterRef('pk'))
+        .order_by().values('depends_on').annotate(n=Count('*')).values('n')
+    )
+    for chunk in _chunks(task_ids, SYNC_CHUNK_SIZE):
+        Task.objects.using(using).filter(pk__in=chunk).update(
+            blocked_count=Coalesce(blocked, Value(0))
+        )
+
+
+def sync_dependency_edges(tasks, using='default'):
+    """
+    Rebuild the TaskDependency rows of the given Task instances from their
+    dependencies field, and the blocked counts they affect.
+    """
+    saved = []
+    added = set()
+    removed = set()
+    for chunk in _chunks(tasks, SYNC_CHUNK_SIZE):
+        edges = TaskDependency.objects.using(using).filter(task__in=chunk)
+        old_pairs = set(edges.values_list('task_id', 'depends_on'))
+        edges.delete()
+
+        new_edges = [
+            TaskDependency(task=task, depends_on=dep)
+            for task in chunk
+            for dep in set(task.dependencies or [])
+            if isinstance(dep, int) and not isinstance(dep, bool)
+        ]
+        TaskDependency.objects.using(using).bulk_create(new_edges)
+
+        new_pairs = {(edge.task_id, edge.depends_on) for edge in new_edges}
+        saved.extend(task.pk for task in chunk)
+        added |= new_pairs - old_pairs
+        removed |= old_pairs - new_pairs
+
+        affected = {dep for _, dep in old_pairs | new_pairs}
+        affected.update(task.pk for task in chunk)
+        refresh_blocked_counts(affected, using)
+    bump_stored_version(using, tasks_saved=saved, edges_added=added, edges_removed=removed)
+
+
+def recurring_templates():
+    """Stored RecurringTask rows as recurrence templates, ids prefixed "recurring-"."""
+    return [
+        {**template, 'id': f'recurring-{template["id"]}'}
+        for template in RecurringTask.objects.order_by('id').values(*TEMPLATE_FIELDS)
+    ]
+
+
+def _range_filter(field, lower, lower_inclusive, upper, upper_inclusive):
+    q = Q()
+    if lower is not None:
+        q &= Q(**{f'{field}__{"gte" if lower_inclusive else "gt"}': lower})
+    if upper is not None:
+        q &= Q(**{f'{field}__{"lte" if upper_inclusive else "lt"}': upper})
+    return q
+
+
+def _dependency_buckets():
+    """(Task.blocked_count filter, dependency points) per points value."""
+    buckets = [(Q(blocked_count=n), calculate_dependencies(n))
+               for n in range(BLOCKED_COUNT_SATURATION)]
+    buckets.append((
+        Q(blocked_count__gte=BLOCKED_COUNT_SATURATION),
+        calculate_dependencies(BLOCKED_COUNT_SATURATION)
+    ))
+    return buckets
+
+
+class _Stream:
+    """
+    Rows with one (urgency, effort, dependencies) combination, read in
+    (importance desc, id) pages with a keyset cursor.
+    """
+
+    def __init__(self, queryset, fixed):
+        self.queryset = queryset
+        self.fixed = fixed          # weighted points of the constant components
+        self.page = []
+        self.loaded = False
+        self.more = True
+        self.cursor = None          # (importance, last id or None for "below")
+
+    def fetch(self):
+        queryset = self.queryset
+        if self.cursor is not None:
+            importance, last_id = self.cursor
+            after = Q(importance__lt=importance)
+            if last_id is not None:
+                after |= Q(importance=importance, id__gt=last_id)
+            queryset = queryset.filter(after)
+        self.page = list(queryset.order_by('-importance', 'id')
+                         .values_list(*STREAM_FIELDS)[:PAGE_SIZE])
+        self.page.reverse()
+        self.more = len(self.page) == PAGE_SIZE
+        self.loaded = True
+
+    def head_rating(self):
+        """Highest importance rating any remaining row can have (None: any)."""
+        if self.page:
+            return self.page[-1][2]
+        if self.cursor is None:
+            return None
+        importance, last_id = self.cursor
+        return importance if last_id is not None else importance - 1
+
+    def pop(self):
+        row = self.page.pop()
+        self.cursor = (row[2], row[0])
+        self.loaded = bool(self.page) or not self.more
+        return row
+
+    def skip_rating(self, rating):
+        """Drop the remaining rows rated `rating`."""
+        self.page = []
+        self.cursor = (rating, None)
+        self.loaded = False
+        self.more = True
+
+    @property
+    def exhausted(self):
+        return self.loaded and not self.page and not self.more
+
+
+def _streams(context, weights):
+    w_urgency, _, w_effort, w_dependencies = weights
+    table = tables.active()
+    streams = []
+    for due_lower, due_upper, urgency in table.urgency_buckets(context.as_of, context.calendar):
+        due_range = _range_filter('due_date', due_lower, False, due_upper, True)
+        for hours_lower, lower_inclusive, hours_upper, upper_inclusive, effort in table.effort_buckets():
+            hours_range = _range_filter(
+                'estimated_hours', hours_lower, lower_inclusive, hours_upper, upper_inclusive
+            )
+            for blocked, dependencies in _dependency_buckets():
+                fixed = urgency * w_urgency + effort * w_effort + dependencies * w_dependencies
+                streams.append(_Stream(Task.objects.filter(due_range, hours_range, blocked), fixed))
+    return streams
+
+
+def suggest_stored_tasks(strategy='smart_balance', count=3, context=None):
+    """
+    Top `count` stored tasks for a strategy, scored like /suggest/ with
+    direct dependency counts.
+
+    Returns:
+    {
+        'success': True,
+        'suggestions': [{'id': 7, 'title': '...', 'reason': '...', 'priority': 'HIGH',
+                         'due_date': '2025-11-30', 'priority_score': 165}, ...],
+        'candidates_scored': 12,
+        'message': 'Top 3 tasks for today'
+    }
+    """
+    context = context or AnalysisContext()
+    table = tables.active()
+    weights = strategy_weights(strategy)
+    w_importance = weights[1]
+    top_ceiling = table.importance_ceiling(float('inf'))
+
+    def bound(stream):
+        rating = stream.head_rating()
+        ceiling = top_ceiling if rating is None else table.importance_ceiling(rating)
+        return int(round(stream.fixed + ceiling * w_importance))
+
+    frontier = [(-bound(stream), position, stream)
+                for position, stream in enumerate(_streams(context, weights))]
+    heapq.heapify(frontier)
+
+    # Min-heap of the best `count` rows by (score, -id)
+    best = []
+    scored = 0
+    while frontier and count > 0:
+        negative_bound, position, stream = heapq.heappop(frontier)
+        full = len(best) == count
+        if full and -negative_bound < best[0][0]:
+            break
+
+        if not stream.loaded:
+            stream.fetch()
+            if stream.exhausted:
+                continue
+            if bound(stream) < -negative_bound:
+                # Its rows rate lower than assumed: let other streams go first
+                heapq.heappush(frontier, (-bound(stream), position, stream))
+                continue
+
+        task_id, due_date, importance, hours, blocked = stream.page[-1]
+        if full and (bound(stream), -task_id) < best[0][:2]:
+            # Ties at this rating lose on id, so only lower ratings can enter
+            stream.skip_rating(importance)
+        else:
+            stream.pop()
+            components = (
+                context.urgency(due_date),
+                calculate_importance(importance),
+                calculate_effort(hours),
+                calculate_dependencies(blocked),
+            )
+            score = apply_weights(*components, strategy)
+            scored += 1
+
+            entry = (score, -task_id, due_date, components)
+            if len(best) < count:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+        if not stream.exhausted:
+            heapq.heappush(frontier, (-bound(stream), position, stream))
+
+    best.sort(reverse=True)
+    titles = dict(Task.objects.filter(pk__in=[-e[1] for e in best]).values_list('id', 'title'))
+    occurrences = []
+    templates = recurring_templates()
+    if templates and count > 0:
+        floor = best[-1][0] if len(best) == count else None
+        occurrences, occurrences_scored = top_occurrences(templates, strategy, count, context, floor)
+        scored += occurrences_scored
+
+    suggestions = [
+        {
+            'id': -negative_id,
+            'title': titles.get(-negative_id, 'Untitled'),
+            'reason': generate_explanation(*components),
+            'priority': assign_priority_level(score),
+            'due_date': str(due_date),
+            'priority_score': score
+        }
+        for score, negative_id, due_date, components in best
+    ]
+    if occurrences:
+        suggestions.extend(
+            {
+                'id': task['id'],
+                'title': task['title'],
+                'reason': generate_explanation(*components),
+                'priority': assign_priority_level(score),
+                'due_date': str(task['due_date']),
+                'priority_score': score
+            }
+            for score, task, components in occurrences
+        )
+        # Stable: tasks stay ahead of occurrences with the same score
+        suggestions.sort(key=lambda suggestion: -suggestion['priority_score'])
+        del suggestions[count:]
+
+    return {
+        'success': True,
+        'suggestions': suggestions,
+        'candidates_scored': scored,
+        'message': f'Top {len(suggestions)} tasks for today'
+    }
+
+
+def rank_stored_tasks(strategy='smart_balance', dependency_mode='direct', context=None):
+    """
+    Analyze every stored task and the occurrences of the stored recurring
+    templates, like /analyze/ on the whole table (ties ranked by id, tasks
+    first). Returns the analyze_tasks result dict.
+    """
+    context = context or AnalysisContext()
+    tasks = list(Task.objects.order_by('id').values(
+        'id', 'title', 'due_date', 'importance', 'estimated_hours', 'dependencies'
+    ))
+    tasks.extend(expand(recurring_templates(), context.as_of))
+    if not tasks:
+        return {'success': True, 'message': 'No tasks stored', 'results': [], 'error': None}
+    return analyze_tasks(tasks, strategy, dependency_mode, context)
@@ -1,10 +1,31 @@
-from django.test import TestCase
+from django.test import AsyncClient, TestCase, override_settings
+from asgiref.sync import async_to_sync, sync_to_async
 from datetime import date, timedelta
+import asyncio
+import gzip
+import json
+import unittest
+from unittest import mock
+from django.core.cache import cache
 from .scoring.components import (
     calculate_urgency, calculate_importance, calculate_effort, calculate_dependencies
 )
-from .scoring.strategies import apply_weights, get_valid_strategies
-from .scoring.analyzer import score_single_task, analyze_tasks
+from .scoring.strategies import STRATEGIES, apply_weights, get_valid_strategies
+from .scoring.analyzer import score_single_task, analyze_tasks, analyze_batch
+from .scoring.graph import DependencyGraph, score_dependencies
+from .scoring.planner import plan_tasks
+from .scoring.calendar import CompiledCalendar
+from .scoring.context import AnalysisContext
+from .scoring.validators import parse_date
+from .scoring import tables
+from .scoring.analyzer import assign_priority_level, generate_explanation
+from .calendars import get_calendar, clear_calendar_cache
+from .stored import suggest_stored_tasks, sync_dependency_edges
+from .ranking import bump_stored_version, decode_cursor, encode_cursor, window
+from .models import Task, TaskDependency, WorkingCalendar
+from .middleware import negotiate_encoding, zstandard
+from .export import pyarrow
+from .benchmarks import make_tasks
 
 
 class ScoringComponentsTests(TestCase):
@@ -314,3 +335,1943 @@ class OverallScoringTests(TestCase):
         
         # Total should be 195 (100 + 90 + 5 + 0)
         self.assertEqual(bug_task['priority_score'], 195)
+
+
+class CompressionMiddlewareTests(TestCase):
+    """Test cases for request decompression and response compression."""
+    
+    def post_analyze(self, body, **headers):
+        return self.client.post(
+            '/api/tasks/analyze/', body,
+            content_type='application/json', **headers
+        )
+    
+    def test_gzip_request_body(self):
+        """Test that a gzip-encoded body is decompressed before parsing."""
+        body = json.dumps({'tasks': make_tasks(5)}).encode()
+        response = self.post_analyze(gzip.compress(body), HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_tasks'], 5)
+    
+    @unittest.skipIf(zstandard is None, 'zstandard not installed')
+    def test_zstd_request_body(self):
+        """Test that a zstd-encoded body is decompressed before parsing."""
+        body = json.dumps({'tasks': make_tasks(5)}).encode()
+        compressed = zstandard.ZstdCompressor().compress(body)
+        response = self.post_analyze(compressed, HTTP_CONTENT_ENCODING='zstd')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_tasks'], 5)
+    
+    @override_settings(TASKS_COMPRESSION={'MAX_DECOMPRESSED_SIZE': 10000})
+    def test_decompressed_size_limit(self):
+        """Test that a small body inflating past the limit is rejected with 413."""
+        bomb = gzip.compress(b'[' + b' ' * 1000000 + b']')
+        response = self.post_analyze(bomb, HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 413)
+    
+    def test_readline_guards(self):
+        """Test readline() keeps the size limit and reports corrupt bodies as ParseError."""
+        import io
+        from rest_framework.exceptions import ParseError
+        from .middleware import DecompressingStream, RequestBodyTooLarge
+        
+        def stream(body, max_size=10000):
+            return DecompressingStream(io.BytesIO(body), 'gzip', max_size)
+        
+        lines = stream(gzip.compress(b'ab\ncd\nef'))
+        self.assertEqual([lines.readline(), lines.readline(1), lines.read()],
+                         [b'ab\n', b'c', b'd\nef'])
+        self.assertEqual(lines.readline(), b'')
+        
+        bomb = stream(gzip.compress(b' ' * 1000000))
+        with self.assertRaises(RequestBodyTooLarge):
+            bomb.readline()
+        self.assertLessEqual(bomb.total, 10000 + 1)
+        with self.assertRaises(ParseError):
+            stream(b'not gzip').readline()
+    
+    def test_malformed_and_unsupported_encodings(self):
+        """Test corrupt gzip (400) and unknown codings (415)."""
+        response = self.post_analyze(b'not gzip', HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 400)
+        response = self.post_analyze(b'{}', HTTP_CONTENT_ENCODING='br')
+        self.assertEqual(response.status_code, 415)
+    
+    def test_response_compressed_above_threshold(self):
+        """Test that large analyze responses are gzipped when accepted."""
+        body = json.dumps({'tasks': make_tasks(50)})
+        response = self.post_analyze(body, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        results = json.loads(gzip.decompress(response.content))['results']
+        self.assertEqual(len(results), 50)
+    
+    def test_small_response_not_compressed(self):
+        """Test that responses under MIN_RESPONSE_SIZE are sent as-is."""
+        body = json.dumps({'tasks': []})
+        response = self.post_analyze(body, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+    
+    def test_negotiate_encoding(self):
+        """Test Accept-Encoding negotiation with q-values."""
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertIsNone(negotiate_encoding('br'))
+        self.assertEqual(negotiate_encoding('gzip'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0'))
+        if zstandard is not None:
+            self.assertEqual(negotiate_encoding('gzip, zstd'), 'zstd')
+            self.assertEqual(negotiate_encoding('gzip, zstd;q=0.5'), 'gzip')
+
+
+class BatchAnalysisTests(TestCase):
+    """Test cases for analyzing many task lists in one request."""
+    
+    def test_results_keyed_by_job_id(self):
+        """Test that each job gets its own result under its id."""
+        jobs = [
+            {'id': 'a', 'tasks': make_tasks(3), 'strategy': 'smart_balance'},
+            {'id': 'b', 'tasks': make_tasks(4), 'strategy': 'deadline_driven'},
+            {'tasks': make_tasks(2)},
+        ]
+        result = analyze_batch(jobs)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(list(result['results']), ['a', 'b', '2'])
+        self.assertEqual(result['results']['b']['total_tasks'], 4)
+        self.assertEqual(result['results']['b']['strategy'], 'deadline_driven')
+    
+    def test_errors_are_per_job(self):
+        """Test that a failing job does not affect the others."""
+        cyclic = [
+            {'id': 1, 'title': 'A', 'dependencies': [2]},
+            {'id': 2, 'title': 'B', 'dependencies': [1]},
+        ]
+        jobs = [
+            {'id': 'ok', 'tasks': make_tasks(3)},
+            {'id': 'cycle', 'tasks': cyclic},
+            {'id': 'strategy', 'tasks': [], 'strategy': 'nope'},
+            'not a job',
+        ]
+        results = analyze_batch(jobs)['results']
+        
+        self.assertTrue(results['ok']['success'])
+        self.assertEqual(results['cycle']['message'], 'Circular dependency detected')
+        self.assertEqual(results['strategy']['message'], 'Invalid strategy')
+        self.assertFalse(results['3']['success'])
+    
+    def test_parallel_matches_sequential(self):
+        """Test that parallel execution returns the same results."""
+        jobs = [{'id': i, 'tasks': make_tasks(10, seed=i)} for i in range(6)]
+        sequential = analyze_batch(jobs)
+        parallel = analyze_batch(jobs, parallel=True)
+        self.assertEqual(sequential['results'], parallel['results'])
+    
+    def test_duplicate_job_ids_rejected(self):
+        """Test that duplicate job ids fail the whole batch."""
+        result = analyze_batch([{'id': 'x', 'tasks': []}, {'id': 'x', 'tasks': []}])
+        self.assertFalse(result['success'])
+        self.assertIn('x', result['error'])
+    
+    def test_batch_endpoint(self):
+        """Test POST /api/tasks/analyze-batch/."""
+        body = {'jobs': [{'id': 'u1', 'tasks': make_tasks(3)}], 'parallel': True}
+        response = self.client.post(
+            '/api/tasks/analyze-batch/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results']['u1']['total_tasks'], 3)
+        
+        response = self.client.post(
+            '/api/tasks/analyze-batch/', json.dumps({'jobs': {}}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_batch_body_must_be_object(self):
+        """Test that a JSON body that is not an object is a 400, not a server error."""
+        for body in ([1, 2], 'x'):
+            response = self.client.post(
+                '/api/tasks/analyze-batch/', json.dumps(body), content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['message'], 'Invalid request format')
+
+
+class DependencyModeTests(TestCase):
+    """Test cases for transitive and critical-path dependency scoring."""
+    
+    def chain(self, length, hours=2):
+        """Task 0 <- task 1 <- ... each task depends on the previous one."""
+        return [
+            {'id': i + 1, 'title': f'T{i}', 'estimated_hours': hours,
+             'dependencies': [i] if i else []}
+            for i in range(length)
+        ]
+    
+    def test_direct_mode_counts_only_direct_dependents(self):
+        """Test that direct mode matches count_blocked_tasks."""
+        scores = score_dependencies(self.chain(4), 'direct')
+        self.assertEqual(scores, [20, 20, 20, 0])
+    
+    def test_transitive_mode_counts_descendants(self):
+        """Test that transitive mode counts the whole chain behind a task."""
+        scores = score_dependencies(self.chain(4), 'transitive')
+        self.assertEqual(scores, [60, 40, 20, 0])
+    
+    def test_transitive_mode_does_not_double_count_diamonds(self):
+        """Test A <- B, A <- C, B <- D, C <- D counts D once for A."""
+        tasks = [
+            {'id': 'A', 'dependencies': []},
+            {'id': 'B', 'dependencies': ['A']},
+            {'id': 'C', 'dependencies': ['A']},
+            {'id': 'D', 'dependencies': ['B', 'C']},
+        ]
+        graph = DependencyGraph(tasks)
+        self.assertEqual(graph.transitive_counts(), [3, 1, 1, 0])
+    
+    def test_critical_path_mode_uses_longest_chain(self):
+        """Test that critical path follows the longest chain of hours."""
+        tasks = [
+            {'id': 'A', 'estimated_hours': 1, 'dependencies': []},
+            {'id': 'B', 'estimated_hours': 3, 'dependencies': ['A']},
+            {'id': 'C', 'estimated_hours': 1, 'dependencies': ['A']},
+            {'id': 'D', 'estimated_hours': 4, 'dependencies': ['B']},
+        ]
+        graph = DependencyGraph(tasks)
+        self.assertEqual(graph.downstream_hours(), [7.0, 4.0, 0.0, 0.0])
+        self.assertEqual(score_dependencies(tasks, 'critical_path'), [35, 20, 0, 0])
+    
+    def test_scores_saturate_on_long_chains(self):
+        """Test that a 1000-task chain is scored without recursion."""
+        scores = score_dependencies(self.chain(1000), 'transitive')
+        self.assertEqual(scores[0], 100)
+        self.assertEqual(scores[-1], 0)
+    
+    def test_analyze_with_dependency_mode(self):
+        """Test that analyze_tasks applies the requested dependency mode."""
+        tasks = self.chain(3)
+        result = analyze_tasks(tasks, 'smart_balance', 'transitive')
+        by_id = {task['id']: task for task in result['results']}
+        self.assertEqual(by_id[1]['dependencies_count'], 40)
+    
+    def test_invalid_dependency_mode_rejected(self):
+        """Test that the API rejects unknown dependency modes."""
+        body = {'tasks': self.chain(2), 'dependency_mode': 'nope'}
+        response = self.client.post(
+            '/api/tasks/analyze/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class PlanTests(TestCase):
+    """Test cases for dependency-aware execution plans."""
+    
+    def setUp(self):
+        today = date.today()
+        self.tasks = [
+            {'id': 1, 'title': 'Set up database', 'due_date': str(today + timedelta(days=30)),
+             'importance': 3, 'estimated_hours': 2, 'dependencies': []},
+            {'id': 2, 'title': 'Build API', 'due_date': str(today),
+             'importance': 10, 'estimated_hours': 5, 'dependencies': [1]},
+            {'id': 3, 'title': 'Write docs', 'due_date': str(today + timedelta(days=5)),
+             'importance': 6, 'estimated_hours': 1, 'dependencies': []},
+        ]
+    
+    def test_dependencies_come_first(self):
+        """Test that a high-scoring task waits for its dependency."""
+        plan = plan_tasks(self.tasks)['plan']
+        order = [item['id'] for item in plan]
+        self.assertLess(order.index(1), order.index(2))
+        self.assertEqual([item['order'] for item in plan], [1, 2, 3])
+    
+    def test_ready_tasks_ordered_by_score(self):
+        """Test that independent tasks follow priority score."""
+        plan = plan_tasks([dict(t, dependencies=[]) for t in self.tasks])['plan']
+        scores = [item['priority_score'] for item in plan]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+    
+    def test_daily_capacity_buckets(self):
+        """Test packing into days with hours_per_day."""
+        result = plan_tasks(self.tasks, hours_per_day=4)
+        by_id = {item['id']: item for item in result['plan']}
+        
+        self.assertEqual(by_id[2]['end_day'] - by_id[2]['start_day'], 1)
+        for day in result['days']:
+            self.assertLessEqual(day['hours'], 4)
+        self.assertEqual(sum(day['hours'] for day in result['days']), 8)
+    
+    def test_cycle_rejected(self):
+        """Test that cyclic dependencies cannot be planned."""
+        self.tasks[0]['dependencies'] = [2]
+        result = plan_tasks(self.tasks)
+        self.assertFalse(result['success'])
+    
+    def test_plan_endpoint(self):
+        """Test POST /api/tasks/plan/."""
+        body = {'tasks': self.tasks, 'hours_per_day': 6}
+        response = self.client.post(
+            '/api/tasks/plan/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['plan']), 3)
+        self.assertIsNotNone(response.json()['days'])
+        
+        body['hours_per_day'] = 0
+        response = self.client.post(
+            '/api/tasks/plan/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_plan_hours_per_day_minimum(self):
+        """Test hours_per_day below the minimum is rejected before packing."""
+        body = {'tasks': self.tasks, 'hours_per_day': 0.001}
+        response = self.client.post(
+            '/api/tasks/plan/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['field'], 'hours_per_day')
+    
+    def test_plan_days_capped(self):
+        """Test a plan longer than MAX_PLAN_DAYS is a 400, not a huge day list."""
+        from .scoring.planner import MAX_PLAN_DAYS
+        
+        tasks = [{'id': 1, 'title': 'Huge', 'due_date': '2026-01-05', 'estimated_hours': 3e7}]
+        body = {'tasks': tasks, 'hours_per_day': 8}
+        response = self.client.post(
+            '/api/tasks/plan/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Plan too long')
+        
+        tasks[0]['estimated_hours'] = 8 * MAX_PLAN_DAYS
+        result = plan_tasks(tasks, hours_per_day=8)
+        self.assertEqual(len(result['days']), MAX_PLAN_DAYS)
+
+
+class WorkingCalendarTests(TestCase):
+    """Test cases for working calendars and holiday-aware urgency."""
+    
+    MONDAY = date(2026, 1, 5)
+    
+    def setUp(self):
+        clear_calendar_cache()
+    
+    def test_default_calendar_skips_weekends(self):
+        """Test business days over a weekend with the default calendar."""
+        calendar = CompiledCalendar('default', today=self.MONDAY)
+        self.assertEqual(calendar.business_days_between(self.MONDAY, date(2026, 1, 12)), 5)
+        self.assertEqual(calendar.business_days_between(self.MONDAY, self.MONDAY), 0)
+    
+    def test_holidays_and_weekmask(self):
+        """Test that holidays and custom work weeks are excluded."""
+        calendar = CompiledCalendar(
+            'region', weekmask='1111001', holidays=['2026-01-06'], today=self.MONDAY
+        )
+        # Tue 6 is a holiday, Fri 9 and Sat 10 are off, Sun 11 is worked
+        self.assertEqual(calendar.business_days_between(self.MONDAY, date(2026, 1, 11)), 3)
+        self.assertEqual(calendar.add_business_days(self.MONDAY, 1), date(2026, 1, 7))
+    
+    def test_dates_outside_table(self):
+        """Test that dates far from the compile date use the arithmetic path."""
+        calendar = CompiledCalendar('default', holidays=['2040-01-02'], today=self.MONDAY)
+        self.assertEqual(calendar.business_days_between(date(2040, 1, 1), date(2040, 1, 8)), 4)
+    
+    def test_urgency_with_holidays(self):
+        """Test that a holiday week lowers business days until due."""
+        holidays = [str(self.MONDAY + timedelta(days=d)) for d in range(1, 5)]
+        calendar = CompiledCalendar('holiday', holidays=holidays, today=self.MONDAY)
+        due = self.MONDAY + timedelta(days=7)
+        self.assertEqual(calculate_urgency(due, today=self.MONDAY), 25)
+        self.assertEqual(calculate_urgency(due, today=self.MONDAY, calendar=calendar), 50)
+    
+    def test_database_calendar_and_cache_invalidation(self):
+        """Test loading a calendar from the DB and recompiling on save."""
+        self.assertIsNone(get_calendar('team-eu'))
+        row = WorkingCalendar.objects.create(name='team-eu', holidays=['2026-12-25'])
+        calendar = get_calendar('team-eu')
+        self.assertIs(get_calendar('team-eu'), calendar)
+        
+        row.weekmask = '1111110'
+        row.save()
+        self.assertEqual(get_calendar('team-eu').weekmask, '1111110')
+    
+    def test_unknown_calendar_rejected(self):
+        """Test that the API rejects unknown calendar names."""
+        body = {'tasks': make_tasks(2), 'calendar': 'nowhere'}
+        response = self.client.post(
+            '/api/tasks/analyze/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_plan_days_follow_calendar(self):
+        """Test that plan days are dated on working days only."""
+        WorkingCalendar.objects.create(name='four-day', weekmask='1111000')
+        tasks = [{'id': i, 'title': f'T{i}', 'estimated_hours': 8} for i in range(6)]
+        body = {'tasks': tasks, 'hours_per_day': 8, 'calendar': 'four-day'}
+        response = self.client.post(
+            '/api/tasks/plan/', json.dumps(body), content_type='application/json'
+        )
+        for day in response.json()['days']:
+            self.assertLess(date.fromisoformat(day['date']).weekday(), 4)
+
+
+class AsOfContextTests(TestCase):
+    """Test cases for request-scoped as-of analysis."""
+    
+    AS_OF = date(2026, 1, 5)  # Monday
+    
+    def tasks(self):
+        return [
+            {'id': 1, 'title': 'Due Wednesday', 'due_date': '2026-01-07', 'importance': 5},
+            {'id': 2, 'title': 'Due in three weeks', 'due_date': '2026-01-26', 'importance': 5},
+            {'id': 3, 'title': 'No due date', 'importance': 5},
+        ]
+    
+    def test_urgency_measured_from_as_of(self):
+        """Test that urgency uses the context date, not the clock."""
+        result = analyze_tasks(self.tasks(), context=AnalysisContext(self.AS_OF))
+        urgency = {task['id']: task['urgency'] for task in result['results']}
+        self.assertEqual(urgency, {1: 50, 2: 0, 3: 100})
+    
+    def test_missing_dates_default_to_as_of(self):
+        """Test that parse_date falls back to the given default."""
+        self.assertEqual(parse_date(None, default=self.AS_OF), self.AS_OF)
+        self.assertEqual(parse_date('not a date', default=self.AS_OF), self.AS_OF)
+        self.assertEqual(parse_date(None), date.today())
+    
+    def test_as_of_request_parameter(self):
+        """Test that as_of is accepted, echoed and validated by the API."""
+        body = {'tasks': self.tasks(), 'as_of': '2026-01-05'}
+        response = self.client.post(
+            '/api/tasks/analyze/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.json()['as_of'], '2026-01-05')
+        first = response.json()['results']
+        response = self.client.post(
+            '/api/tasks/analyze/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.json()['results'], first)
+        
+        body['as_of'] = '05/01/2026'
+        response = self.client.post(
+            '/api/tasks/analyze/', json.dumps(body), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_batch_jobs_share_as_of(self):
+        """Test that every batch job is scored against the same day."""
+        jobs = [{'id': 'a', 'tasks': self.tasks()}, {'id': 'b', 'tasks': self.tasks()}]
+        results = analyze_batch(jobs, as_of=self.AS_OF)['results']
+        self.assertEqual(results['a']['as_of'], '2026-01-05')
+        self.assertEqual(results['a']['results'], results['b']['results'])
+
+
+class ScoreTablesTests(TestCase):
+    """Test the compiled score tables and their overrides"""
+    
+    def test_tables_match_documented_ladders(self):
+        """Test bucket edges, including effort's mixed < / <= bounds."""
+        self.assertEqual(
+            [calculate_effort(h) for h in (0, 1.49, 1.5, 3, 3.01)], [15, 15, 5, 5, -5]
+        )
+        self.assertEqual(
+            [calculate_importance(r) for r in (-3, 1, 7, 10, 42, None)], [10, 10, 70, 100, 100, 50]
+        )
+        table = tables.active()
+        self.assertEqual(
+            [table.urgency(d) for d in (0, 3, 4, 7, 8, 14, 15, 400)], [50, 50, 25, 25, 10, 10, 0, 0]
+        )
+        self.assertEqual(
+            [assign_priority_level(s) for s in (-10, 49.9, 50, 149, 150)],
+            ['LOW', 'LOW', 'MEDIUM', 'MEDIUM', 'HIGH']
+        )
+        self.assertEqual(
+            generate_explanation(25, 80, 5, 40),
+            'Due in 4-7 days: Medium urgency | Very important (8-10/10) | '
+            'Medium length (1.5-3 hrs) | Blocks other tasks (+40)'
+        )
+    
+    def test_threshold_lookup_inclusivity(self):
+        """Test all-exclusive, all-inclusive and mixed bounds."""
+        exclusive = tables.threshold_lookup([1, 2], 'abc')
+        inclusive = tables.threshold_lookup([1, 2], 'abc', [True, True])
+        mixed = tables.threshold_lookup([1, 2], 'abc', [True, False])
+        self.assertEqual([exclusive(x) for x in (0, 1, 2, 3)], list('abcc'))
+        self.assertEqual([inclusive(x) for x in (0, 1, 2, 3)], list('aabc'))
+        self.assertEqual([mixed(x) for x in (0, 1, 2, 3)], list('aacc'))
+        with self.assertRaises(ValueError):
+            tables.threshold_lookup([2, 1], 'abc')
+    
+    def test_settings_override(self):
+        """Test that thresholds change through settings, not code."""
+        overrides = {
+            'effort': {'default_hours': 1, 'bounds': [1], 'points': [30, 0]},
+            'priority_level': {'min_scores': [100], 'labels': ['LOW', 'HIGH']},
+        }
+        with override_settings(TASKS_SCORE_TABLES=overrides):
+            self.assertEqual(calculate_effort(0.5), 30)
+            self.assertEqual(calculate_effort(None), 0)
+            self.assertEqual(assign_priority_level(120), 'HIGH')
+            self.assertEqual(calculate_importance(7), 70)
+        self.assertEqual(calculate_effort(0.5), 15)
+        self.assertEqual(assign_priority_level(120), 'MEDIUM')
+    
+    def test_malformed_override_rejected(self):
+        """Test that a bad table raises and keeps the active tables."""
+        active = tables.active()
+        with self.assertRaises(ValueError):
+            tables.configure({'effort': {'default_hours': 2, 'bounds': [1], 'points': [1]}})
+        with self.assertRaises(ValueError):
+            tables.configure({'speed': {}})
+        self.assertIs(tables.active(), active)
+    
+    def test_explanations_shared_between_tasks(self):
+        """Test that equal breakdowns share one explanation and label object."""
+        task = {'title': 'Same', 'due_date': '2026-01-07', 'importance': 7, 'estimated_hours': 2}
+        results = analyze_tasks(
+            [dict(task) for _ in range(3)], context=AnalysisContext(date(2026, 1, 5))
+        )['results']
+        self.assertIs(results[0]['explanation'], results[2]['explanation'])
+        self.assertIs(results[0]['priority_level'], results[1]['priority_level'])
+    
+    def test_explanation_memo_follows_table_overrides(self):
+        """Test that reconfigured tables do not serve stale explanations."""
+        before = generate_explanation(50, 70, 15, 0)
+        overrides = {'explanations': {'effort': {'15': 'Quick win', 'default': 'Long'}}}
+        with override_settings(TASKS_SCORE_TABLES=overrides):
+            self.assertTrue(generate_explanation(50, 70, 15, 0).endswith('| Quick win'))
+        self.assertEqual(generate_explanation(50, 70, 15, 0), before)
+
+
+class StoredSuggestionTests(TestCase):
+    """Test database top-N suggestions against scoring every stored task"""
+    
+    AS_OF = date(2026, 1, 5)
+    
+    def setUp(self):
+        self.tasks = make_tasks(300, seed=3, dependency_rate=0.3, today=self.AS_OF)
+        for task in self.tasks:
+            task['id'] += 1
+            task['dependencies'] = [dep + 1 for dep in task['dependencies']]
+        Task.objects.bulk_create([Task(**task) for task in self.tasks])
+        sync_dependency_edges(Task.objects.all())
+    
+    def expected(self, strategy, count):
+        results = analyze_tasks(
+            [dict(task) for task in self.tasks], strategy, context=AnalysisContext(self.AS_OF)
+        )['results']
+        ranked = sorted(results, key=lambda r: (-r['priority_score'], r['id']))
+        return [(r['id'], r['priority_score'], r['explanation']) for r in ranked[:count]]
+    
+    def test_matches_full_scoring_for_every_strategy(self):
+        """Test that the pre-filtered top-k is the true top-k."""
+        for strategy in STRATEGIES:
+            for count in (1, 3, 10):
+                result = suggest_stored_tasks(strategy, count, AnalysisContext(self.AS_OF))
+                got = [(s['id'], s['priority_score'], s['reason']) for s in result['suggestions']]
+                self.assertEqual(got, self.expected(strategy, count), (strategy, count))
+                self.assertLess(result['candidates_scored'], len(self.tasks))
+    
+    def test_ties_resolved_by_id(self):
+        """Test equal scores rank by id without scoring every tie."""
+        Task.objects.all().delete()
+        Task.objects.bulk_create([
+            Task(id=i, title=f'Same {i}', due_date=self.AS_OF, importance=9, estimated_hours=1)
+            for i in range(1, 201)
+        ])
+        result = suggest_stored_tasks('smart_balance', 3, AnalysisContext(self.AS_OF))
+        self.assertEqual([s['id'] for s in result['suggestions']], [1, 2, 3])
+        self.assertLessEqual(result['candidates_scored'], 3)
+    
+    def test_dependency_edges_follow_saves(self):
+        """Test that saves and deletes keep edges and blocked counts current."""
+        task = Task.objects.get(pk=5)
+        task.dependencies = [1, 2, 'not-an-id']
+        task.save()
+        self.assertEqual(
+            sorted(TaskDependency.objects.filter(task=task).values_list('depends_on', flat=True)),
+            [1, 2]
+        )
+        blocked = Task.objects.get(pk=1).blocked_count
+        self.assertEqual(
+            blocked, sum(1 in t.dependencies for t in Task.objects.all())
+        )
+        task.delete()
+        self.assertEqual(Task.objects.get(pk=1).blocked_count, blocked - 1)
+    
+    def test_stored_suggest_endpoint(self):
+        """Test the stored suggest endpoint and its validation."""
+        response = self.client.get(
+            '/api/tasks/stored/suggest/', {'strategy': 'high_impact', 'count': 5, 'as_of': '2026-01-05'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [s['id'] for s in response.json()['suggestions']],
+            [task_id for task_id, _, _ in self.expected('high_impact', 5)]
+        )
+        self.assertEqual(
+            self.client.get('/api/tasks/stored/suggest/', {'count': 0}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get('/api/tasks/stored/suggest/', {'strategy': 'nope'}).status_code, 400
+        )
+
+
+class PaginationTests(TestCase):
+    """Test limit/cursor windows over cached rankings"""
+    
+    def setUp(self):
+        cache.clear()
+        self.tasks = make_tasks(25, seed=5, today=date(2026, 1, 5))
+        for task in self.tasks:
+            task['importance'] = 5  # plenty of tied scores
+    
+    def post(self, **extra):
+        body = {'tasks': self.tasks, 'as_of': '2026-01-05', **extra}
+        return self.client.post(
+            '/api/tasks/analyze/', json.dumps(body), content_type='application/json'
+        )
+    
+    def test_windows_cover_ranking_once(self):
+        """Test that following cursors walks the full ranking in order."""
+        full = self.post().json()['results']
+        seen = []
+        cursor = None
+        while True:
+            data = self.post(limit=7, **({'cursor': cursor} if cursor else {})).json()
+            self.assertEqual(data['total_tasks'], 25)
+            seen.extend(data['results'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, full)
+    
+    def test_later_pages_reuse_cached_ranking(self):
+        """Test that page 2 does not re-run the analysis."""
+        first = self.post(limit=10).json()
+        with mock.patch('tasks.views.analyze_tasks') as analyze:
+            second = self.post(limit=10, cursor=first['next_cursor']).json()
+        analyze.assert_not_called()
+        self.assertEqual(len(second['results']), 10)
+    
+    def test_cursor_round_trip_and_errors(self):
+        """Test cursor encoding and rejection of bad windows."""
+        self.assertEqual(decode_cursor(encode_cursor({'priority_score': 90, 'id': 'a'})), (90, 'a'))
+        with self.assertRaises(ValueError):
+            window([{'priority_score': 90, 'id': 1}], 5, encode_cursor({'priority_score': 90, 'id': 2}))
+        self.assertEqual(self.post(limit=0).status_code, 400)
+        self.assertEqual(self.post(limit=5, cursor='%%%').status_code, 400)
+        self.assertNotIn('next_cursor', self.post().json())
+    
+    def test_stored_ranking_windows(self):
+        """Test stored analysis pages and invalidation on writes."""
+        for task in self.tasks:
+            task['id'] += 1
+            task['dependencies'] = [dep + 1 for dep in task['dependencies']]
+        Task.objects.bulk_create([Task(**task) for task in self.tasks])
+        sync_dependency_edges(Task.objects.all())
+        
+        params = {'limit': 20, 'as_of': '2026-01-05'}
+        first = self.client.get('/api/tasks/stored/analyze/', params).json()
+        second = self.client.get(
+            '/api/tasks/stored/analyze/', {**params, 'cursor': first['next_cursor']}
+        ).json()
+        self.assertEqual(len(first['results']) + len(second['results']), 25)
+        self.assertIsNone(second['next_cursor'])
+        
+        Task.objects.filter(pk=1).first().delete()
+        self.assertEqual(
+            self.client.get('/api/tasks/stored/analyze/', params).json()['total_tasks'], 24
+        )
+
+
+class DatabaseSettingsTests(TestCase):
+    """Test environment-driven database settings and replica routing"""
+    
+    def test_sqlite_defaults_are_tuned(self):
+        """Test WAL pragmas, immediate transactions and persistent connections."""
+        from pathlib import Path
+        from backend.database import database_settings
+        
+        default = database_settings(Path('/srv/app'), environ={})['default']
+        self.assertEqual(default['NAME'], '/srv/app/db.sqlite3')
+        self.assertIn('PRAGMA journal_mode=WAL', default['OPTIONS']['init_command'])
+        self.assertEqual(default['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(default['CONN_MAX_AGE'], 60)
+        
+        plain = database_settings(Path('/srv/app'), environ={'SQLITE_TUNING': 'false'})['default']
+        self.assertNotIn('init_command', plain['OPTIONS'])
+    
+    def test_postgres_pool_and_replicas(self):
+        """Test URL parsing, pooling and replica aliases."""
+        from pathlib import Path
+        from backend.database import database_settings
+        
+        databases = database_settings(Path('/srv/app'), environ={
+            'DATABASE_URL': 'postgres://app:s%40cret@db:5433/tasks?sslmode=require',
+            'DATABASE_REPLICA_URLS': 'postgres://app:pw@replica-a/tasks, sqlite:////srv/app/db.sqlite3',
+            'DATABASE_POOL': 'true',
+            'DATABASE_POOL_MAX_SIZE': '20',
+        })
+        default = databases['default']
+        self.assertEqual(
+            (default['NAME'], default['USER'], default['PASSWORD'], default['HOST'], default['PORT']),
+            ('tasks', 'app', 's@cret', 'db', '5433')
+        )
+        self.assertEqual(default['OPTIONS']['sslmode'], 'require')
+        self.assertEqual(default['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20})
+        self.assertEqual(default['CONN_MAX_AGE'], 0)
+        self.assertEqual(sorted(databases), ['default', 'replica_1', 'replica_2'])
+        self.assertIn('query_only=ON', databases['replica_2']['OPTIONS']['init_command'])
+        self.assertEqual(databases['replica_1']['TEST'], {'MIRROR': 'default'})
+    
+    def test_router_sends_only_analysis_reads_to_replicas(self):
+        """Test that writes and ordinary reads stay on default."""
+        from backend.routers import ReplicaRouter, analysis_reads
+        
+        router = ReplicaRouter()
+        with mock.patch('backend.routers.replica_aliases', return_value=['replica_1']):
+            self.assertEqual(router.db_for_read(Task), 'default')
+            with analysis_reads():
+                self.assertEqual(router.db_for_read(Task), 'replica_1')
+                self.assertEqual(router.db_for_write(Task), 'default')
+            self.assertEqual(router.db_for_read(Task), 'default')
+        self.assertFalse(router.allow_migrate('replica_1', 'tasks'))
+
+
+class WarmupAndStrategyConfigTests(TestCase):
+    """Test compiled strategies, their invalidation and the startup warmup"""
+    
+    def test_strategy_override_recompiles(self):
+        """Test that overriding TASKS_STRATEGIES changes scores and cache keys."""
+        from .ranking import ranking_key
+        
+        key = ranking_key('analyze', [], 'deadline_driven')
+        overrides = {'deadline_driven': {'urgency': 10}, 'team': {
+            'urgency': 0, 'importance': 1, 'effort': 0, 'dependencies': 0}}
+        with override_settings(TASKS_STRATEGIES=overrides):
+            self.assertEqual(apply_weights(50, 50, 5, 0, 'deadline_driven'), 50 * 10 + 50 + 2)
+            self.assertEqual(apply_weights(50, 70, 5, 0, 'team'), 70)
+            self.assertIn('team', get_valid_strategies())
+            self.assertNotEqual(ranking_key('analyze', [], 'deadline_driven'), key)
+        self.assertEqual(apply_weights(50, 50, 5, 0, 'deadline_driven'), 50 * 3 + 50 + 2)
+        self.assertNotIn('team', get_valid_strategies())
+        self.assertEqual(ranking_key('analyze', [], 'deadline_driven'), key)
+    
+    def test_invalid_strategy_weights_rejected(self):
+        """Test that negative or missing weights are refused."""
+        from .scoring.strategies import configure_strategies
+        
+        with self.assertRaises(ValueError):
+            configure_strategies({'bad': {'urgency': -1, 'importance': 1, 'effort': 1,
+                                          'dependencies': 1}})
+        with self.assertRaises(ValueError):
+            configure_strategies({'partial': {'urgency': 1}})
+        self.assertNotIn('bad', STRATEGIES)
+    
+    def test_warm_up_builds_caches(self):
+        """Test that warmup fills the date cache and compiles calendars."""
+        from .scoring.validators import _parse_date_string
+        from .warmup import warm_up
+        
+        _parse_date_string.cache_clear()
+        timings = warm_up()
+        self.assertEqual(set(timings), {'dates', 'calendars', 'scoring', 'urls'})
+        self.assertGreater(_parse_date_string.cache_info().currsize, 100)
+
+
+class ApiProfileTests(TestCase):
+    """Test the API-only settings profile and lazy date parsing"""
+    
+    def test_iso_fast_path_matches_dateutil(self):
+        """Test that ISO dates skip dateutil but parse the same."""
+        from dateutil import parser
+        
+        for value in ('2025-01-31', '2024-02-29', '2025-13-01', '12/31/2030', 'Dec 31 2030'):
+            try:
+                expected = parser.parse(value).date()
+            except ValueError:
+                expected = date(2000, 1, 1)
+            self.assertEqual(parse_date(value, default=date(2000, 1, 1)), expected)
+    
+    def test_api_profile_serves_tasks_api(self):
+        """Test that the API profile answers without admin, sessions or dateutil loaded."""
+        import os
+        import subprocess
+        import sys
+        from django.conf import settings
+        
+        probe = (
+            "import json, sys, django; django.setup()\n"
+            "from django.test import Client\n"
+            "body = json.dumps({'tasks': [{'id': 1, 'title': 'A', 'due_date': '2030-01-01',"
+            " 'importance': 5, 'estimated_hours': 2, 'dependencies': []}]})\n"
+            "response = Client().post('/api/tasks/analyze/', body, content_type='application/json')\n"
+            "home = Client().get('/').json()\n"
+            "print(json.dumps([response.status_code, 'admin' in home['endpoints'],"
+            " any(m.startswith(('dateutil', 'django.contrib.sessions')) for m in sys.modules)]))\n"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'backend.settings_api',
+               'TASKS_WARMUP': 'False'}
+        result = subprocess.run([sys.executable, '-c', probe], env=env, cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [200, False, False])
+
+
+class AdmissionControlTests(TestCase):
+    """Test rate limiting, request size limits and the metrics endpoint"""
+    
+    def setUp(self):
+        from . import metrics
+        metrics.reset()
+        self.body = json.dumps({'tasks': make_tasks(5)})
+    
+    def post(self, body=None, **extra):
+        return self.client.post('/api/tasks/analyze/', body or self.body,
+                                content_type='application/json', **extra)
+    
+    def test_token_bucket_refills(self):
+        """Test that a bucket allows a burst, then refills at the rate."""
+        from .admission import TokenBucketLimiter
+        
+        now = [0.0]
+        limiter = TokenBucketLimiter(rate=2, burst=3, clock=lambda: now[0])
+        self.assertEqual([limiter.take('a') for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.take('a'), 0.5)
+        self.assertEqual(limiter.take('b'), 0)
+        now[0] = 0.5
+        self.assertEqual(limiter.take('a'), 0)
+        self.assertGreater(limiter.take('a'), 0)
+    
+    @override_settings(TASKS_ADMISSION={'RATE': 1, 'BURST': 2})
+    def test_rate_limit_per_client(self):
+        """Test that a client past its burst gets 429 and others do not."""
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(self.post().status_code, 200)
+        response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.post(REMOTE_ADDR='10.0.0.2').status_code, 200)
+        # Other endpoints are not limited
+        self.assertEqual(self.client.get('/api/tasks/metrics/').status_code, 200)
+    
+    @override_settings(TASKS_ADMISSION={'MAX_BODY_SIZE': 100})
+    def test_body_size_rejected_before_parsing(self):
+        """Test that an oversized body is refused from Content-Length alone."""
+        with mock.patch('tasks.views.analyze_tasks') as analyze:
+            response = self.post(json.dumps({'tasks': make_tasks(20)}))
+        self.assertEqual(response.status_code, 413)
+        analyze.assert_not_called()
+    
+    @override_settings(TASKS_ADMISSION={'MAX_TASKS': 3, 'MAX_DEPENDENCY_EDGES': 2})
+    def test_task_and_edge_limits(self):
+        """Test the task count and dependency edge limits."""
+        tasks = [{'id': i, 'title': 'T', 'due_date': '2030-01-01', 'importance': 5,
+                  'estimated_hours': 1, 'dependencies': []} for i in range(1, 5)]
+        response = self.post(json.dumps({'tasks': tasks}))
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('at most 3 tasks', response.json()['error'])
+        
+        tasks = tasks[:3]
+        tasks[2]['dependencies'] = [1, 2]
+        self.assertEqual(self.post(json.dumps({'tasks': tasks})).status_code, 200)
+        tasks[1]['dependencies'] = [1]
+        self.assertEqual(self.post(json.dumps({'tasks': tasks})).status_code, 413)
+        
+        batch = {'jobs': [{'id': 'a', 'tasks': tasks[:2]}, {'id': 'b', 'tasks': tasks[:2]}]}
+        response = self.client.post('/api/tasks/analyze-batch/', json.dumps(batch),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+        
+        counters = self.client.get('/api/tasks/metrics/').json()['metrics']
+        self.assertEqual(counters['admission.rejected.task_count'], 2)
+        self.assertEqual(counters['admission.rejected.dependency_edges'], 1)
+        self.assertEqual(counters['admission.admitted'], 4)
+    
+    def test_deep_dependency_chain(self):
+        """Test that cycle detection handles chains deeper than the recursion limit."""
+        from .scoring.validators import detect_circular_dependencies
+        
+        chain = [{'id': i, 'dependencies': [i + 1]} for i in range(1, 20001)]
+        self.assertEqual(detect_circular_dependencies(chain), (False, ''))
+        chain[-1]['dependencies'] = [1]
+        has_cycles, message = detect_circular_dependencies(chain)
+        self.assertTrue(has_cycles)
+        self.assertTrue(message.endswith('-> 1'))
+
+
+class AnalysisJobTests(TestCase):
+    """Test the database-backed analysis job queue"""
+    
+    def create(self, tasks=None, **fields):
+        body = {'tasks': tasks or make_tasks(30, seed=4), 'as_of': '2026-01-05', **fields}
+        response = self.client.post('/api/tasks/jobs/', json.dumps(body),
+                                    content_type='application/json')
+        return response
+    
+    def test_job_lifecycle(self):
+        """Test queueing, running and paging through a job's results."""
+        from .jobs import run_worker
+        
+        tasks = make_tasks(30, seed=4)
+        response = self.create(tasks)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job']['id']
+        self.assertEqual(response.json()['job']['status'], 'queued')
+        self.assertEqual(self.client.get(f'/api/tasks/jobs/{job_id}/results/').status_code, 409)
+        
+        run_worker(once=True)
+        job = self.client.get(f'/api/tasks/jobs/{job_id}/').json()['job']
+        self.assertEqual((job['status'], job['progress']), ('succeeded', 1.0))
+        
+        expected = self.client.post('/api/tasks/analyze/', json.dumps(
+            {'tasks': tasks, 'as_of': '2026-01-05'}), content_type='application/json').json()
+        first = self.client.get(f'/api/tasks/jobs/{job_id}/results/?limit=20').json()
+        second = self.client.get(
+            f'/api/tasks/jobs/{job_id}/results/?limit=20&cursor={first["next_cursor"]}'
+        ).json()
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(first['results'] + second['results'], expected['results'])
+    
+    def test_failed_job_reports_error(self):
+        """Test that a cyclic task list fails with the validator's message."""
+        from .jobs import run_worker
+        
+        tasks = [{'id': 1, 'title': 'A', 'dependencies': [2]},
+                 {'id': 2, 'title': 'B', 'dependencies': [1]}]
+        job_id = self.create(tasks).json()['job']['id']
+        run_worker(once=True)
+        job = self.client.get(f'/api/tasks/jobs/{job_id}/').json()['job']
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('Circular dependency', job['error'])
+    
+    def test_cancel_queued_and_running(self):
+        """Test that cancellation stops queued jobs at once and running ones at progress."""
+        from .jobs import claim_job, run_job
+        from .models import AnalysisJob
+        
+        job_id = self.create().json()['job']['id']
+        response = self.client.post(f'/api/tasks/jobs/{job_id}/cancel/')
+        self.assertEqual(response.json()['job']['status'], 'cancelled')
+        
+        job_id = self.create(make_tasks(2500, seed=1)).json()['job']['id']
+        job = claim_job()
+        self.assertEqual(str(job.pk), job_id)
+        response = self.client.post(f'/api/tasks/jobs/{job_id}/cancel/')
+        self.assertEqual(response.json()['message'], 'Cancellation requested')
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.Status.CANCELLED)
+        self.assertIsNone(job.result)
+    
+    @override_settings(TASKS_JOBS={'MAX_RUNNING': 1, 'MAX_ATTEMPTS': 2})
+    def test_bounded_concurrency_and_lost_workers(self):
+        """Test the running-job cap and requeueing of jobs with lapsed leases."""
+        from django.utils import timezone
+        from .jobs import claim_job, requeue_stale_jobs
+        from .models import AnalysisJob
+        
+        self.create()
+        self.create()
+        first = claim_job()
+        self.assertIsNotNone(first)
+        self.assertIsNone(claim_job())
+        
+        AnalysisJob.objects.filter(pk=first.pk).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_job().pk, first.pk)
+        
+        AnalysisJob.objects.filter(pk=first.pk).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        requeue_stale_jobs()
+        first.refresh_from_db()
+        self.assertEqual(first.status, AnalysisJob.Status.FAILED)
+    
+    def test_expired_jobs_are_gone(self):
+        """Test that expired jobs 404 and are purged."""
+        from django.utils import timezone
+        from .jobs import purge_expired_jobs
+        from .models import AnalysisJob
+        
+        job_id = self.create().json()['job']['id']
+        AnalysisJob.objects.filter(pk=job_id).update(expires_at=timezone.now())
+        self.assertEqual(self.client.get(f'/api/tasks/jobs/{job_id}/').status_code, 404)
+        self.assertEqual(purge_expired_jobs(), 1)
+    
+    def test_event_stream(self):
+        """Test that the event stream reports progress and ends when done."""
+        from .jobs import run_worker
+        
+        job_id = self.create().json()['job']['id']
+        run_worker(once=True)
+        
+        async def read_stream():
+            response = await AsyncClient().get(f'/api/tasks/jobs/{job_id}/events/')
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            return b''.join([chunk async for chunk in response.streaming_content]).decode()
+        
+        body = async_to_sync(read_stream)()
+        self.assertIn('event: progress', body)
+        self.assertIn('event: done', body)
+        self.assertIn('"status":"succeeded"', body)
+        
+        # Under WSGI a stream would hold a worker: clients poll instead
+        response = self.client.get(f'/api/tasks/jobs/{job_id}/events/')
+        self.assertEqual(response.status_code, 501)
+
+
+class PayloadValidationTests(TestCase):
+    """Test the single-pass request validator"""
+    
+    def test_normalizes_tasks(self):
+        """Test ids, due dates and dependencies are normalized on copies."""
+        from .scoring.payload import validate_tasks
+        
+        raw = [{'title': 'A', 'due_date': '12/31/2030'}, {'id': 'b', 'dependencies': None}]
+        tasks, errors = validate_tasks(raw)
+        self.assertEqual(errors, [])
+        self.assertEqual(tasks[0]['id'], 0)
+        self.assertEqual(tasks[0]['due_date'], date(2030, 12, 31))
+        self.assertEqual(tasks[1]['dependencies'], [])
+        self.assertNotIn('id', raw[0])
+    
+    def test_collects_errors_with_indexes(self):
+        """Test every invalid field is reported with its task index."""
+        from .scoring.payload import validate_analysis_request
+        
+        request, errors = validate_analysis_request({
+            'strategy': 'nope',
+            'tasks': [
+                {'title': 'ok', 'importance': 5},
+                'not a task',
+                {'importance': 11, 'estimated_hours': -1, 'due_date': 'soon'},
+                {'id': True, 'dependencies': [1, None]},
+            ],
+        })
+        self.assertIsNone(request)
+        self.assertEqual(
+            [(e.get('index'), e['field']) for e in errors],
+            [(None, 'strategy'), (1, None), (2, 'due_date'), (2, 'importance'),
+             (2, 'estimated_hours'), (3, 'id'), (3, 'dependencies')]
+        )
+    
+    def test_error_count_is_bounded(self):
+        """Test validation stops after MAX_ERRORS errors."""
+        from .scoring.payload import MAX_ERRORS, validate_tasks
+        
+        _, errors = validate_tasks([None] * (MAX_ERRORS * 10))
+        self.assertEqual(len(errors), MAX_ERRORS)
+    
+    def test_endpoints_return_errors(self):
+        """Test the API reports validation errors as a 400 with the error list."""
+        body = {'tasks': [{'title': 'A', 'importance': 'high'}]}
+        for url in ('/api/tasks/analyze/', '/api/tasks/suggest/', '/api/tasks/plan/'):
+            response = self.client.post(url, json.dumps(body), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['errors'][0]['field'], 'importance')
+            self.assertIn('tasks[0]', response.json()['error'])
+        
+        response = self.client.post('/api/tasks/analyze/', json.dumps([1, 2]),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        
+        result = analyze_batch([{'id': 'a', 'tasks': [{'due_date': 'soon'}]}])['results']['a']
+        self.assertEqual(result['errors'][0]['field'], 'due_date')
+
+
+class ConditionalRequestTests(TestCase):
+    """Test ETags and If-None-Match on the analysis endpoints"""
+    
+    def setUp(self):
+        cache.clear()
+        self.tasks = make_tasks(20, seed=9, today=date(2026, 1, 5))
+    
+    def post(self, url='/api/tasks/analyze/', etag=None, **extra):
+        body = {'tasks': self.tasks, 'as_of': '2026-01-05', **extra}
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.post(url, json.dumps(body), content_type='application/json', **headers)
+    
+    def test_repeat_request_is_not_modified(self):
+        """Test a matching If-None-Match gets a 304 without re-scoring."""
+        for url in ('/api/tasks/analyze/', '/api/tasks/suggest/'):
+            first = self.post(url)
+            self.assertEqual(first.status_code, 200)
+            etag = first['ETag']
+            with mock.patch('tasks.views.analyze_tasks') as analyze, \
+                    mock.patch('tasks.views.get_top_suggestions') as suggest:
+                second = self.post(url, etag=etag)
+            analyze.assert_not_called()
+            suggest.assert_not_called()
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(second['ETag'], etag)
+            self.assertEqual(self.post(url, etag=f'"other", W/{etag}').status_code, 304)
+            self.assertEqual(self.post(url, etag='"other"').status_code, 200)
+    
+    def test_etag_follows_inputs(self):
+        """Test strategy, as_of, calendar and windows all change the ETag."""
+        etags = {
+            self.post()['ETag'],
+            self.post(strategy='deadline_driven')['ETag'],
+            self.post(as_of='2026-01-06')['ETag'],
+            self.post(limit=5)['ETag'],
+            self.post(limit=6)['ETag'],
+        }
+        self.assertEqual(len(etags), 5)
+        self.assertEqual(self.post()['ETag'], self.post()['ETag'])
+        
+        calendar = WorkingCalendar.objects.create(name='team')
+        etag = self.post(calendar='team')['ETag']
+        calendar.holidays = ['2026-01-07']
+        calendar.save()
+        self.assertNotEqual(self.post(calendar='team')['ETag'], etag)
+    
+    def test_stored_etag_changes_on_writes(self):
+        """Test stored endpoint ETags are invalidated by task writes."""
+        Task.objects.create(title='One', due_date=date(2026, 1, 6), importance=5, estimated_hours=2)
+        for url in ('/api/tasks/stored/analyze/', '/api/tasks/stored/suggest/'):
+            etag = self.client.get(url, {'as_of': '2026-01-05'})['ETag']
+            response = self.client.get(url, {'as_of': '2026-01-05'}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            
+            Task.objects.create(title='Two', due_date=date(2026, 1, 7), importance=6, estimated_hours=1)
+            response = self.client.get(url, {'as_of': '2026-01-05'}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+
+class ForecastTests(TestCase):
+    """Test priority forecasts over a date range"""
+    
+    START = date(2026, 1, 5)
+    
+    def setUp(self):
+        from .scoring.payload import validate_tasks
+        
+        self.tasks, _ = validate_tasks(make_tasks(200, seed=8, today=self.START))
+    
+    def test_matches_analysis_per_day(self):
+        """Test each day's top entries equal a full analysis as of that day."""
+        from .scoring.forecast import forecast_tasks
+        
+        calendar = CompiledCalendar('team', '1111110', ['2026-01-19'])
+        for strategy in ('smart_balance', 'deadline_driven'):
+            context = AnalysisContext(self.START, calendar)
+            result = forecast_tasks(self.tasks, strategy, context=context, days=35, top=15)
+            self.assertEqual(len(result['forecast']), 35)
+            for offset, day in enumerate(result['forecast']):
+                as_of = self.START + timedelta(days=offset)
+                expected = analyze_tasks(
+                    [dict(task) for task in self.tasks], strategy,
+                    context=AnalysisContext(as_of, calendar)
+                )['results'][:15]
+                self.assertEqual(day['date'], str(as_of))
+                self.assertEqual(
+                    [(t['id'], t['priority_score']) for t in day['top']],
+                    [(t['id'], t['priority_score']) for t in expected]
+                )
+    
+    def test_trajectories_list_score_changes(self):
+        """Test trajectories start on the first day and record each change."""
+        from .scoring.forecast import forecast_tasks
+        
+        tasks = [{'id': 1, 'title': 'Soon', 'due_date': date(2026, 1, 16), 'dependencies': []}]
+        result = forecast_tasks(tasks, context=AnalysisContext(self.START), days=14, trajectory=True)
+        points = result['trajectories'][0]['points']
+        self.assertEqual(
+            [(p['date'], p['urgency']) for p in points],
+            [('2026-01-05', 10), ('2026-01-07', 25), ('2026-01-13', 50), ('2026-01-16', 100)]
+        )
+        self.assertEqual(sum(day['changed'] for day in result['forecast']), 3)
+    
+    def test_forecast_endpoint(self):
+        """Test the endpoint, its parameter checks and ETag."""
+        body = {'tasks': make_tasks(20, seed=1, today=self.START), 'as_of': '2026-01-05',
+                'days': 10, 'top': 3}
+        response = self.client.post('/api/tasks/forecast/', json.dumps(body),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['forecast']), 10)
+        self.assertEqual(len(data['forecast'][0]['top']), 3)
+        self.assertNotIn('trajectories', data)
+        
+        again = self.client.post('/api/tasks/forecast/', json.dumps(body),
+                                 content_type='application/json',
+                                 HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        
+        for bad in ({'days': 0}, {'days': 1000}, {'top': 'ten'}, {'trajectory': 'yes'}):
+            response = self.client.post('/api/tasks/forecast/', json.dumps({**body, **bad}),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400, bad)
+
+
+class LiveRankingTests(TestCase):
+    """Test live stored-task ranking streams"""
+    
+    def setUp(self):
+        cache.clear()
+        Task.objects.bulk_create([
+            Task(id=i, title=f'Task {i}', due_date=date.today() + timedelta(days=i * 5),
+                 importance=5, estimated_hours=2)
+            for i in range(1, 6)
+        ])
+    
+    def test_ranking_delta(self):
+        """Test deltas carry moved, rescored and removed entries only."""
+        from .live import ranking_delta
+        
+        def entry(task_id, score):
+            return {'id': task_id, 'title': f'Task {task_id}', 'priority_score': score,
+                    'priority_level': 'LOW'}
+        
+        previous = [entry(1, 90), entry(2, 80), entry(3, 70)]
+        current = [entry(4, 95), entry(1, 90), entry(2, 85)]
+        changes, removed = ranking_delta(previous, current)
+        self.assertEqual([(c['id'], c['rank']) for c in changes], [(4, 1), (1, 2), (2, 3)])
+        self.assertEqual(removed, [3])
+        self.assertEqual(ranking_delta(current, current), ([], []))
+    
+    def test_bounded_queue_drops_notifications(self):
+        """Test a full subscriber queue drops wake-ups instead of growing."""
+        from . import metrics
+        from .live import Subscription
+        
+        async def fill():
+            subscription = Subscription(asyncio.get_running_loop(), 2)
+            for _ in range(5):
+                subscription.offer('changed')
+            self.assertEqual(subscription.queue.qsize(), 2)
+            self.assertEqual(await subscription.wait(1), 'changed')
+            self.assertIsNone(await subscription.wait(0.01))
+        
+        metrics.reset()
+        async_to_sync(fill)()
+        self.assertEqual(metrics.snapshot()['live.dropped'], 3)
+    
+    def stream_events(self, write):
+        """The first two events of a live stream, with write() run after the first."""
+        async def read_events():
+            response = await AsyncClient().get('/api/tasks/stored/live/', {'limit': 3})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = response.streaming_content
+            
+            async def next_event():
+                while True:
+                    chunk = (await anext(stream)).decode()
+                    if chunk.startswith('event:'):
+                        name, data = chunk.split('\n')[:2]
+                        return name[len('event: '):], json.loads(data[len('data: '):])
+            
+            events = [await asyncio.wait_for(next_event(), 5)]
+            await sync_to_async(write)()
+            events.append(await asyncio.wait_for(next_event(), 5))
+            await stream.aclose()
+            return events
+        
+        return async_to_sync(read_events)()
+    
+    def promote_task_5(self):
+        Task.objects.filter(pk=5).update(importance=10, due_date=date.today())
+        bump_stored_version()
+    
+    @override_settings(TASKS_LIVE={'POLL_INTERVAL': 0, 'KEEPALIVE': 0.05})
+    def test_stream_sends_snapshot_then_deltas(self):
+        """Test the endpoint streams a snapshot, then changes after a write."""
+        from .live import broadcaster
+        
+        def write():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.promote_task_5()
+        
+        (snapshot_name, snapshot), (delta_name, delta) = self.stream_events(write)
+        self.assertEqual(snapshot_name, 'snapshot')
+        self.assertEqual([t['id'] for t in snapshot['results']], [1, 2, 3])
+        self.assertEqual(delta_name, 'ranking')
+        self.assertEqual(delta['changes'][0]['id'], 5)
+        self.assertEqual(delta['changes'][0]['rank'], 1)
+        self.assertEqual(delta['removed'], [3])
+        self.assertEqual(len(broadcaster), 0)
+    
+    @override_settings(TASKS_LIVE={'POLL_INTERVAL': 0.05, 'KEEPALIVE': 0.05})
+    def test_poller_sees_writes_from_other_processes(self):
+        """Test a version change without a local notification still reaches streams."""
+        _, (delta_name, delta) = self.stream_events(self.promote_task_5)
+        self.assertEqual(delta_name, 'ranking')
+        self.assertEqual(delta['changes'][0]['id'], 5)
+    
+    def test_requires_asgi(self):
+        """Test WSGI requests are refused instead of holding a thread."""
+        self.assertEqual(self.client.get('/api/tasks/stored/live/').status_code, 501)
+
+
+class ReachabilityTests(TestCase):
+    """Test the dependency reachability index and graph query endpoints"""
+    
+    def setUp(self):
+        # 1 <- 2 <- 3 <- 4, 2 <- 5 (5 waits on 2), 6 alone
+        for task_id, deps in ((1, []), (2, [1]), (3, [2]), (4, [3]), (5, [2]), (6, [])):
+            Task.objects.create(id=task_id, title=f'Task {task_id}', due_date=date(2026, 1, 5),
+                                dependencies=deps)
+    
+    def test_matches_brute_force(self):
+        """Test reachable() against a plain search on random graphs, cycles included."""
+        import random
+        from .reachability import ReachabilityIndex
+        
+        rng = random.Random(3)
+        for _ in range(50):
+            n = rng.randint(2, 25)
+            edges = {(rng.randrange(n), rng.randrange(n)) for _ in range(rng.randint(0, 35))}
+            edges = {(a, b) for a, b in edges if a != b}
+            index = ReachabilityIndex(range(n), edges)
+            for source in range(n):
+                reached, stack = set(), [source]
+                while stack:
+                    node = stack.pop()
+                    for task_id, depends_on in edges:
+                        if depends_on == node and task_id not in reached:
+                            reached.add(task_id)
+                            stack.append(task_id)
+                for target in range(n):
+                    if target != source:
+                        self.assertEqual(index.reachable(source, target), target in reached)
+                self.assertEqual({i for i, _ in index.descendants(source)}, reached - {source})
+    
+    def test_index_follows_writes_in_place(self):
+        """Test task saves and deletes update the index without a rebuild."""
+        from .reachability import get_index
+        
+        index = get_index()
+        self.assertTrue(index.reachable(1, 4))
+        self.assertFalse(index.reachable(6, 1))
+        
+        Task.objects.filter(pk=1).update(dependencies=[6])
+        task = Task.objects.get(pk=1)
+        task.save()
+        self.assertIs(get_index(), index)
+        self.assertTrue(index.reachable(6, 4))
+        
+        Task.objects.get(pk=3).delete()
+        self.assertIs(get_index(), index)
+        self.assertFalse(index.reachable(2, 4))
+        self.assertEqual(sorted(i for i, _ in index.descendants(1)), [2, 5])
+        
+        # A cycle is not applied in place: the next query rebuilds
+        task = Task.objects.get(pk=6)
+        task.dependencies = [5]
+        task.save()
+        rebuilt = get_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertTrue(rebuilt.reachable(5, 1) and rebuilt.reachable(1, 5))
+    
+    def test_graph_endpoints(self):
+        """Test descendants, ancestors and reachable endpoints."""
+        data = self.client.get('/api/tasks/stored/1/descendants/').json()
+        self.assertEqual(data['total'], 4)
+        self.assertEqual([(r['id'], r['depth']) for r in data['results']][:1], [(2, 1)])
+        self.assertEqual({r['id'] for r in data['results']}, {2, 3, 4, 5})
+        
+        data = self.client.get('/api/tasks/stored/4/ancestors/', {'limit': 2}).json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual([r['id'] for r in data['results']], [3, 2])
+        
+        self.assertTrue(self.client.get('/api/tasks/stored/reachable/', {'from': 1, 'to': 5}).json()['reachable'])
+        self.assertFalse(self.client.get('/api/tasks/stored/reachable/', {'from': 5, 'to': 1}).json()['reachable'])
+        self.assertEqual(self.client.get('/api/tasks/stored/99/descendants/').status_code, 404)
+        self.assertEqual(self.client.get('/api/tasks/stored/reachable/', {'from': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/tasks/stored/reachable/', {'from': 1, 'to': 99}).status_code, 404)
+    
+    def test_queries_wait_for_updates(self):
+        """Test query_index() never runs while apply_changes() holds the index."""
+        import threading
+        from . import reachability
+        
+        index = reachability.get_index()
+        results = []
+        # The thread has no test database connection: keep the index current
+        with mock.patch('tasks.reachability.stored_version', return_value=index.version):
+            thread = threading.Thread(target=lambda: results.append(
+                reachability.query_index(lambda index: index.reachable(1, 4))
+            ))
+            with reachability._lock:
+                # A write is being applied: the query must wait for it
+                thread.start()
+                thread.join(0.2)
+                self.assertEqual(results, [])
+            thread.join()
+        self.assertEqual(results, [True])
+
+
+class ExportTests(TestCase):
+    """Test CSV and Parquet exports of rankings"""
+    
+    def setUp(self):
+        tasks = make_tasks(40, seed=4, today=date(2026, 1, 5))
+        Task.objects.bulk_create([
+            Task(id=task['id'] + 1, title=task['title'], due_date=task['due_date'],
+                 importance=task['importance'], estimated_hours=task['estimated_hours'],
+                 dependencies=[dep + 1 for dep in task['dependencies']])
+            for task in tasks
+        ])
+        sync_dependency_edges(Task.objects.all())
+    
+    def read_csv(self, response):
+        import csv
+        import io
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.DictReader(io.StringIO(content)))
+    
+    def test_stored_csv_matches_ranking(self):
+        """Test stored exports list the /stored/analyze/ ranking, chunk boundaries included."""
+        for mode in ('direct', 'transitive'):
+            params = {'as_of': '2026-01-05', 'dependency_mode': mode}
+            expected = self.client.get(
+                '/api/tasks/stored/analyze/', {**params, 'limit': 100}
+            ).json()['results']
+            with mock.patch('tasks.export.CHUNK_SIZE', 7):
+                response = self.client.get('/api/tasks/stored/export/csv/', params)
+                rows = self.read_csv(response)
+            
+            self.assertEqual(response['Content-Disposition'], 'attachment; filename="tasks-2026-01-05.csv"')
+            self.assertEqual([int(row['rank']) for row in rows], list(range(1, 41)))
+            self.assertEqual([int(row['id']) for row in rows], [task['id'] for task in expected])
+            self.assertEqual([int(row['priority_score']) for row in rows],
+                             [task['priority_score'] for task in expected])
+            self.assertEqual(rows[0]['explanation'], expected[0]['explanation'])
+    
+    def test_posted_csv(self):
+        """Test exports of posted tasks: CSV quoting, string ids and errors."""
+        tasks = [
+            {'id': 'a', 'title': 'Plan, then "ship"', 'due_date': '2026-03-01'},
+            {'id': 2, 'title': 'Fix bug', 'due_date': '2026-01-01', 'dependencies': ['a']},
+        ]
+        rows = self.read_csv(self.client.post('/api/tasks/export/csv/', {
+            'tasks': tasks, 'as_of': '2026-01-05'
+        }, content_type='application/json'))
+        self.assertEqual([row['id'] for row in rows], ['2', 'a'])
+        self.assertEqual(rows[1]['title'], 'Plan, then "ship"')
+        
+        response = self.client.post('/api/tasks/export/xml/', {'tasks': tasks},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Unknown export format')
+        
+        tasks[0]['dependencies'] = [2]
+        response = self.client.post('/api/tasks/export/csv/', {'tasks': tasks},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Circular dependency detected')
+    
+    def test_stored_cycle_rejected(self):
+        """Test a stored dependency cycle fails the export like /stored/analyze/."""
+        waiting = Task.objects.exclude(dependencies=[]).order_by('id').first()
+        blocker = Task.objects.get(pk=waiting.dependencies[0])
+        blocker.dependencies = [waiting.id]
+        blocker.save()
+        
+        response = self.client.get('/api/tasks/stored/export/csv/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Circular dependency detected')
+        self.assertIn(f'{waiting.id} -> {blocker.id}', response.json()['error'])
+    
+    @unittest.skipIf(pyarrow is None, 'pyarrow not installed')
+    def test_parquet_row_groups(self):
+        """Test Parquet exports are written in row groups of CHUNK_SIZE rows."""
+        import io
+        import pyarrow.parquet as pq
+        
+        with mock.patch('tasks.export.CHUNK_SIZE', 16):
+            response = self.client.get('/api/tasks/stored/export/parquet/', {'as_of': '2026-01-05'})
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        parquet = pq.ParquetFile(io.BytesIO(content))
+        self.assertEqual(parquet.num_row_groups, 3)
+        
+        expected = self.client.get(
+            '/api/tasks/stored/analyze/', {'as_of': '2026-01-05', 'limit': 100}
+        ).json()['results']
+        table = parquet.read().to_pylist()
+        self.assertEqual([row['id'] for row in table], [task['id'] for task in expected])
+        self.assertEqual(table[0]['priority_level'], expected[0]['priority_level'])
+    
+    def test_parquet_needs_pyarrow(self):
+        """Test Parquet exports answer 501 without pyarrow."""
+        with mock.patch('tasks.export.pyarrow', None):
+            response = self.client.get('/api/tasks/stored/export/parquet/')
+        self.assertEqual(response.status_code, 501)
+    
+    def test_export_command(self):
+        """Test the export_tasks management command writes the stored ranking."""
+        import io
+        from django.core.management import call_command
+        
+        out = io.StringIO()
+        call_command('export_tasks', '--as-of', '2026-01-05', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 41)
+        self.assertTrue(lines[0].startswith('rank,id,title'))
+        
+        expected = self.client.get(
+            '/api/tasks/stored/analyze/', {'as_of': '2026-01-05', 'limit': 1}
+        ).json()['results'][0]
+        self.assertTrue(lines[1].startswith(f'1,{expected["id"]},'))
+
+
+class RankingDiffTests(TestCase):
+    """Test ranking diffs between two analyses"""
+    
+    def setUp(self):
+        self.as_of = date(2026, 1, 5)
+        self.tasks = make_tasks(60, seed=5, today=self.as_of)
+    
+    def side(self, tasks=None, strategy='smart_balance', dependency_mode='direct', as_of=None):
+        return {
+            'tasks': self.tasks if tasks is None else tasks,
+            'strategy': strategy,
+            'dependency_mode': dependency_mode,
+            'context': AnalysisContext(as_of or self.as_of),
+        }
+    
+    def test_rank_scores_match_analysis(self):
+        """Test score and rank arrays rank tasks exactly like analyze_tasks."""
+        from .scoring.diff import rank_scores
+        
+        for mode in ('direct', 'transitive', 'critical_path'):
+            for strategy in get_valid_strategies():
+                results = analyze_tasks(self.tasks, strategy, mode, AnalysisContext(self.as_of))['results']
+                scores, ranks = rank_scores(self.tasks, strategy, mode, AnalysisContext(self.as_of))
+                order = sorted(range(len(ranks)), key=ranks.__getitem__)
+                self.assertEqual([self.tasks[i]['id'] for i in order], [r['id'] for r in results])
+                self.assertEqual([scores[i] for i in order], [r['priority_score'] for r in results])
+    
+    def test_diff_matches_two_analyses(self):
+        """Test the diff lists exactly the tasks whose rank, score or level changed."""
+        from .scoring.diff import diff_rankings
+        
+        pairs = [
+            (self.side(), self.side(as_of=self.as_of + timedelta(days=4))),
+            (self.side(), self.side(strategy='deadline_driven')),
+            (self.side(), self.side(dependency_mode='transitive')),
+        ]
+        for before, after in pairs:
+            diff = diff_rankings(before, after)
+            old = {r['id']: (rank, r) for rank, r in enumerate(analyze_tasks(
+                self.tasks, before['strategy'], before['dependency_mode'], before['context']
+            )['results'], 1)}
+            expected = []
+            for rank, r in enumerate(analyze_tasks(
+                    self.tasks, after['strategy'], after['dependency_mode'], after['context']
+            )['results'], 1):
+                old_rank, o = old[r['id']]
+                if (old_rank, o['priority_score'], o['priority_level']) != (rank, r['priority_score'], r['priority_level']):
+                    expected.append((r['id'], old_rank, rank, o['priority_score'], r['priority_score']))
+            
+            self.assertTrue(diff['success'])
+            self.assertEqual(
+                [(c['id'], c['from_rank'], c['to_rank'], c['from_score'], c['to_score']) for c in diff['changes']],
+                expected
+            )
+            self.assertEqual(diff['unchanged'], 60 - len(expected))
+    
+    def test_thresholds_and_snapshots(self):
+        """Test thresholds suppress small moves; snapshots report added and removed tasks."""
+        from .scoring.diff import diff_rankings
+        
+        before, after = self.side(), self.side(as_of=self.as_of + timedelta(days=4))
+        everything = diff_rankings(before, after)['changes']
+        large = diff_rankings(before, after, min_rank_change=10, min_score_change=1000)['changes']
+        self.assertLess(len(large), len(everything))
+        for change in large:
+            self.assertTrue(abs(change['rank_change']) >= 10 or change['from_level'] != change['to_level'])
+        
+        snapshot = [dict(task) for task in self.tasks if task['id'] != 0]
+        snapshot.append({'id': 'new', 'title': 'New task', 'due_date': '2026-01-05', 'importance': 10})
+        diff = diff_rankings(before, self.side(tasks=snapshot))
+        self.assertEqual([entry['id'] for entry in diff['added']], ['new'])
+        self.assertEqual([entry['id'] for entry in diff['removed']], [0])
+        
+        duplicated = [dict(task) for task in self.tasks] + [dict(self.tasks[3])]
+        self.assertEqual(diff_rankings(before, self.side(tasks=duplicated))['message'], 'Duplicate task id')
+    
+    def test_diff_endpoint(self):
+        """Test the diff endpoint: one snapshot across two days, and validation."""
+        body = {
+            'tasks': [
+                {'id': 1, 'title': 'Later', 'due_date': '2026-01-20', 'importance': 9},
+                {'id': 2, 'title': 'Soon', 'due_date': '2026-01-07', 'importance': 4},
+            ],
+            'as_of': '2026-01-05',
+            'to': {'as_of': '2026-01-16'},
+        }
+        response = self.client.post('/api/tasks/diff/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['from']['as_of'], data['to']['as_of']), ('2026-01-05', '2026-01-16'))
+        self.assertIn(1, [c['id'] for c in data['changes']])
+        self.assertTrue(response.has_header('ETag'))
+        
+        body['min_rank_change'] = 0
+        response = self.client.post('/api/tasks/diff/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        
+        body['min_rank_change'] = 1
+        body['to'] = {'strategy': 'nope'}
+        response = self.client.post('/api/tasks/diff/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['side'], 'to')
+
+
+class TaskIdentityTests(TestCase):
+    """Test dependency reference resolution through the task index"""
+    
+    def test_id_zero_is_resolved(self):
+        """Test a dependency on id 0 counts and can close a cycle."""
+        from .scoring.identity import TaskIndex
+        
+        tasks = [
+            {'id': 0, 'title': 'Root', 'dependencies': []},
+            {'id': 1, 'title': 'Child', 'dependencies': [0]},
+        ]
+        self.assertEqual(TaskIndex(tasks).dependencies, [(), [0]])
+        self.assertEqual(score_dependencies(tasks, 'direct')[0], calculate_dependencies(1))
+        
+        tasks[0]['dependencies'] = [1]
+        result = analyze_tasks(tasks)
+        self.assertFalse(result['success'])
+        self.assertIn('0 -> 1 -> 0', result['error'])
+    
+    def test_resolution_order(self):
+        """Test references match ids, then external ids, then titles."""
+        from .scoring.identity import TaskIndex
+        
+        tasks = [
+            {'id': 1, 'title': 'Design', 'external_id': 'JIRA-7'},
+            {'id': 2, 'title': '1'},
+            {'id': 3, 'title': 'Build', 'dependencies': [1, 'JIRA-7', 'Design', 2]},
+            {'id': 4, 'title': 'Ship', 'dependencies': ['Build']},
+        ]
+        index = TaskIndex(tasks)
+        self.assertEqual(index.dependencies[2], [0, 1])
+        self.assertEqual(index.dependencies[3], [2])
+        self.assertEqual(index.report()['dangling_count'], 0)
+    
+    def test_report(self):
+        """Test dangling, ambiguous and duplicate references are reported."""
+        from .scoring.identity import TaskIndex
+        
+        tasks = [
+            {'id': 1, 'title': 'Dup'},
+            {'id': 2, 'title': 'Dup'},
+            {'id': 3, 'title': 'Other', 'dependencies': [99, 'Dup', 1]},
+            {'id': 3, 'title': 'Again'},
+        ]
+        index = TaskIndex(tasks)
+        self.assertEqual(index.dependencies[2], [0])
+        report = index.report()
+        self.assertEqual(report['dangling'], [{'task': 3, 'dependency': 99}])
+        self.assertEqual(report['ambiguous'], [{'task': 3, 'dependency': 'Dup', 'matches': [1, 2]}])
+        self.assertEqual(report['duplicate_ids'], [{'id': 3, 'count': 2}])
+        
+        tasks = [{'id': i, 'dependencies': [-1 - i]} for i in range(5)]
+        report = TaskIndex(tasks).report(limit=2)
+        self.assertEqual(len(report['dangling']), 2)
+        self.assertEqual(report['dangling_count'], 5)
+    
+    def test_graph_matches_index(self):
+        """Test the graph and the cycle check share the index's resolution."""
+        tasks = make_tasks(300, seed=9)
+        graph = DependencyGraph(tasks)
+        for i, task in enumerate(tasks):
+            for dep in task['dependencies']:
+                self.assertIn(i, graph.dependents[graph.index.node_of[dep]])
+        self.assertIsNone(graph.index.cycle())
+    
+    def test_analyze_response_references(self):
+        """Test /analyze/ reports dangling references."""
+        body = {'tasks': [
+            {'id': 1, 'title': 'A', 'due_date': '2026-01-10', 'external_id': 'X-1'},
+            {'id': 2, 'title': 'B', 'due_date': '2026-01-10', 'dependencies': ['X-1', 42]},
+        ]}
+        response = self.client.post('/api/tasks/analyze/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        references = response.json()['references']
+        self.assertEqual(references['dangling'], [{'task': 2, 'dependency': 42}])
+        
+        body['tasks'][0]['external_id'] = ''
+        response = self.client.post('/api/tasks/analyze/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class RecurringTaskTests(TestCase):
+    """Test recurring task templates expanded within their horizon"""
+    
+    def setUp(self):
+        self.as_of = date(2026, 1, 7)
+    
+    def templates(self, seed, count):
+        import random
+        from .scoring.payload import validate_recurring
+        
+        rng = random.Random(seed)
+        templates, errors = validate_recurring([
+            {
+                'id': f't{i}',
+                'title': f'Chore {i}',
+                'frequency': rng.choice(['daily', 'weekly']),
+                'interval': rng.randint(1, 3),
+                'starts_on': str(date(2026, 1, 1) + timedelta(days=rng.randint(0, 20))),
+                'importance': rng.randint(1, 10),
+                'estimated_hours': rng.choice([0.5, 1, 3, 8]),
+                'horizon': rng.randint(0, 12),
+            }
+            for i in range(count)
+        ])
+        self.assertEqual(errors, [])
+        return templates
+    
+    def test_occurrence_dates(self):
+        """Test weekly and daily rules start at the first date they need."""
+        from .scoring.recurrence import occurrence_dates
+        
+        weekly = {'frequency': 'weekly', 'interval': 2, 'weekdays': '1010000',
+                  'starts_on': date(2026, 1, 1)}
+        dates = occurrence_dates(weekly, self.as_of)
+        self.assertEqual([next(dates) for _ in range(4)], [
+            date(2026, 1, 12), date(2026, 1, 14), date(2026, 1, 26), date(2026, 1, 28)
+        ])
+        
+        daily = {'frequency': 'daily', 'interval': 3, 'starts_on': date(2026, 1, 1),
+                 'ends_on': date(2026, 1, 16)}
+        self.assertEqual(list(occurrence_dates(daily, self.as_of)), [
+            date(2026, 1, 7), date(2026, 1, 10), date(2026, 1, 13), date(2026, 1, 16)
+        ])
+        
+        plain = {'frequency': 'weekly', 'starts_on': date(2026, 1, 2)}
+        self.assertEqual(list(occurrence_dates(plain, self.as_of, date(2026, 1, 20))),
+                         [date(2026, 1, 9), date(2026, 1, 16)])
+    
+    def test_suggestions_match_analysis(self):
+        """Test bounded suggestions equal the top of a fully expanded analysis."""
+        from .scoring.analyzer import get_top_suggestions
+        from .scoring.payload import validate_tasks
+        from .scoring.recurrence import expand
+        
+        for seed in range(25):
+            templates = self.templates(seed, 1 + seed % 6)
+            tasks, _ = validate_tasks(make_tasks(seed % 7, seed=seed, today=self.as_of))
+            strategy = get_valid_strategies()[seed % len(get_valid_strategies())]
+            context = AnalysisContext(self.as_of)
+            full = analyze_tasks(tasks + list(expand(templates, self.as_of)), strategy,
+                                 'direct', context)['results'][:3]
+            suggestions = get_top_suggestions(tasks, strategy, 3, 'direct', context,
+                                              templates)['suggestions']
+            self.assertEqual(
+                [(r['title'], r['due_date'], r['priority_score']) for r in full],
+                [(s['title'], s['due_date'], s['priority_score']) for s in suggestions]
+            )
+    
+    def test_forecast_occurrences_join_and_leave(self):
+        """Test each forecast day ranks the occurrences seen from that day."""
+        from .scoring.forecast import forecast_tasks
+        from .scoring.payload import validate_tasks
+        from .scoring.recurrence import expand
+        
+        for seed in range(6):
+            templates = self.templates(seed, 3)
+            tasks, _ = validate_tasks(make_tasks(6, seed=seed, today=self.as_of))
+            result = forecast_tasks(tasks, context=AnalysisContext(self.as_of), days=15, top=5,
+                                    trajectory=True, recurring=templates)
+            for offset, day in enumerate(result['forecast']):
+                as_of = self.as_of + timedelta(days=offset)
+                expected = analyze_tasks(
+                    tasks + list(expand(templates, as_of)), context=AnalysisContext(as_of)
+                )['results'][:5]
+                self.assertEqual([(r['id'], r['priority_score']) for r in expected],
+                                 [(e['id'], e['priority_score']) for e in day['top']])
+    
+    def test_analyze_view(self):
+        """Test /analyze/ ranks occurrences and reports invalid templates."""
+        body = {
+            'tasks': [{'id': 1, 'title': 'Report', 'due_date': '2026-01-20'}],
+            'recurring': [{'id': 'standup', 'title': 'Standup notes', 'frequency': 'daily',
+                           'starts_on': '2026-01-01', 'horizon': 2}],
+            'as_of': '2026-01-07',
+        }
+        response = self.client.post('/api/tasks/analyze/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        ids = {r['id'] for r in response.json()['results']}
+        self.assertEqual(ids, {1, 'standup@2026-01-07', 'standup@2026-01-08', 'standup@2026-01-09'})
+        
+        body['tasks'] = []
+        response = self.client.post('/api/tasks/suggest/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['suggestions'][0]['due_date'], '2026-01-07')
+        
+        body['recurring'][0]['frequency'] = 'monthly'
+        response = self.client.post('/api/tasks/analyze/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['error'].startswith('recurring[0]: frequency'))
+    
+    def test_stored_templates(self):
+        """Test stored templates join stored rankings and invalidate their ETags."""
+        from .models import RecurringTask
+        
+        Task.objects.create(title='Stored', due_date=date(2026, 1, 30), importance=3)
+        url = '/api/tasks/stored/analyze/?as_of=2026-01-07'
+        etag = self.client.get(url)['ETag']
+        
+        template = RecurringTask.objects.create(
+            title='Water plants', frequency='weekly', weekdays='1000100',
+            starts_on=date(2026, 1, 1), importance=9, horizon=7
+        )
+        response = self.client.get(url)
+        self.assertNotEqual(response['ETag'], etag)
+        ids = [r['id'] for r in response.json()['results']]
+        self.assertEqual(set(ids[:2]), {f'recurring-{template.pk}@2026-01-09',
+                                        f'recurring-{template.pk}@2026-01-12'})
+        self.assertEqual(len(ids), 3)
+        
+        data = self.client.get('/api/tasks/stored/suggest/?as_of=2026-01-07&count=2').json()
+        self.assertEqual([s['id'] for s in data['suggestions']], ids[:2])
+
+
+class BulkMutationTests(TestCase):
+    """Test set-based bulk updates and deletes of stored tasks"""
+    
+    def setUp(self):
+        # 2 and 3 wait on 1
+        for task_id, deps in ((1, []), (2, [1]), (3, [1]), (4, [])):
+            Task.objects.create(id=task_id, title=f'Task {task_id}', due_date=date(2026, 1, 5),
+                                importance=task_id, dependencies=deps)
+    
+    def post(self, body):
+        return self.client.post('/api/tasks/stored/bulk/', body, content_type='application/json')
+    
+    def test_update_by_ids(self):
+        """Test set changes the listed tasks only and reports missing ids."""
+        response = self.post({'ids': [1, 2, 99], 'set': {'importance': 9, 'title': 'Renamed'}})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['matched'], data['missing'], data['deleted']), (2, [99], False))
+        self.assertEqual(data['message'], 'Updated 2 tasks')
+        
+        tasks = {task.id: task for task in Task.objects.all()}
+        self.assertEqual([tasks[i].importance for i in (1, 2, 3, 4)], [9, 9, 3, 4])
+        self.assertEqual(tasks[2].title, 'Renamed')
+        self.assertEqual(tasks[3].title, 'Task 3')
+    
+    def test_filter_and_shift_due_date(self):
+        """Test a filter selects tasks and shift_due_date moves each one's own date."""
+        Task.objects.filter(pk=4).update(due_date=date(2026, 3, 1))
+        data = self.post({'filter': {'importance__gte': 3}, 'shift_due_date': -5}).json()
+        self.assertEqual(data['matched'], 2)
+        
+        dates = dict(Task.objects.values_list('id', 'due_date'))
+        self.assertEqual(dates, {1: date(2026, 1, 5), 2: date(2026, 1, 5),
+                                 3: date(2025, 12, 31), 4: date(2026, 2, 24)})
+    
+    def test_dependencies_sync_edges_and_counts(self):
+        """Test a new dependencies list rebuilds edges, blocked counts and the index."""
+        from .reachability import get_index
+        
+        self.assertTrue(get_index().reachable(1, 2))
+        self.post({'filter': {'id__in': [2, 3]}, 'set': {'dependencies': [4]}})
+        
+        self.assertEqual(sorted(TaskDependency.objects.values_list('task_id', 'depends_on')),
+                         [(2, 4), (3, 4)])
+        counts = dict(Task.objects.values_list('id', 'blocked_count'))
+        self.assertEqual((counts[1], counts[4]), (0, 2))
+        self.assertEqual(Task.objects.get(pk=3).dependencies, [4])
+        index = get_index()
+        self.assertFalse(index.reachable(1, 2))
+        self.assertTrue(index.reachable(4, 3))
+    
+    def test_delete_recounts_blocked_tasks(self):
+        """Test delete removes tasks and edges and recounts what they waited on."""
+        data = self.post({'ids': [2], 'delete': True}).json()
+        self.assertEqual((data['message'], data['deleted']), ('Deleted 1 tasks', True))
+        
+        self.assertFalse(Task.objects.filter(pk=2).exists())
+        self.assertEqual(list(TaskDependency.objects.values_list('task_id', 'depends_on')),
+                         [(3, 1)])
+        self.assertEqual(Task.objects.get(pk=1).blocked_count, 1)
+    
+    def test_delete_does_not_load_tasks(self):
+        """Test a bulk delete never selects whole Task rows."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.post({'ids': [2, 3, 4], 'delete': True})
+        selects = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('SELECT') and '"tasks_task"."title"' in query['sql']]
+        self.assertEqual(selects, [])
+        self.assertEqual(list(Task.objects.values_list('id', flat=True)), [1])
+        self.assertEqual(Task.objects.get(pk=1).blocked_count, 0)
+    
+    def test_filter_delete_needs_confirm_count(self):
+        """Test a filter delete without the matched count deletes nothing."""
+        body = {'filter': {'id__gte': 0}, 'delete': True}
+        for confirm_count in (None, 3):
+            if confirm_count is not None:
+                body['confirm_count'] = confirm_count
+            response = self.post(body)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()['matched'], 4)
+        self.assertEqual(Task.objects.count(), 4)
+        
+        body['confirm_count'] = 4
+        self.assertEqual(self.post(body).status_code, 200)
+        self.assertEqual(Task.objects.count(), 0)
+    
+    def test_shift_out_of_range(self):
+        """Test a shift past the last representable date is a 400 that changes nothing."""
+        Task.objects.filter(pk=4).update(due_date=date(9999, 12, 1))
+        response = self.post({'filter': {'id__gte': 3}, 'shift_due_date': 60})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('9999-12-01', response.json()['error'])
+        self.assertEqual(Task.objects.get(pk=3).due_date, date(2026, 1, 5))
+        
+        self.assertEqual(self.post({'ids': [1, 2], 'shift_due_date': 60}).status_code, 200)
+    
+    def test_one_version_bump(self):
+        """Test a bulk change bumps the stored version once, whatever its size."""
+        from .ranking import stored_tasks_changed
+        
+        changes = []
+        
+        def record(sender, **kwargs):
+            changes.append(kwargs)
+        
+        stored_tasks_changed.connect(record)
+        try:
+            before = self.client.get('/api/tasks/stored/analyze/')['ETag']
+            self.post({'filter': {'importance__lte': 3}, 'set': {'dependencies': [4]}})
+            self.post({'ids': [1, 2, 3], 'delete': True})
+        finally:
+            stored_tasks_changed.disconnect(record)
+        
+        self.assertEqual(len(changes), 2)
+        self.assertNotEqual(self.client.get('/api/tasks/stored/analyze/')['ETag'], before)
+        self.assertEqual(list(Task.objects.values_list('id', flat=True)), [4])
+    
+    def test_invalid_requests(self):
+        """Test bad bodies are rejected with field errors and change nothing."""
+        for body, field in (
+            ({'set': {'importance': 5}}, 'ids'),
+            ({'ids': [1], 'set': {'importance': 11}}, 'set.importance'),
+            ({'ids': [1], 'set': {'id': 3}}, 'set.id'),
+            ({'filter': {'notes__lt': 1}, 'delete': True}, 'filter.notes__lt'),
+            ({'filter': {'due_date__range': ['2026-01-01']}, 'delete': True},
+             'filter.due_date__range'),
+            ({'ids': [1], 'delete': True, 'shift_due_date': 1}, 'delete'),
+            ({'ids': [1]}, 'set'),
+        ):
+            response = self.post(body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(response.json()['errors'][0]['field'], field)
+        self.assertEqual(Task.objects.count(), 4)
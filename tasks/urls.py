@@ -12,4 +12,99 @@ urlpatterns = [
         views.suggest_tasks_view,
         name='suggest_tasks'
     ),
+    path(
+        'analyze-batch/',
+        views.analyze_batch_view,
+        name='analyze_batch'
+    ),
+    path(
+        'plan/',
+        views.plan_tasks_view,
+        name='plan_tasks'
+    ),
+    path(
+        'forecast/',
+        views.forecast_tasks_view,
+        name='forecast_tasks'
+    ),
+    path(
+        'diff/',
+        views.diff_tasks_view,
+        name='diff_tasks'
+    ),
+    path(
+        'export/<str:export_format>/',
+        views.export_tasks_view,
+        name='export_tasks'
+    ),
+    path(
+        'stored/suggest/',
+        views.suggest_stored_tasks_view,
+        name='suggest_stored_tasks'
+    ),
+    path(
+        'stored/analyze/',
+        views.analyze_stored_tasks_view,
+        name='analyze_stored_tasks'
+    ),
+    path(
+        'stored/export/<str:export_format>/',
+        views.export_stored_tasks_view,
+        name='export_stored_tasks'
+    ),
+    path(
+        'stored/live/',
+        views.live_stored_tasks_view,
+        name='live_stored_tasks'
+    ),
+    path(
+        'stored/<int:task_id>/descendants/',
+        views.task_descendants_view,
+        name='task_descendants'
+    ),
+    path(
+        'stored/<int:task_id>/ancestors/',
+        views.task_ancestors_view,
+        name='task_ancestors'
+    ),
+    path(
+        'stored/reachable/',
+        views.task_reachable_view,
+        name='task_reachable'
+    ),
+    path(
+        'stored/bulk/',
+        views.bulk_tasks_view,
+        name='bulk_tasks'
+    ),
+    path(
+        'jobs/',
+        views.create_job_view,
+        name='create_job'
+    ),
+    path(
+        'jobs/<uuid:job_id>/',
+        views.job_view,
+        name='job_detail'
+    ),
+    path(
+        'jobs/<uuid:job_id>/cancel/',
+        views.cancel_job_view,
+        name='cancel_job'
+    ),
+    path(
+        'jobs/<uuid:job_id>/results/',
+        views.job_results_view,
+        name='job_results'
+    ),
+    path(
+        'jobs/<uuid:job_id>/events/',
+        views.job_events_view,
+        name='job_events'
+    ),
+    path(
+        'metrics/',
+        views.metrics_view,
+        name='metrics'
+    ),
 ]
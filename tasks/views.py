@@ -1,9 +1,83 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import APIException
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 import json
-from .scoring import analyze_tasks, get_top_suggestions, get_valid_strategies
-from .scoring.validators import detect_circular_dependencies
+from datetime import date
+from backend.routers import uses_analysis_reads
+from .scoring import (
+    analyze_tasks, analyze_batch, get_top_suggestions,
+    get_valid_strategies, get_valid_dependency_modes
+)
+from .scoring.planner import plan_tasks
+from .scoring.forecast import DEFAULT_DAYS, DEFAULT_TOP, MAX_DAYS, MAX_TOP, forecast_tasks
+from .scoring.diff import MAX_CHANGE_THRESHOLD, diff_rankings
+from .calendars import get_calendar
+from .stored import rank_stored_tasks, suggest_stored_tasks
+from .export import CONTENT_TYPES, EXPORT_FORMATS, export_chunks, format_error, stored_export
+from .ranking import (
+    DEFAULT_PAGE_SIZE, get_ranking, parse_limit, ranking_key, set_ranking, stored_version,
+    window
+)
+from .conditional import etag_for, etag_matches, not_modified
+from .scoring.context import AnalysisContext
+from .scoring.payload import error_message, validate_analysis_request
+from .scoring.recurrence import expand
+from .scoring.validators import detect_circular_dependencies, parse_as_of
+from .admission import check_task_limits, get_admission_settings
+from .bulk import CONFIRMATION_REQUIRED, apply_bulk, parse_bulk_request
+from .jobs import (
+    cancel_job, enqueue_job, get_job, job_events, job_result, job_summary
+)
+from .live import broadcaster, ranking_events
+from .reachability import query_index
+from .models import Task
+from . import metrics
+
+
+def _validated_request(body, **extra):
+    """
+    Admission limits, then the request validator (tasks/scoring/payload.py).
+    
+    Returns (request, None) with the validated request, or (None, response)
+    with the error response; `extra` is added to error responses.
+    """
+    tasks = body.get('tasks') if isinstance(body, dict) else None
+    if isinstance(tasks, list):
+        limit_error = check_task_limits(tasks)
+        if limit_error:
+            return None, Response({
+                'success': False,
+                'message': 'Request too large',
+                'error': limit_error,
+                **extra
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    
+    data, errors = validate_analysis_request(body)
+    if errors:
+        return None, Response({
+            'success': False,
+            'message': 'Invalid request',
+            'error': error_message(errors),
+            'errors': errors,
+            **extra
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return data, None
+
+
+def _with_occurrences(data, as_of):
+    """
+    The request's tasks, then the occurrences of its recurring templates
+    seen from as_of (the tasks list itself when there are none).
+    """
+    if not data['recurring']:
+        return data['tasks']
+    return data['tasks'] + list(expand(data['recurring'], as_of))
 
 
 @api_view(['POST'])
@@ -24,15 +98,55 @@ def analyze_tasks_view(request):
                 "dependencies": []
             }
         ],
-        "strategy": "smart_balance"
+        "strategy": "smart_balance",
+        "dependency_mode": "direct",
+        "calendar": "default",
+        "as_of": "2025-11-28",
+        "recurring": [
+            {
+                "id": "standup-notes",
+                "title": "Write standup notes",
+                "frequency": "daily",
+                "starts_on": "2025-11-01",
+                "importance": 4,
+                "estimated_hours": 0.5,
+                "horizon": 3
+            }
+        ]
     }
     
+    dependency_mode is optional: "direct" (default), "transitive" or
+    "critical_path". calendar optionally names a WorkingCalendar whose
+    work week and holidays are used to count business days. as_of
+    optionally fixes the day urgency is measured from (default: today),
+    so the same request always gives the same ranking.
+    
+    recurring optionally lists recurring task templates: frequency
+    "daily" or "weekly", starts_on, and optionally interval (every N days
+    or weeks), weekdays (7 characters of 0/1, Monday first), ends_on and
+    horizon (days ahead, default 7). Their occurrences due from as_of to
+    as_of + horizon are ranked after the tasks, with ids like
+    "standup-notes@2025-11-28" (see tasks/scoring/recurrence.py).
+    
+    Optional "limit" (1-TASKS_MAX_PAGE_SIZE) returns one window of the
+    ranking plus "next_cursor"; send the same request with "cursor" set to
+    it for the next window. The ranking is cached between pages (see
+    tasks/ranking.py), so later pages do not re-run the analysis.
+    
+    Responses carry an ETag derived from the request (see
+    tasks/conditional.py); a repeat with If-None-Match set to it gets a
+    304 without the analysis being run.
+    
     Response format:
     {
         "success": true,
         "message": "Successfully analyzed 1 tasks",
         "strategy": "smart_balance",
+        "dependency_mode": "direct",
+        "as_of": "2025-11-28",
         "total_tasks": 1,
+        "limit": 50,                  (paginated requests only)
+        "next_cursor": null,          (paginated requests only)
         "results": [
             {
                 "id": 0,
@@ -45,62 +159,111 @@ def analyze_tasks_view(request):
                 "effort": 5,
                 "dependencies_count": 0
             }
-        ]
+        ],
+        "references": {
+            "dangling": [{"task": 2, "dependency": 99}],
+            "ambiguous": [],
+            "duplicate_ids": [],
+            "dangling_count": 1,
+            "ambiguous_count": 0,
+            "duplicate_id_count": 0
+        }
     }
+    
+    Dependencies may name a task by id, by its optional "external_id" or
+    by title, in that order. "references" lists the dependencies that
+    match no task (dangling; they are ignored), that match an external_id
+    or title several tasks share (ambiguous; also ignored), and ids used
+    by several tasks (see tasks/scoring/identity.py).
     """
     try:
-        data = request.data
-        tasks = data.get('tasks', [])
-        strategy = data.get('strategy', 'smart_balance')
-        
-        if not isinstance(tasks, list):
-            return Response({
-                'success': False,
-                'message': 'Invalid request format',
-                'error': 'tasks must be a list'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        body = request.data
+        data, error_response = _validated_request(body)
+        if error_response is not None:
+            return error_response
+        tasks = data['tasks']
+        strategy = data['strategy']
+        dependency_mode = data['dependency_mode']
         
-        if len(tasks) == 0:
+        if len(tasks) == 0 and not data['recurring']:
             return Response({
                 'success': True,
                 'message': 'No tasks provided',
                 'strategy': strategy,
+                'dependency_mode': dependency_mode,
                 'total_tasks': 0,
                 'results': []
             }, status=status.HTTP_200_OK)
         
-        valid_strategies = get_valid_strategies()
-        if strategy not in valid_strategies:
+        calendar = get_calendar(data['calendar'])
+        if calendar is None:
             return Response({
                 'success': False,
-                'message': 'Invalid strategy',
-                'error': f'Strategy must be one of: {", ".join(valid_strategies)}'
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {data["calendar"]}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        has_cycles, cycle_message = detect_circular_dependencies(tasks)
-        if has_cycles:
+        context = AnalysisContext(data['as_of'], calendar)
+        tasks = _with_occurrences(data, context.as_of)
+        
+        limit, limit_error = parse_limit(body.get('limit'))
+        cursor = body.get('cursor')
+        if limit_error or (cursor is not None and not isinstance(cursor, str)):
             return Response({
                 'success': False,
-                'message': 'Circular dependency detected',
-                'error': cycle_message
+                'message': 'Invalid pagination',
+                'error': limit_error or 'cursor must be a string'
             }, status=status.HTTP_400_BAD_REQUEST)
+        paginated = limit is not None or bool(cursor)
         
-        analysis_result = analyze_tasks(tasks, strategy)
+        key = ranking_key('analyze', tasks, strategy, dependency_mode, context.cache_key)
+        etag = etag_for(key, limit, cursor) if paginated else etag_for(key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        if not analysis_result['success']:
-            return Response({
-                'success': False,
-                'message': analysis_result['message'],
-                'error': analysis_result['error']
-            }, status=status.HTTP_400_BAD_REQUEST)
+        analysis_result = None
+        if paginated:
+            analysis_result = get_ranking(key)
         
-        return Response({
+        if analysis_result is None:
+            analysis_result = analyze_tasks(tasks, strategy, dependency_mode, context)
+            
+            if not analysis_result['success']:
+                return Response({
+                    'success': False,
+                    'message': analysis_result['message'],
+                    'error': analysis_result['error']
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            if paginated:
+                set_ranking(key, analysis_result)
+        
+        response = {
             'success': True,
             'message': analysis_result['message'],
             'strategy': strategy,
+            'dependency_mode': dependency_mode,
+            'as_of': str(context.as_of),
             'total_tasks': len(analysis_result['results']),
-            'results': analysis_result['results']
-        }, status=status.HTTP_200_OK)
+            'results': analysis_result['results'],
+            'references': analysis_result.get('references')
+        }
+        
+        if paginated:
+            limit = limit or DEFAULT_PAGE_SIZE
+            try:
+                page, next_cursor = window(analysis_result['results'], limit, cursor)
+            except ValueError as e:
+                return Response({
+                    'success': False,
+                    'message': 'Invalid cursor',
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            response.update(results=page, limit=limit, next_cursor=next_cursor)
+        
+        response = Response(response, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
     
     except json.JSONDecodeError:
         return Response({
@@ -109,6 +272,13 @@ def analyze_tasks_view(request):
             'error': 'Request body must be valid JSON'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
     except Exception as e:
         return Response({
             'success': False,
@@ -128,12 +298,19 @@ def suggest_tasks_view(request):
     Request (POST):
     {
         "tasks": [...],
-        "strategy": "smart_balance"
+        "strategy": "smart_balance",
+        "recurring": [...]            (optional, as for /analyze/)
     }
     
+    Occurrences of recurring templates compete with the tasks; only those
+    that can still make the top 3 are expanded.
+    
     Query params (GET):
     - tasks: JSON array of tasks
     - strategy: sorting strategy
+    - dependency_mode: direct (default), transitive or critical_path
+    - calendar: working calendar name (default: Monday-Friday)
+    - as_of: day urgency is measured from, YYYY-MM-DD (default: today)
     
     Response format:
     {
@@ -154,8 +331,6 @@ def suggest_tasks_view(request):
     try:
         if request.method == 'GET':
             tasks_str = request.GET.get('tasks')
-            strategy = request.GET.get('strategy', 'smart_balance')
-            
             if not tasks_str:
                 return Response({
                     'success': False,
@@ -171,27 +346,49 @@ def suggest_tasks_view(request):
                     'message': 'Invalid tasks JSON format',
                     'suggestions': []
                 }, status=status.HTTP_400_BAD_REQUEST)
+            
+            body = {
+                'tasks': tasks,
+                'strategy': request.GET.get('strategy', 'smart_balance'),
+                'dependency_mode': request.GET.get('dependency_mode', 'direct'),
+                'calendar': request.GET.get('calendar'),
+                'as_of': request.GET.get('as_of'),
+            }
         
         else:
-            data = request.data
-            tasks = data.get('tasks', [])
-            strategy = data.get('strategy', 'smart_balance')
+            body = request.data
+        
+        data, error_response = _validated_request(body, suggestions=[])
+        if error_response is not None:
+            return error_response
+        tasks = data['tasks']
+        strategy = data['strategy']
+        dependency_mode = data['dependency_mode']
         
-        if not isinstance(tasks, list) or len(tasks) == 0:
+        if len(tasks) == 0 and not data['recurring']:
             return Response({
                 'success': False,
                 'message': 'No tasks provided',
                 'suggestions': []
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        valid_strategies = get_valid_strategies()
-        if strategy not in valid_strategies:
+        calendar = get_calendar(data['calendar'])
+        if calendar is None:
             return Response({
                 'success': False,
-                'message': 'Invalid strategy',
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {data["calendar"]}',
                 'suggestions': []
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        context = AnalysisContext(data['as_of'], calendar)
+        
+        etag = etag_for(ranking_key(
+            'suggest', tasks, strategy, dependency_mode, context.cache_key, data['recurring']
+        ))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
         has_cycles, cycle_message = detect_circular_dependencies(tasks)
         if has_cycles:
             return Response({
@@ -201,7 +398,10 @@ def suggest_tasks_view(request):
                 'suggestions': []
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        suggestions_result = get_top_suggestions(tasks, strategy, count=3)
+        suggestions_result = get_top_suggestions(
+            tasks, strategy, count=3, dependency_mode=dependency_mode, context=context,
+            recurring=data['recurring']
+        )
         
         if not suggestions_result['success']:
             return Response({
@@ -210,12 +410,14 @@ def suggest_tasks_view(request):
                 'suggestions': []
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({
+        response = Response({
             'success': True,
             'strategy': strategy,
             'message': suggestions_result['message'],
             'suggestions': suggestions_result['suggestions']
         }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
     
     except json.JSONDecodeError:
         return Response({
@@ -224,6 +426,14 @@ def suggest_tasks_view(request):
             'suggestions': []
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail),
+            'suggestions': []
+        }, status=e.status_code)
+    
     except Exception as e:
         return Response({
             'success': False,
@@ -231,3 +441,1403 @@ def suggest_tasks_view(request):
             'error': str(e),
             'suggestions': []
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def analyze_batch_view(request):
+    """
+    POST /api/tasks/analyze-batch/
+    
+    Analyzes many independent task lists in a single request.
+    
+    Request format:
+    {
+        "jobs": [
+            {"id": "user-1", "tasks": [...], "strategy": "smart_balance"},
+            {"id": "user-2", "tasks": [...], "strategy": "deadline_driven",
+             "dependency_mode": "critical_path", "calendar": "uk"}
+        ],
+        "parallel": false,
+        "as_of": "2025-11-28"
+    }
+    
+    as_of (optional, default today) applies to every job.
+    
+    Response format:
+    {
+        "success": true,
+        "message": "Analyzed 2 jobs (0 failed)",
+        "total_jobs": 2,
+        "results": {
+            "user-1": {"success": true, "strategy": "smart_balance", "total_tasks": 3, "results": [...]},
+            "user-2": {"success": false, "message": "Circular dependency detected", "error": "..."}
+        }
+    }
+    """
+    try:
+        data = request.data
+        if not isinstance(data, dict):
+            return Response({
+                'success': False,
+                'message': 'Invalid request format',
+                'error': 'Request body must be a JSON object'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        jobs = data.get('jobs', [])
+        parallel = bool(data.get('parallel', False))
+        as_of, as_of_error = parse_as_of(data.get('as_of'))
+        
+        if not isinstance(jobs, list):
+            return Response({
+                'success': False,
+                'message': 'Invalid request format',
+                'error': 'jobs must be a list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if as_of_error:
+            return Response({
+                'success': False,
+                'message': 'Invalid as_of',
+                'error': as_of_error
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        max_jobs = getattr(settings, 'TASKS_BATCH_MAX_JOBS', 1000)
+        if len(jobs) > max_jobs:
+            return Response({
+                'success': False,
+                'message': 'Too many jobs',
+                'error': f'A batch may contain at most {max_jobs} jobs'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        limit_error = check_task_limits(
+            task
+            for job in jobs if isinstance(job, dict) and isinstance(job.get('tasks'), list)
+            for task in job['tasks']
+        )
+        if limit_error:
+            return Response({
+                'success': False,
+                'message': 'Request too large',
+                'error': limit_error
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        
+        batch_result = analyze_batch(
+            jobs,
+            parallel=parallel,
+            max_workers=getattr(settings, 'TASKS_BATCH_MAX_WORKERS', 4),
+            get_calendar=get_calendar,
+            as_of=as_of
+        )
+        
+        if not batch_result['success']:
+            return Response({
+                'success': False,
+                'message': batch_result['message'],
+                'error': batch_result['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'success': True,
+            'message': batch_result['message'],
+            'total_jobs': batch_result['total_jobs'],
+            'results': batch_result['results']
+        }, status=status.HTTP_200_OK)
+    
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def plan_tasks_view(request):
+    """
+    POST /api/tasks/plan/
+    
+    Orders tasks for execution: a task is never placed before its own
+    dependencies, and among ready tasks the highest priority score goes
+    first. With hours_per_day the plan is packed into daily buckets.
+    
+    Request format:
+    {
+        "tasks": [...],
+        "strategy": "smart_balance",
+        "dependency_mode": "direct",
+        "calendar": "default",
+        "as_of": "2025-11-28",
+        "hours_per_day": 6
+    }
+    
+    Response format:
+    {
+        "success": true,
+        "message": "Planned 2 tasks",
+        "strategy": "smart_balance",
+        "plan": [
+            {"order": 1, "id": 1, "title": "Set up database", "priority_score": 140,
+             "priority_level": "MEDIUM", "estimated_hours": 2, "start_day": 1, "end_day": 1},
+            {"order": 2, "id": 2, "title": "Build API", "priority_score": 165,
+             "priority_level": "HIGH", "estimated_hours": 5, "start_day": 2, "end_day": 2}
+        ],
+        "days": [
+            {"day": 1, "date": "2025-12-01", "hours": 2.0, "task_ids": [1]},
+            {"day": 2, "date": "2025-12-02", "hours": 5.0, "task_ids": [2]}
+        ]
+    }
+    """
+    try:
+        data, error_response = _validated_request(request.data)
+        if error_response is not None:
+            return error_response
+        strategy = data['strategy']
+        dependency_mode = data['dependency_mode']
+        
+        calendar = get_calendar(data['calendar'])
+        if calendar is None:
+            return Response({
+                'success': False,
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {data["calendar"]}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        context = AnalysisContext(data['as_of'], calendar)
+        
+        plan_result = plan_tasks(
+            _with_occurrences(data, context.as_of), strategy, data['hours_per_day'],
+            dependency_mode, context
+        )
+        
+        if not plan_result['success']:
+            return Response({
+                'success': False,
+                'message': plan_result['message'],
+                'error': plan_result['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'success': True,
+            'message': plan_result['message'],
+            'strategy': strategy,
+            'dependency_mode': dependency_mode,
+            'as_of': str(context.as_of),
+            'plan': plan_result['plan'],
+            'days': plan_result['days']
+        }, status=status.HTTP_200_OK)
+    
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Most suggestions a stored-task request may ask for
+MAX_STORED_SUGGESTIONS = 100
+
+
+def _bounded_int(value, default, high):
+    """value as an integer from 1 to high (default when missing), or None."""
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= high:
+        return None
+    return value
+
+
+@api_view(['POST'])
+def forecast_tasks_view(request):
+    """
+    POST /api/tasks/forecast/
+    
+    Ranks tasks on each day of a date range starting at as_of, to show how
+    priorities shift as deadlines approach. Tasks are scored once and only
+    re-scored on the days their urgency changes (see
+    tasks/scoring/forecast.py).
+    
+    Request format (same fields as /analyze/, plus):
+    {
+        "tasks": [...],
+        "as_of": "2025-11-28",
+        "days": 30,                   (1-366, default 30)
+        "top": 10,                    (tasks listed per day, 1-100, default 10)
+        "trajectory": false           (also return each task's score changes)
+    }
+    
+    Response format:
+    {
+        "success": true,
+        "message": "Forecast 30 days for 5 tasks",
+        "strategy": "smart_balance",
+        "dependency_mode": "direct",
+        "as_of": "2025-11-28",
+        "days": 30,
+        "forecast": [
+            {"date": "2025-11-28", "changed": 0,
+             "top": [{"id": 1, "title": "Fix login bug", "priority_score": 165,
+                      "priority_level": "HIGH", "urgency": 50}]},
+            ...
+        ],
+        "trajectories": [             (trajectory requests only)
+            {"id": 1, "title": "Fix login bug",
+             "points": [{"date": "2025-11-28", "priority_score": 165,
+                         "priority_level": "HIGH", "urgency": 50}]}
+        ]
+    }
+    """
+    try:
+        body = request.data
+        data, error_response = _validated_request(body)
+        if error_response is not None:
+            return error_response
+        strategy = data['strategy']
+        dependency_mode = data['dependency_mode']
+        
+        days = _bounded_int(body.get('days'), DEFAULT_DAYS, MAX_DAYS)
+        top = _bounded_int(body.get('top'), DEFAULT_TOP, MAX_TOP)
+        trajectory = body.get('trajectory', False)
+        if days is None or top is None or not isinstance(trajectory, bool):
+            return Response({
+                'success': False,
+                'message': 'Invalid forecast range',
+                'error': (f'days must be an integer from 1 to {MAX_DAYS}, top an integer '
+                          f'from 1 to {MAX_TOP} and trajectory a boolean')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        calendar = get_calendar(data['calendar'])
+        if calendar is None:
+            return Response({
+                'success': False,
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {data["calendar"]}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        context = AnalysisContext(data['as_of'], calendar)
+        
+        etag = etag_for(ranking_key(
+            'forecast', data['tasks'], strategy, dependency_mode, context.cache_key,
+            days, top, trajectory, data['recurring']
+        ))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        forecast_result = forecast_tasks(
+            data['tasks'], strategy, dependency_mode, context, days, top, trajectory,
+            data['recurring']
+        )
+        
+        if not forecast_result['success']:
+            return Response({
+                'success': False,
+                'message': forecast_result['message'],
+                'error': forecast_result['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = {
+            'success': True,
+            'message': forecast_result['message'],
+            'strategy': strategy,
+            'dependency_mode': dependency_mode,
+            'as_of': str(context.as_of),
+            'days': days,
+            'forecast': forecast_result['forecast']
+        }
+        if trajectory:
+            response['trajectories'] = forecast_result['trajectories']
+        
+        response = Response(response, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
+    
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def diff_tasks_view(request):
+    """
+    POST /api/tasks/diff/
+    
+    Compares two rankings and returns only what moved: changed ranks,
+    scores and priority levels, and tasks present on one side only.
+    Rankings are compared as score and rank arrays matched by id (see
+    tasks/scoring/diff.py), not as two full /analyze/ results.
+    
+    The top-level fields (same as /analyze/) describe the "from" ranking;
+    "to" overrides any of them for the other side. Leave "tasks" out of
+    "to" to compare one snapshot across days, strategies or modes. Task
+    ids must be unique on each side.
+    
+    Request format:
+    {
+        "tasks": [...],
+        "strategy": "smart_balance",
+        "as_of": "2025-11-28",
+        "to": {"as_of": "2025-11-29"},
+        "min_rank_change": 1,         (optional, default 1)
+        "min_score_change": 1         (optional, default 1)
+    }
+    
+    A task is reported when its rank moves by at least min_rank_change,
+    its score by at least min_score_change, or its priority level changes.
+    
+    Response format:
+    {
+        "success": true,
+        "message": "1 of 5 tasks changed",
+        "from": {"strategy": "smart_balance", "dependency_mode": "direct", "as_of": "2025-11-28"},
+        "to": {"strategy": "smart_balance", "dependency_mode": "direct", "as_of": "2025-11-29"},
+        "changes": [
+            {"id": 3, "title": "Fix login bug", "from_rank": 4, "to_rank": 1, "rank_change": 3,
+             "from_score": 120, "to_score": 165, "score_change": 45,
+             "from_level": "MEDIUM", "to_level": "HIGH"}
+        ],
+        "added": [],
+        "removed": [],
+        "unchanged": 4
+    }
+    """
+    try:
+        body = request.data
+        data, error_response = _validated_request(body)
+        if error_response is not None:
+            return error_response
+        
+        to = body.get('to', {})
+        if not isinstance(to, dict):
+            return Response({
+                'success': False,
+                'message': 'Invalid request',
+                'error': 'to must be an object'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        to_body = {
+            key: body[key]
+            for key in ('strategy', 'dependency_mode', 'calendar', 'as_of', 'recurring')
+            if key in body
+        }
+        to_body.update(to)
+        to_data, error_response = _validated_request(to_body, side='to')
+        if error_response is not None:
+            return error_response
+        if 'tasks' not in to:
+            to_data['tasks'] = data['tasks']
+        
+        min_rank_change = _bounded_int(body.get('min_rank_change'), 1, MAX_CHANGE_THRESHOLD)
+        min_score_change = _bounded_int(body.get('min_score_change'), 1, MAX_CHANGE_THRESHOLD)
+        if min_rank_change is None or min_score_change is None:
+            return Response({
+                'success': False,
+                'message': 'Invalid threshold',
+                'error': ('min_rank_change and min_score_change must be integers '
+                          f'from 1 to {MAX_CHANGE_THRESHOLD}')
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        sides = []
+        for side in (data, to_data):
+            calendar = get_calendar(side['calendar'])
+            if calendar is None:
+                return Response({
+                    'success': False,
+                    'message': 'Unknown calendar',
+                    'error': f'No working calendar named {side["calendar"]}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            context = AnalysisContext(side['as_of'], calendar)
+            sides.append({
+                'tasks': _with_occurrences(side, context.as_of),
+                'strategy': side['strategy'],
+                'dependency_mode': side['dependency_mode'],
+                'context': context,
+            })
+        before, after = sides
+        
+        etag = etag_for(ranking_key(
+            'diff',
+            [before['tasks'], before['strategy'], before['dependency_mode'],
+             before['context'].cache_key],
+            [None if 'tasks' not in to and 'recurring' not in to else after['tasks'],
+             after['strategy'],
+             after['dependency_mode'], after['context'].cache_key],
+            min_rank_change, min_score_change
+        ))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        diff_result = diff_rankings(before, after, min_rank_change, min_score_change)
+        if not diff_result['success']:
+            return Response({
+                'success': False,
+                'message': diff_result['message'],
+                'error': diff_result['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = Response({
+            'success': True,
+            'message': diff_result['message'],
+            'from': _diff_side(before),
+            'to': _diff_side(after),
+            'changes': diff_result['changes'],
+            'added': diff_result['added'],
+            'removed': diff_result['removed'],
+            'unchanged': diff_result['unchanged']
+        }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
+    
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _diff_side(side):
+    return {
+        'strategy': side['strategy'],
+        'dependency_mode': side['dependency_mode'],
+        'calendar': side['context'].calendar.name,
+        'as_of': str(side['context'].as_of),
+    }
+
+
+def _export_response(chunks, export_format, as_of):
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="tasks-{as_of}.{export_format}"'
+    return response
+
+
+def _export_format_error(export_format):
+    """Error response when export_format cannot be produced, else None."""
+    error = format_error(export_format)
+    if error is None:
+        return None
+    if export_format in EXPORT_FORMATS:
+        return Response({
+            'success': False,
+            'message': 'Export format not available',
+            'error': error
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+    return Response({
+        'success': False,
+        'message': 'Unknown export format',
+        'error': error
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def export_tasks_view(request, export_format):
+    """
+    POST /api/tasks/export/csv/ or /api/tasks/export/parquet/
+    
+    Analyzes tasks like /analyze/ (same request body; limit and cursor
+    are ignored) and returns the whole ranking as a CSV or Parquet
+    download, written out in chunks (see tasks/export.py). Parquet needs
+    the optional pyarrow package (501 without it).
+    
+    Columns: rank, then the /analyze/ result fields.
+    """
+    try:
+        format_response = _export_format_error(export_format)
+        if format_response is not None:
+            return format_response
+        
+        data, error_response = _validated_request(request.data)
+        if error_response is not None:
+            return error_response
+        tasks = data['tasks']
+        
+        calendar = get_calendar(data['calendar'])
+        if calendar is None:
+            return Response({
+                'success': False,
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {data["calendar"]}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        context = AnalysisContext(data['as_of'], calendar)
+        tasks = _with_occurrences(data, context.as_of)
+        
+        analysis_result = analyze_tasks(tasks, data['strategy'], data['dependency_mode'], context)
+        if not analysis_result['success']:
+            return Response({
+                'success': False,
+                'message': analysis_result['message'],
+                'error': analysis_result['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = analysis_result['results']
+        string_ids = any(isinstance(task['id'], str) for task in results)
+        return _export_response(
+            export_chunks(results, export_format, string_ids), export_format, context.as_of
+        )
+    
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@uses_analysis_reads
+def suggest_stored_tasks_view(request):
+    """
+    GET /api/tasks/stored/suggest/?strategy=smart_balance&count=3
+    
+    Returns the top tasks from the Task table without loading the table:
+    candidates are pre-filtered with indexed due_date/importance queries
+    and only those are scored (see tasks/stored.py). Dependencies count
+    the stored tasks directly waiting on each task. Occurrences of stored
+    recurring templates compete too, and are only expanded while they can
+    still make the top. Reads go to a read replica when one is configured.
+    
+    Query params:
+    - strategy: sorting strategy
+    - count: number of suggestions, 1-100 (default: 3)
+    - calendar: working calendar name (default: Monday-Friday)
+    - as_of: day urgency is measured from, YYYY-MM-DD (default: today)
+    
+    Response format:
+    {
+        "success": true,
+        "strategy": "smart_balance",
+        "as_of": "2025-11-28",
+        "message": "Top 3 tasks for today",
+        "candidates_scored": 14,
+        "suggestions": [
+            {
+                "id": 7,
+                "title": "Fix login bug",
+                "reason": "Due in 0-3 days: High urgency | ...",
+                "priority": "HIGH",
+                "due_date": "2025-11-28",
+                "priority_score": 165
+            }
+        ]
+    }
+    """
+    try:
+        strategy = request.GET.get('strategy', 'smart_balance')
+        calendar_name = request.GET.get('calendar')
+        
+        valid_strategies = get_valid_strategies()
+        if strategy not in valid_strategies:
+            return Response({
+                'success': False,
+                'message': 'Invalid strategy',
+                'error': f'Strategy must be one of: {", ".join(valid_strategies)}',
+                'suggestions': []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            count = int(request.GET.get('count', 3))
+        except ValueError:
+            count = 0
+        if not 1 <= count <= MAX_STORED_SUGGESTIONS:
+            return Response({
+                'success': False,
+                'message': 'Invalid count',
+                'error': f'count must be an integer from 1 to {MAX_STORED_SUGGESTIONS}',
+                'suggestions': []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        calendar = get_calendar(calendar_name)
+        if calendar is None:
+            return Response({
+                'success': False,
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {calendar_name}',
+                'suggestions': []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        as_of, as_of_error = parse_as_of(request.GET.get('as_of'))
+        if as_of_error:
+            return Response({
+                'success': False,
+                'message': 'Invalid as_of',
+                'error': as_of_error,
+                'suggestions': []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        context = AnalysisContext(as_of, calendar)
+        
+        etag = etag_for(ranking_key(
+            'stored-suggest', stored_version(), strategy, count, context.cache_key
+        ))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        result = suggest_stored_tasks(strategy, count, context)
+        
+        response = Response({
+            'success': True,
+            'strategy': strategy,
+            'as_of': str(context.as_of),
+            'message': result['message'],
+            'candidates_scored': result['candidates_scored'],
+            'suggestions': result['suggestions']
+        }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e),
+            'suggestions': []
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@uses_analysis_reads
+def analyze_stored_tasks_view(request):
+    """
+    GET /api/tasks/stored/analyze/?strategy=smart_balance&limit=50&cursor=...
+    
+    Ranks every task in the Task table, one window at a time. The full
+    ranking is computed on the first page and cached until a task is saved
+    or deleted (or TASKS_RANKING_CACHE_TIMEOUT passes), so later pages are
+    a cache read. Ties are ranked by id. Reads go to a read replica when
+    one is configured. Stored recurring templates (RecurringTask) add
+    their occurrences within each template's horizon, ranked after the
+    tasks on ties.
+    
+    Query params:
+    - strategy: sorting strategy
+    - dependency_mode: direct (default), transitive or critical_path
+    - calendar: working calendar name (default: Monday-Friday)
+    - as_of: day urgency is measured from, YYYY-MM-DD (default: today)
+    - limit: tasks per window, 1-TASKS_MAX_PAGE_SIZE (default: 50)
+    - cursor: next_cursor from the previous window
+    
+    Response format:
+    {
+        "success": true,
+        "message": "Successfully analyzed 120 tasks",
+        "strategy": "smart_balance",
+        "dependency_mode": "direct",
+        "as_of": "2025-11-28",
+        "total_tasks": 120,
+        "limit": 50,
+        "next_cursor": "WzE2NSw3XQ",
+        "results": [...]              (same fields as /analyze/)
+    }
+    """
+    try:
+        strategy = request.GET.get('strategy', 'smart_balance')
+        dependency_mode = request.GET.get('dependency_mode', 'direct')
+        calendar_name = request.GET.get('calendar')
+        cursor = request.GET.get('cursor')
+        
+        valid_strategies = get_valid_strategies()
+        if strategy not in valid_strategies:
+            return Response({
+                'success': False,
+                'message': 'Invalid strategy',
+                'error': f'Strategy must be one of: {", ".join(valid_strategies)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        valid_modes = get_valid_dependency_modes()
+        if dependency_mode not in valid_modes:
+            return Response({
+                'success': False,
+                'message': 'Invalid dependency mode',
+                'error': f'Dependency mode must be one of: {", ".join(valid_modes)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        limit, limit_error = parse_limit(request.GET.get('limit'))
+        if limit_error:
+            return Response({
+                'success': False,
+                'message': 'Invalid pagination',
+                'error': limit_error
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = limit or DEFAULT_PAGE_SIZE
+        
+        calendar = get_calendar(calendar_name)
+        if calendar is None:
+            return Response({
+                'success': False,
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {calendar_name}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        as_of, as_of_error = parse_as_of(request.GET.get('as_of'))
+        if as_of_error:
+            return Response({
+                'success': False,
+                'message': 'Invalid as_of',
+                'error': as_of_error
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        context = AnalysisContext(as_of, calendar)
+        
+        key = ranking_key(
+            'stored', stored_version(), strategy, dependency_mode, context.cache_key
+        )
+        etag = etag_for(key, limit, cursor)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        analysis_result = get_ranking(key)
+        if analysis_result is None:
+            analysis_result = rank_stored_tasks(strategy, dependency_mode, context)
+            if not analysis_result['success']:
+                return Response({
+                    'success': False,
+                    'message': analysis_result['message'],
+                    'error': analysis_result['error']
+                }, status=status.HTTP_400_BAD_REQUEST)
+            set_ranking(key, analysis_result)
+        
+        try:
+            page, next_cursor = window(analysis_result['results'], limit, cursor)
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'message': 'Invalid cursor',
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = Response({
+            'success': True,
+            'message': analysis_result['message'],
+            'strategy': strategy,
+            'dependency_mode': dependency_mode,
+            'as_of': str(context.as_of),
+            'total_tasks': len(analysis_result['results']),
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'results': page,
+            'references': analysis_result.get('references')
+        }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def export_stored_tasks_view(request, export_format):
+    """
+    GET /api/tasks/stored/export/csv/?strategy=smart_balance
+    GET /api/tasks/stored/export/parquet/
+    
+    Every stored task, ranked like /stored/analyze/, as a CSV or Parquet
+    download. In the direct dependency mode the table is scored through a
+    server-side cursor and the rows are fetched in rank order while the
+    download is written, so memory does not grow with the table (see
+    tasks/export.py). Reads go to a read replica when one is configured.
+    
+    Query params: strategy, dependency_mode, calendar, as_of (as for
+    /stored/analyze/).
+    """
+    try:
+        format_response = _export_format_error(export_format)
+        if format_response is not None:
+            return format_response
+        
+        strategy = request.GET.get('strategy', 'smart_balance')
+        dependency_mode = request.GET.get('dependency_mode', 'direct')
+        calendar_name = request.GET.get('calendar')
+        
+        valid_strategies = get_valid_strategies()
+        if strategy not in valid_strategies:
+            return Response({
+                'success': False,
+                'message': 'Invalid strategy',
+                'error': f'Strategy must be one of: {", ".join(valid_strategies)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        valid_modes = get_valid_dependency_modes()
+        if dependency_mode not in valid_modes:
+            return Response({
+                'success': False,
+                'message': 'Invalid dependency mode',
+                'error': f'Dependency mode must be one of: {", ".join(valid_modes)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        calendar = get_calendar(calendar_name)
+        if calendar is None:
+            return Response({
+                'success': False,
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {calendar_name}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        as_of, as_of_error = parse_as_of(request.GET.get('as_of'))
+        if as_of_error:
+            return Response({
+                'success': False,
+                'message': 'Invalid as_of',
+                'error': as_of_error
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        context = AnalysisContext(as_of, calendar)
+        
+        rows, analysis_result = stored_export(strategy, dependency_mode, context)
+        if rows is None:
+            return Response({
+                'success': False,
+                'message': analysis_result['message'],
+                'error': analysis_result['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return _export_response(export_chunks(rows, export_format), export_format, context.as_of)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+async def live_stored_tasks_view(request):
+    """
+    GET /api/tasks/stored/live/?strategy=smart_balance&limit=50
+    
+    Server-sent events with live changes to the stored-task ranking (see
+    tasks/live.py): a "snapshot" event with the top `limit` tasks as of
+    today, then a "ranking" event with only the entries whose rank, score
+    or title changed, and the ids that left the top, whenever tasks change
+    or the day rolls over. Needs an ASGI server (backend/asgi.py); a WSGI
+    worker would hold a thread per open stream.
+    
+    Query params:
+    - strategy: sorting strategy
+    - dependency_mode: direct (default), transitive or critical_path
+    - calendar: working calendar name (default: Monday-Friday)
+    - limit: tasks in the live window, 1-TASKS_MAX_PAGE_SIZE (default: 50)
+    
+    Events:
+    event: snapshot
+    data: {"as_of": "2025-11-28", "total_tasks": 120,
+           "results": [{"id": 7, "rank": 1, "title": "Fix login bug",
+                        "priority_score": 165, "priority_level": "HIGH"}, ...]}
+    
+    event: ranking
+    data: {"as_of": "2025-11-28", "total_tasks": 121,
+           "changes": [{"id": 9, "rank": 1, ...}, {"id": 7, "rank": 2, ...}],
+           "removed": [12]}
+    """
+    strategy = request.GET.get('strategy', 'smart_balance')
+    dependency_mode = request.GET.get('dependency_mode', 'direct')
+    calendar_name = request.GET.get('calendar')
+    
+    error = None
+    if not isinstance(request, ASGIRequest):
+        error = ('Live updates need an ASGI server', 'Serve backend.asgi:application, e.g. with uvicorn',
+                 status.HTTP_501_NOT_IMPLEMENTED)
+    elif strategy not in get_valid_strategies():
+        error = ('Invalid strategy', f'Strategy must be one of: {", ".join(get_valid_strategies())}',
+                 status.HTTP_400_BAD_REQUEST)
+    elif dependency_mode not in get_valid_dependency_modes():
+        error = ('Invalid dependency mode',
+                 f'Dependency mode must be one of: {", ".join(get_valid_dependency_modes())}',
+                 status.HTTP_400_BAD_REQUEST)
+    else:
+        limit, limit_error = parse_limit(request.GET.get('limit'))
+        if limit_error:
+            error = ('Invalid pagination', limit_error, status.HTTP_400_BAD_REQUEST)
+        elif await sync_to_async(get_calendar)(calendar_name) is None:
+            error = ('Unknown calendar', f'No working calendar named {calendar_name}',
+                     status.HTTP_400_BAD_REQUEST)
+    
+    if error is not None:
+        message, detail, code = error
+        return JsonResponse({'success': False, 'message': message, 'error': detail}, status=code)
+    
+    subscription = broadcaster.subscribe()
+    if subscription is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Too many live streams',
+            'error': 'This server has reached its live stream limit; retry later'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    response = StreamingHttpResponse(
+        ranking_events(
+            subscription, strategy, dependency_mode, calendar_name, limit or DEFAULT_PAGE_SIZE
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _task_not_found(task_id):
+    return Response({
+        'success': False,
+        'message': 'Task not found',
+        'error': f'No stored task with id {task_id}'
+    }, status=status.HTTP_404_NOT_FOUND)
+
+
+def _related_tasks_response(request, task_id, direction):
+    """Descendants or ancestors of a stored task, nearest first, as a response."""
+    limit, limit_error = parse_limit(request.GET.get('limit'))
+    if limit_error:
+        return Response({
+            'success': False,
+            'message': 'Invalid pagination',
+            'error': limit_error
+        }, status=status.HTTP_400_BAD_REQUEST)
+    limit = limit or DEFAULT_PAGE_SIZE
+    
+    def related(index):
+        if index.node_of.get(task_id) not in index.stored:
+            return None
+        return getattr(index, direction)(task_id)
+    
+    found = query_index(related)
+    if found is None:
+        return _task_not_found(task_id)
+    
+    titles = dict(Task.objects.filter(pk__in=[i for i, _ in found[:limit]]).values_list('id', 'title'))
+    return Response({
+        'success': True,
+        'task_id': task_id,
+        'total': len(found),
+        'limit': limit,
+        'results': [
+            {'id': i, 'title': titles.get(i, 'Untitled'), 'depth': depth}
+            for i, depth in found[:limit]
+        ]
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def task_descendants_view(request, task_id):
+    """
+    GET /api/tasks/stored/<id>/descendants/?limit=50
+    
+    Stored tasks that finishing task <id> unblocks, directly or
+    transitively, nearest first (depth 1 = waiting on it directly). Served
+    from the reachability index (see tasks/reachability.py).
+    
+    Response format:
+    {
+        "success": true,
+        "task_id": 7,
+        "total": 12,
+        "limit": 50,
+        "results": [{"id": 9, "title": "Build API", "depth": 1}, ...]
+    }
+    """
+    try:
+        return _related_tasks_response(request, task_id, 'descendants')
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def task_ancestors_view(request, task_id):
+    """
+    GET /api/tasks/stored/<id>/ancestors/?limit=50
+    
+    Stored tasks that task <id> is waiting on, directly or transitively,
+    nearest first. Same response format as /descendants/.
+    """
+    try:
+        return _related_tasks_response(request, task_id, 'ancestors')
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def task_reachable_view(request):
+    """
+    GET /api/tasks/stored/reachable/?from=7&to=9
+    
+    Whether stored task `to` waits on task `from`, directly or
+    transitively (so finishing `from` is needed to unblock `to`).
+    
+    Response format:
+    {
+        "success": true,
+        "from": 7,
+        "to": 9,
+        "reachable": true
+    }
+    """
+    try:
+        try:
+            source = int(request.GET.get('from', ''))
+            target = int(request.GET.get('to', ''))
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Invalid task ids',
+                'error': 'from and to must be task ids'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        def check(index):
+            """(id of a task that is not stored, or None; whether target is reachable)"""
+            for task_id in (source, target):
+                if index.node_of.get(task_id) not in index.stored:
+                    return task_id, False
+            return None, index.reachable(source, target)
+        
+        missing, reachable = query_index(check)
+        if missing is not None:
+            return _task_not_found(missing)
+        
+        return Response({
+            'success': True,
+            'from': source,
+            'to': target,
+            'reachable': reachable
+        }, status=status.HTTP_200_OK)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def bulk_tasks_view(request):
+    """
+    POST /api/tasks/stored/bulk/
+    
+    Change every stored task matching `ids` and/or `filter` at once, in
+    one transaction and one bump of the stored version (see tasks/bulk.py).
+    
+    Request body:
+    {
+        "ids": [1, 2, 3],                                (optional)
+        "filter": {"due_date__lt": "2025-01-01", "importance__gte": 8},
+        "set": {"importance": 9, "dependencies": [4]},   (optional)
+        "shift_due_date": 7,                             (days, optional)
+        "delete": false,                                 (true instead of set/shift)
+        "confirm_count": 120                             (filter deletes only)
+    }
+    
+    A delete selected by a filter must send confirm_count, the number of
+    tasks the filter matches; otherwise nothing is deleted and a 409
+    reports that number.
+    
+    Response format:
+    {
+        "success": true,
+        "message": "Updated 3 tasks",
+        "matched": 3,
+        "missing": [],
+        "deleted": false,
+        "version": "42.9f0c..."
+    }
+    """
+    try:
+        spec, errors = parse_bulk_request(request.data, get_admission_settings()['MAX_TASKS'])
+        if errors:
+            return Response({
+                'success': False,
+                'message': 'Invalid request',
+                'error': error_message(errors),
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = apply_bulk(spec)
+        if not result['success']:
+            conflict = result['message'] == CONFIRMATION_REQUIRED
+            return Response(result, status=(
+                status.HTTP_409_CONFLICT if conflict else status.HTTP_400_BAD_REQUEST
+            ))
+        
+        return Response(result, status=status.HTTP_200_OK)
+    
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def metrics_view(request):
+    """
+    GET /api/tasks/metrics/
+    
+    Counters of this worker process (see tasks/metrics.py) and the
+    admission limits in force.
+    
+    Response:
+    {
+        "success": true,
+        "metrics": {"admission.admitted": 120, "admission.rejected.rate_limited": 3},
+        "limits": {"RATE": 10.0, "BURST": 40, "MAX_BODY_SIZE": 10485760, ...}
+    }
+    """
+    config = get_admission_settings()
+    return Response({
+        'success': True,
+        'metrics': metrics.snapshot(),
+        'limits': {
+            name: config[name]
+            for name in ('RATE', 'BURST', 'MAX_BODY_SIZE', 'MAX_TASKS', 'MAX_DEPENDENCY_EDGES')
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def create_job_view(request):
+    """
+    POST /api/tasks/jobs/
+    
+    Queue an analysis for the job workers (python manage.py run_jobs).
+    Takes the /analyze/ request fields except limit/cursor; follow the
+    job at /api/tasks/jobs/<id>/ or /api/tasks/jobs/<id>/events/ and read
+    the ranking from /api/tasks/jobs/<id>/results/.
+    
+    Response (202):
+    {
+        "success": true,
+        "message": "Job queued",
+        "job": {"id": "6f1c...", "status": "queued", "progress": 0.0, ...}
+    }
+    """
+    try:
+        data, error_response = _validated_request(request.data)
+        if error_response is not None:
+            return error_response
+        
+        tasks = _with_occurrences(data, data['as_of'] or date.today())
+        if len(tasks) == 0:
+            return Response({
+                'success': False,
+                'message': 'No tasks provided',
+                'error': 'tasks must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if get_calendar(data['calendar']) is None:
+            return Response({
+                'success': False,
+                'message': 'Unknown calendar',
+                'error': f'No working calendar named {data["calendar"]}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        job = enqueue_job(
+            tasks, data['strategy'], data['dependency_mode'], data['calendar'],
+            data['as_of']
+        )
+        metrics.increment('jobs.queued')
+        
+        return Response({
+            'success': True,
+            'message': 'Job queued',
+            'job': job_summary(job)
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid request body',
+            'error': str(e.detail)
+        }, status=e.status_code)
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': 'Server error occurred',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _job_not_found():
+    return Response({
+        'success': False,
+        'message': 'Job not found',
+        'error': 'No such job, or its results have expired'
+    }, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+def job_view(request, job_id):
+    """
+    GET /api/tasks/jobs/<id>/
+    
+    Status and progress of a job: status is queued, running, succeeded,
+    failed or cancelled; progress is tasks_done / total_tasks.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return _job_not_found()
+    return Response({
+        'success': True,
+        'job': job_summary(job)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def cancel_job_view(request, job_id):
+    """
+    POST /api/tasks/jobs/<id>/cancel/
+    
+    Cancel a job. Queued jobs are cancelled at once; running jobs stop at
+    their next progress update (status stays "running" until then).
+    """
+    job = get_job(job_id)
+    if job is None:
+        return _job_not_found()
+    job = cancel_job(job)
+    return Response({
+        'success': True,
+        'message': 'Cancellation requested' if job.status == 'running' else f'Job {job.status}',
+        'job': job_summary(job)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def job_results_view(request, job_id):
+    """
+    GET /api/tasks/jobs/<id>/results/?limit=50&cursor=...
+    
+    One window of a succeeded job's ranking, paginated like /analyze/
+    (limit 1-TASKS_MAX_PAGE_SIZE, default 50; next_cursor is null on the
+    last page). 409 while the job has not succeeded.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return _job_not_found()
+    
+    if job.status != 'succeeded':
+        return Response({
+            'success': False,
+            'message': 'Results not available',
+            'error': f'Job is {job.status}',
+            'job': job_summary(job)
+        }, status=status.HTTP_409_CONFLICT)
+    
+    limit, limit_error = parse_limit(request.GET.get('limit'))
+    if limit_error:
+        return Response({
+            'success': False,
+            'message': 'Invalid pagination',
+            'error': limit_error
+        }, status=status.HTTP_400_BAD_REQUEST)
+    limit = limit or DEFAULT_PAGE_SIZE
+    
+    result = job_result(job)
+    try:
+        page, next_cursor = window(result['results'], limit, request.GET.get('cursor'))
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid cursor',
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': job.message,
+        'strategy': result['strategy'],
+        'dependency_mode': result['dependency_mode'],
+        'as_of': result['as_of'],
+        'total_tasks': len(result['results']),
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'results': page
+    }, status=status.HTTP_200_OK)
+
+
+@require_GET
+async def job_events_view(request, job_id):
+    """
+    GET /api/tasks/jobs/<id>/events/
+    
+    Server-sent events: a "progress" event with the job summary whenever it
+    changes, then "done" once the job has finished. The stream closes after
+    TASKS_JOBS STREAM_TIMEOUT seconds; EventSource clients reconnect.
+    Needs an ASGI server, like /stored/live/: under WSGI each open stream
+    would hold a worker, so it answers 501 and clients poll
+    GET /api/tasks/jobs/<id>/ instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            'success': False,
+            'message': 'Event streams need an ASGI server',
+            'error': 'Serve backend.asgi:application, e.g. with uvicorn, or poll /api/tasks/jobs/<id>/'
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+    
+    if await sync_to_async(get_job)(job_id) is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Job not found',
+            'error': 'No such job, or its results have expired'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    response = StreamingHttpResponse(job_events(job_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,86 @@
+"""
+Startup warmup for the scoring engine (see TasksConfig.ready).
+
+Everything here would otherwise happen lazily in the first requests of
+every worker: importing and priming dateutil's parser, compiling
+calendars, filling the date and explanation caches, resolving the
+URLconf (which imports the views) and loading DRF's configured classes.
+No database queries.
+"""
+import logging
+import time
+from datetime import date, timedelta
+
+from .calendars import preload_file_calendars
+from .scoring import analyze_tasks, tables
+from .scoring.analyzer import generate_explanation
+from .scoring.calendar import default_calendar
+from .scoring.context import AnalysisContext
+from .scoring.validators import parse_date
+
+logger = logging.getLogger(__name__)
+
+# ISO dates this far around today are parsed into the date cache up front
+WARM_DATE_DAYS_BEFORE = 30
+WARM_DATE_DAYS_AFTER = 120
+
+
+def warm_scoring():
+    """Fill the caches that depend on strategy weights and score tables."""
+    table = tables.active()
+    urgencies = {table.overdue_urgency, *table.source['urgency']['points'],
+                 table.source['urgency']['beyond']}
+    importances = table.source['importance']['points']
+    efforts = table.source['effort']['points']
+    for urgency in urgencies:
+        for importance in importances:
+            for effort in efforts:
+                generate_explanation(urgency, importance, effort, 0)
+
+    sample = [
+        {'id': 1, 'title': 'Warmup', 'due_date': str(date.today()), 'importance': 5,
+         'estimated_hours': 1, 'dependencies': []},
+        {'id': 2, 'title': 'Warmup', 'due_date': '12/31/2030', 'importance': 8,
+         'estimated_hours': 4, 'dependencies': [1]},
+    ]
+    analyze_tasks(sample, context=AnalysisContext())
+
+
+def warm_up():
+    """Run every warmup step; returns {step: milliseconds}."""
+    timings = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings[name] = (time.perf_counter() - start) * 1000
+
+    today = date.today()
+
+    def dates():
+        for offset in range(-WARM_DATE_DAYS_BEFORE, WARM_DATE_DAYS_AFTER + 1):
+            parse_date(str(today + timedelta(days=offset)))
+        # Free-form input goes through dateutil's full tokenizer
+        parse_date('Dec 31 2030')
+
+    def calendars():
+        default_calendar()
+        preload_file_calendars()
+
+    def urls():
+        from django.urls import get_resolver
+        from rest_framework.settings import api_settings
+        get_resolver().resolve('/api/tasks/analyze/')
+        # DRF imports its renderer/parser/negotiation classes on first access
+        for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES',
+                     'DEFAULT_CONTENT_NEGOTIATION_CLASS', 'DEFAULT_AUTHENTICATION_CLASSES',
+                     'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_THROTTLE_CLASSES'):
+            getattr(api_settings, name)
+
+    step('dates', dates)
+    step('calendars', calendars)
+    step('scoring', warm_scoring)
+    step('urls', urls)
+
+    logger.debug('Scoring warmup: %s', ', '.join(f'{k} {v:.1f} ms' for k, v in timings.items()))
+    return timings